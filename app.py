@@ -1,42 +1,107 @@
 # Copyright (c) Microsoft Corporation. All rights reserved.
 # Licensed under the MIT License.
 
-import sys
-import traceback
+import asyncio
+import hmac
+import os
+import time
 from datetime import datetime
 from http import HTTPStatus
+from time import perf_counter
 
 from aiohttp import web
 from aiohttp.web import Request, Response, json_response
 from botbuilder.core import (
-    BotFrameworkAdapter,
     BotFrameworkAdapterSettings,
     ConversationState,
-    MemoryStorage,
     TurnContext,
     UserState,
 )
 from botbuilder.core.integration import aiohttp_error_middleware
 from botbuilder.schema import Activity, ActivityTypes
+from botframework.connector.auth import AuthenticationConstants, ChannelValidation
 
+from auth import CachingBotFrameworkAdapter, SigningKeyCache, TokenValidationCache
 from bots import CustomPromptBot
 from config import DefaultConfig
+from helpers import (
+    ActivityTooLarge,
+    AdmissionController,
+    EventLog,
+    METRICS,
+    Overloaded,
+    PreforkServer,
+    WORKER_INDEX_ENV,
+    parse_activity,
+    phase_of,
+)
+from middleware import OutboundBatchingMiddleware, TranscriptRecorderMiddleware
+from proactive import ConversationReferenceStore, FanOutProgress, ProactiveFanOut
+from scheduling import CalendarStore
+from storage import BoundedMemoryStorage, SqliteStorage, create_storage
+from transcripts import TranscriptWriter
 
 CONFIG = DefaultConfig()
+METRICS.enabled = CONFIG.METRICS_ENABLED
+
+# Structured event log; records are formatted and written off the event loop.
+EVENTS = EventLog(
+    CONFIG.EVENT_LOG_PATH,
+    max_bytes=CONFIG.EVENT_LOG_MAX_MB * 1024 * 1024,
+    backup_count=CONFIG.EVENT_LOG_BACKUPS,
+    queue_size=CONFIG.EVENT_LOG_QUEUE_SIZE,
+)
+
 
 # Create adapter.
 # See https://aka.ms/about-bot-adapter to learn more about how bots work.
 SETTINGS = BotFrameworkAdapterSettings(CONFIG.APP_ID, CONFIG.APP_PASSWORD)
-ADAPTER = BotFrameworkAdapter(SETTINGS)
+TOKEN_CACHE = TokenValidationCache(max_size=CONFIG.AUTH_TOKEN_CACHE_SIZE)
+ADAPTER = CachingBotFrameworkAdapter(SETTINGS, TOKEN_CACHE)
+if CONFIG.OUTBOUND_BATCHING:
+    ADAPTER.use(
+        OutboundBatchingMiddleware(merge_text=CONFIG.OUTBOUND_MERGE_TEXT, event_log=EVENTS)
+    )
+# Registered after batching so the merged replies are what gets recorded.
+TRANSCRIPTS = None
+if CONFIG.TRANSCRIPT_DIR:
+    TRANSCRIPTS = TranscriptWriter(
+        CONFIG.TRANSCRIPT_DIR,
+        segment_bytes=CONFIG.TRANSCRIPT_SEGMENT_MB * 1024 * 1024,
+        queue_size=CONFIG.TRANSCRIPT_QUEUE_SIZE,
+    )
+    ADAPTER.use(TranscriptRecorderMiddleware(TRANSCRIPTS))
+
+
+# Token signing keys, shared by every validation and kept fresh in the
+# background so no request waits on the metadata endpoint.
+if CONFIG.OPENID_METADATA_URL:
+    ChannelValidation.open_id_metadata_endpoint = CONFIG.OPENID_METADATA_URL
+SIGNING_KEYS = SigningKeyCache(
+    (
+        CONFIG.OPENID_METADATA_URL or AuthenticationConstants.TO_BOT_FROM_CHANNEL_OPENID_METADATA_URL,
+        AuthenticationConstants.TO_BOT_FROM_EMULATOR_OPENID_METADATA_URL,
+    ),
+    refresh_interval=CONFIG.SIGNING_KEY_REFRESH_INTERVAL,
+)
+SIGNING_KEYS.install()
 
 
 # Catch-all for errors.
 async def on_error(context: TurnContext, error: Exception):
-    # This check writes out errors to console log .vs. app insights.
-    # NOTE: In production environment, you should consider logging this to Azure
-    #       application insights.
-    print(f"\n [on_turn_error] unhandled error: {error}", file=sys.stderr)
-    traceback.print_exc()
+    # Queued for the event log, tagged with where the turn failed; the
+    # traceback is formatted by the log's writer thread.
+    activity = context.activity
+    flow = (CONVERSATION_STATE.get(context) or {}).get("ConversationFlow")
+    EVENTS.error(
+        "turn_error",
+        error,
+        conversation_id=activity.conversation.id if activity.conversation else "",
+        channel_id=activity.channel_id,
+        activity_type=activity.type,
+        state=flow.CalenderState.name if flow is not None else "",
+        phase=phase_of(error),
+    )
 
     # Send a message to the user
     await context.send_activity("The bot encountered an error or bug.")
@@ -65,37 +130,292 @@ async def on_error(context: TurnContext, error: Exception):
 # In this case, we want an unbound method, so MethodType is not needed.
 ADAPTER.on_turn_error = on_error
 
-# Create MemoryStorage and state
-MEMORY = MemoryStorage()
-USER_STATE = UserState(MEMORY)
-CONVERSATION_STATE = ConversationState(MEMORY)
+
+# Create storage and state
+STORAGE = create_storage(CONFIG)
+USER_STATE = UserState(STORAGE)
+CONVERSATION_STATE = ConversationState(STORAGE)
 
 # Create Bot
-BOT = CustomPromptBot(CONFIG, CONVERSATION_STATE, USER_STATE)
+BOT = CustomPromptBot(
+    CONFIG,
+    CONVERSATION_STATE,
+    USER_STATE,
+    CalendarStore(STORAGE),
+    ConversationReferenceStore(STORAGE),
+    EVENTS,
+)
+# Background warm-up started by on_startup, reported by /ready.
+WARM_UP = {"task": None, "seconds": None, "error": None}
+
+
+# Orders turns per conversation and sheds load when saturated.
+ADMISSION = AdmissionController(
+    max_in_flight=CONFIG.MAX_IN_FLIGHT_TURNS,
+    max_waiting=CONFIG.MAX_WAITING_TURNS,
+    max_per_conversation=CONFIG.MAX_TURNS_PER_CONVERSATION,
+    queue_timeout=CONFIG.ADMISSION_QUEUE_TIMEOUT,
+    retry_after=CONFIG.RETRY_AFTER_SECONDS,
+)
 
 
 # Listen for incoming requests on /api/messages.
 async def messages(req: Request) -> Response:
     # Main bot message handler.
-    if "application/json" in req.headers["Content-Type"]:
-        body = await req.json()
-    else:
-        return Response(status=HTTPStatus.UNSUPPORTED_MEDIA_TYPE)
+    with METRICS.span("request"):
+        with METRICS.span("parse"):
+            if "application/json" not in req.headers.get("Content-Type", ""):
+                return Response(status=HTTPStatus.UNSUPPORTED_MEDIA_TYPE)
+
+            if CONFIG.FAST_ACTIVITY_PARSING:
+                if (req.content_length or 0) > CONFIG.MAX_ACTIVITY_BYTES:
+                    return Response(status=HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+                try:
+                    activity = parse_activity(
+                        await req.read(), CONFIG.MAX_ACTIVITY_BYTES
+                    )
+                except ActivityTooLarge:
+                    return Response(status=HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+                except ValueError:
+                    return Response(status=HTTPStatus.BAD_REQUEST)
+            else:
+                body = await req.json()
+                activity = Activity().deserialize(body)
+        auth_header = req.headers["Authorization"] if "Authorization" in req.headers else ""
+
+        logic = BOT.on_turn
+        if METRICS.enabled:
+            # Time from handing the activity to the adapter until the bot
+            # runs is token validation plus middleware.
+            adapter_started = perf_counter()
+
+            async def logic(turn_context: TurnContext):
+                METRICS.observe("auth", perf_counter() - adapter_started)
+                with METRICS.span("turn"):
+                    await BOT.on_turn(turn_context)
+
+        conversation_id = activity.conversation.id if activity.conversation else ""
+        try:
+            async with ADMISSION.admit(conversation_id):
+                response = await ADAPTER.process_activity(activity, auth_header, logic)
+        except Overloaded as error:
+            return Response(
+                status=error.status, headers={"Retry-After": str(error.retry_after)}
+            )
+        if response:
+            return json_response(data=response.body, status=response.status)
+        return Response(status=HTTPStatus.OK)
 
-    activity = Activity().deserialize(body)
-    auth_header = req.headers["Authorization"] if "Authorization" in req.headers else ""
 
-    response = await ADAPTER.process_activity(activity, auth_header, BOT.on_turn)
-    if response:
-        return json_response(data=response.body, status=response.status)
-    return Response(status=HTTPStatus.OK)
+STARTED = time.time()
+
+
+async def health(req: Request) -> Response:
+    # Answered by whichever worker accepted the connection.
+    return json_response(
+        {
+            "status": "ok",
+            "pid": os.getpid(),
+            "worker": int(os.environ.get(WORKER_INDEX_ENV, "0")),
+            "uptime": round(time.time() - STARTED, 1),
+        }
+    )
+
+
+async def ready(req: Request) -> Response:
+    # Readiness probe: 503 until the background warm-up has finished.
+    return json_response(
+        {"ready": BOT.is_ready, "warm_up_seconds": WARM_UP["seconds"], "error": WARM_UP["error"]},
+        status=HTTPStatus.OK if BOT.is_ready else HTTPStatus.SERVICE_UNAVAILABLE,
+    )
+
+
+# Proactive reminder runs; one at a time per process.
+FAN_OUT = ProactiveFanOut(
+    ADAPTER,
+    CONFIG.APP_ID,
+    concurrency=CONFIG.PROACTIVE_CONCURRENCY,
+    rate_per_second=CONFIG.PROACTIVE_RATE_PER_SECOND,
+    burst=max(1, int(CONFIG.PROACTIVE_RATE_PER_SECOND)),
+    max_attempts=CONFIG.PROACTIVE_MAX_ATTEMPTS,
+)
+NUDGES = {"task": None, "progress": None}
+
+
+async def nudges(req: Request) -> Response:
+    expected = f"Bearer {CONFIG.PROACTIVE_ADMIN_TOKEN}"
+    if not hmac.compare_digest(req.headers.get("Authorization", ""), expected):
+        return Response(status=HTTPStatus.UNAUTHORIZED)
+
+    status = HTTPStatus.OK
+    if req.method == "POST":
+        if NUDGES["task"] is not None and not NUDGES["task"].done():
+            return json_response(NUDGES["progress"].as_dict(), status=HTTPStatus.CONFLICT)
+        NUDGES["progress"] = FanOutProgress()
+        NUDGES["task"] = asyncio.ensure_future(
+            FAN_OUT.run(
+                BOT.reference_store.iterate(), BOT.build_nudge, progress=NUDGES["progress"]
+            )
+        )
+        status = HTTPStatus.ACCEPTED
+
+    if NUDGES["progress"] is None:
+        return json_response({}, status=HTTPStatus.NOT_FOUND)
+    return json_response(NUDGES["progress"].as_dict(), status=status)
+
+
+async def metrics(req: Request) -> Response:
+    # Prometheus text exposition format.
+    return Response(
+        body=METRICS.render().encode("utf-8"),
+        headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"},
+    )
 
 
 APP = web.Application(middlewares=[aiohttp_error_middleware])
 APP.router.add_post("/api/messages", messages)
+APP.router.add_get("/health", health)
+APP.router.add_get("/ready", ready)
+if CONFIG.PROACTIVE_ADMIN_TOKEN:
+    APP.router.add_post("/api/proactive/nudges", nudges)
+    APP.router.add_get("/api/proactive/nudges", nudges)
+if CONFIG.METRICS_ENABLED:
+    APP.router.add_get("/metrics", metrics)
+    METRICS.add_stats(
+        "qna_cache", BOT.answer_cache.stats, counters=("hits", "misses", "evictions")
+    )
+    METRICS.add_stats(
+        "qna_client",
+        BOT.qna_client.stats,
+        counters=("requests", "coalesced", "timeouts", "failures"),
+    )
+    if BOT.local_kb is not None:
+        METRICS.add_stats(
+            "local_kb",
+            BOT.local_kb.stats,
+            counters=("hits", "misses", "reloads", "reload_errors"),
+        )
+    METRICS.add_stats("recognizer_cache", BOT.recognizers.stats, counters=("hits", "misses"))
+    if isinstance(STORAGE, BoundedMemoryStorage):
+        METRICS.add_stats("state_storage", STORAGE.stats, counters=("evictions", "expirations"))
+    METRICS.add_stats("auth_token_cache", TOKEN_CACHE.stats, counters=("hits", "misses"))
+    METRICS.add_stats(
+        "auth_signing_keys", SIGNING_KEYS.stats, counters=("refreshes", "refresh_errors")
+    )
+    METRICS.add_stats(
+        "admission",
+        ADMISSION.stats,
+        counters=("admitted", "rejected_conversation", "rejected_overload"),
+    )
+    METRICS.add_stats(
+        "event_log",
+        EVENTS.stats,
+        counters=("written", "dropped", "sampled_out", "write_errors", "rotations"),
+    )
+    if TRANSCRIPTS is not None:
+        METRICS.add_stats(
+            "transcript",
+            TRANSCRIPTS.stats,
+            counters=("records", "bytes", "segments", "dropped", "write_errors"),
+        )
+
+async def start_warm_up(app: web.Application):
+    # Start serving right away and warm up in the background; /ready turns
+    # 200 once the bot is warm.
+    WARM_UP["task"] = asyncio.ensure_future(warm_up())
+
+
+async def warm_up():
+    started = perf_counter()
+    try:
+        await BOT.warm_up()
+    except Exception as exception:  # pylint: disable=broad-except
+        WARM_UP["error"] = f"{type(exception).__name__}: {exception}"
+        EVENTS.error("warm_up_failed", exception)
+        return
+    WARM_UP["seconds"] = round(perf_counter() - started, 3)
+    EVENTS.log("warm_up_done", seconds=WARM_UP["seconds"])
+
+
+async def watch_local_kb(app: web.Application):
+    if BOT.local_kb is not None:
+        BOT.local_kb.watch()
+
+
+async def start_signing_keys(app: web.Application):
+    # With no app id authentication is off and the keys are never needed.
+    if CONFIG.APP_ID:
+        SIGNING_KEYS.start()
+
+
+async def close_signing_keys(app: web.Application):
+    await SIGNING_KEYS.close()
+
+
+async def stop_warm_up(app: web.Application):
+    if WARM_UP["task"] is not None and not WARM_UP["task"].done():
+        WARM_UP["task"].cancel()
+
+
+async def stop_nudges(app: web.Application):
+    if NUDGES["task"] is not None and not NUDGES["task"].done():
+        NUDGES["task"].cancel()
+
+
+async def close_storage(app: web.Application):
+    # Persist writes still waiting for their group commit.
+    if isinstance(STORAGE, SqliteStorage):
+        await STORAGE.close()
+
+
+async def close_recognizers(app: web.Application):
+    BOT.recognizers.close()
+
+
+async def close_qna_client(app: web.Application):
+    await BOT.qna_client.close()
+
+
+async def close_local_kb(app: web.Application):
+    if BOT.local_kb is not None:
+        await BOT.local_kb.close()
+
+
+async def close_calendar_ingestor(app: web.Application):
+    await BOT.calendar_ingestor.close()
+
+
+async def close_event_log(app: web.Application):
+    # Writes what is still queued before the process exits.
+    EVENTS.close()
+
+
+async def close_transcripts(app: web.Application):
+    if TRANSCRIPTS is not None:
+        TRANSCRIPTS.close()
+
+
+APP.on_startup.append(start_warm_up)
+APP.on_startup.append(start_signing_keys)
+APP.on_startup.append(watch_local_kb)
+APP.on_cleanup.append(stop_warm_up)
+APP.on_cleanup.append(stop_nudges)
+APP.on_cleanup.append(close_storage)
+APP.on_cleanup.append(close_recognizers)
+APP.on_cleanup.append(close_qna_client)
+APP.on_cleanup.append(close_local_kb)
+APP.on_cleanup.append(close_signing_keys)
+APP.on_cleanup.append(close_calendar_ingestor)
+APP.on_cleanup.append(close_event_log)
+APP.on_cleanup.append(close_transcripts)
 
 if __name__ == "__main__":
     try:
-        web.run_app(APP, host="localhost", port=CONFIG.PORT)
+        if CONFIG.WORKERS > 1:
+            PreforkServer(
+                lambda: APP, CONFIG.WORKERS, host="localhost", port=CONFIG.PORT, event_log=EVENTS
+            ).run()
+        else:
+            web.run_app(APP, host="localhost", port=CONFIG.PORT)
     except Exception as error:
         raise error
@@ -0,0 +1,14 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+from .signing_keys import DEFAULT_METADATA_URLS, OpenIdKeySet, SigningKey, SigningKeyCache
+from .token_cache import CachingBotFrameworkAdapter, TokenValidationCache
+
+__all__ = [
+    "DEFAULT_METADATA_URLS",
+    "OpenIdKeySet",
+    "SigningKey",
+    "SigningKeyCache",
+    "CachingBotFrameworkAdapter",
+    "TokenValidationCache",
+]
@@ -0,0 +1,162 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import asyncio
+import json
+import time
+from typing import Dict, Iterable
+
+import aiohttp
+from botframework.connector.auth import AuthenticationConstants, JwtTokenExtractor
+from jwt.algorithms import RSAAlgorithm
+
+# The OpenID metadata documents the SDK validates channel and emulator
+# tokens against.
+DEFAULT_METADATA_URLS = (
+    AuthenticationConstants.TO_BOT_FROM_CHANNEL_OPENID_METADATA_URL,
+    AuthenticationConstants.TO_BOT_FROM_EMULATOR_OPENID_METADATA_URL,
+)
+
+
+class SigningKey:
+    # Same shape as the SDK's _OpenIdConfig.
+    __slots__ = ("public_key", "endorsements")
+
+    def __init__(self, public_key, endorsements):
+        self.public_key = public_key
+        self.endorsements = endorsements
+
+
+class OpenIdKeySet:
+    """Signing keys of one OpenID metadata URL, parsed once per refresh.
+
+    Stands in for the SDK's per-URL metadata object, whose ``get`` fetches
+    with blocking ``requests`` calls on the event loop and parses the JWK on
+    every token. Here ``get`` is a dictionary lookup; only a key id that is
+    not known yet triggers a refresh, at most once per ``min_refresh_interval``.
+    """
+
+    def __init__(self, url: str, fetch, min_refresh_interval: float = 300.0):
+        self.url = url
+        self.min_refresh_interval = min_refresh_interval
+        self.keys: Dict[str, SigningKey] = {}
+        self.refreshed_at = None
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self._fetch = fetch
+        self._attempted_at = None
+        self._refreshing = None
+
+    async def get(self, key_id: str) -> SigningKey:
+        key = self.keys.get(key_id)
+        if key is None and self._may_refresh():
+            await self.refresh()
+            key = self.keys.get(key_id)
+        if key is None:
+            raise PermissionError(f"Unauthorized. Unknown signing key {key_id}")
+        return key
+
+    async def refresh(self):
+        # Concurrent callers share one fetch.
+        if self._refreshing is None or self._refreshing.done():
+            self._refreshing = asyncio.ensure_future(self._refresh())
+        await asyncio.shield(self._refreshing)
+
+    def _may_refresh(self) -> bool:
+        return (
+            self._attempted_at is None
+            or time.monotonic() - self._attempted_at >= self.min_refresh_interval
+        )
+
+    async def _refresh(self):
+        self._attempted_at = time.monotonic()
+        try:
+            metadata = await self._fetch(self.url)
+            documents = (await self._fetch(metadata["jwks_uri"]))["keys"]
+        except (aiohttp.ClientError, asyncio.TimeoutError, KeyError, ValueError):
+            # Keep the keys we have; the next refresh tries again.
+            self.refresh_errors += 1
+            return
+
+        keys = {}
+        for document in documents:
+            try:
+                public_key = RSAAlgorithm.from_jwk(json.dumps(document))
+            except (ValueError, KeyError, TypeError):
+                continue
+            keys[document.get("kid")] = SigningKey(public_key, document.get("endorsements", []))
+        self.keys = keys
+        self.refreshed_at = time.time()
+        self.refreshes += 1
+
+
+class SigningKeyCache:
+    """Keeps the token signing keys of several metadata URLs fresh.
+
+    ``install`` registers the key sets with the SDK's JwtTokenExtractor, so
+    every channel/emulator validation uses them. ``start`` fetches all keys
+    and then refreshes them every ``refresh_interval`` seconds in the
+    background, retrying failed refreshes after ``retry_interval``.
+    """
+
+    def __init__(
+        self,
+        metadata_urls: Iterable[str] = DEFAULT_METADATA_URLS,
+        refresh_interval: float = 24 * 60 * 60,
+        retry_interval: float = 60.0,
+        timeout: float = 10.0,
+    ):
+        self.refresh_interval = refresh_interval
+        self.retry_interval = retry_interval
+        self.timeout = timeout
+        self.key_sets = {
+            url: OpenIdKeySet(url, self._fetch, min_refresh_interval=retry_interval)
+            for url in metadata_urls
+        }
+        self._session = None
+        self._refresher = None
+
+    def install(self):
+        for url, key_set in self.key_sets.items():
+            JwtTokenExtractor.metadataCache[url] = key_set
+
+    def start(self):
+        if self._refresher is None:
+            self._refresher = asyncio.ensure_future(self._refresh_forever())
+
+    async def refresh(self):
+        await asyncio.gather(*(key_set.refresh() for key_set in self.key_sets.values()))
+
+    async def close(self):
+        if self._refresher is not None:
+            self._refresher.cancel()
+            try:
+                await self._refresher
+            except asyncio.CancelledError:
+                pass
+            self._refresher = None
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def stats(self) -> dict:
+        return {
+            "keys": sum(len(key_set.keys) for key_set in self.key_sets.values()),
+            "refreshes": sum(key_set.refreshes for key_set in self.key_sets.values()),
+            "refresh_errors": sum(key_set.refresh_errors for key_set in self.key_sets.values()),
+        }
+
+    async def _refresh_forever(self):
+        while True:
+            await self.refresh()
+            healthy = all(key_set.keys for key_set in self.key_sets.values())
+            await asyncio.sleep(self.refresh_interval if healthy else self.retry_interval)
+
+    async def _fetch(self, url: str) -> dict:
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+        async with self._session.get(url) as response:
+            response.raise_for_status()
+            return await response.json(content_type=None)
@@ -0,0 +1,106 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import asyncio
+import json
+
+import pytest
+from botframework.connector.auth import JwtTokenExtractor
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jwt.algorithms import RSAAlgorithm
+
+from auth import OpenIdKeySet, SigningKeyCache
+
+METADATA_URL = "https://login.example.org/.well-known/openidconfiguration"
+KEYS_URL = "https://login.example.org/keys"
+
+
+def jwk(key_id: str) -> dict:
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    document = json.loads(RSAAlgorithm.to_jwk(key.public_key()))
+    document.update(kid=key_id, endorsements=["msteams"])
+    return document
+
+
+class Directory:
+    """Serves the metadata and key documents; counts the fetches."""
+
+    def __init__(self, *key_ids):
+        self.keys = [jwk(key_id) for key_id in key_ids]
+        self.fetches = 0
+        self.fail = False
+
+    async def fetch(self, url: str) -> dict:
+        self.fetches += 1
+        await asyncio.sleep(0)
+        if self.fail:
+            raise ValueError("bad document")
+        if url == METADATA_URL:
+            return {"jwks_uri": KEYS_URL}
+        return {"keys": self.keys}
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_keys_are_parsed_once_and_looked_up():
+    directory = Directory("one", "two")
+    key_set = OpenIdKeySet(METADATA_URL, directory.fetch)
+
+    async def scenario():
+        first = await key_set.get("one")
+        assert await key_set.get("one") is first
+        return first, await key_set.get("two")
+
+    first, second = run(scenario())
+    assert first.endorsements == ["msteams"]
+    assert first is not second
+    assert directory.fetches == 2
+    assert key_set.refreshes == 1
+
+
+def test_concurrent_refreshes_share_one_fetch():
+    directory = Directory("one")
+    key_set = OpenIdKeySet(METADATA_URL, directory.fetch)
+
+    async def scenario():
+        await asyncio.gather(*(key_set.get("one") for _ in range(5)))
+
+    run(scenario())
+    assert directory.fetches == 2
+
+
+def test_unknown_keys_refresh_at_most_once_per_interval():
+    directory = Directory("one")
+    key_set = OpenIdKeySet(METADATA_URL, directory.fetch, min_refresh_interval=300)
+
+    async def scenario():
+        await key_set.get("one")
+        for _ in range(3):
+            with pytest.raises(PermissionError):
+                await key_set.get("rotated")
+
+    run(scenario())
+    assert directory.fetches == 2
+
+
+def test_failed_refresh_keeps_the_known_keys():
+    directory = Directory("one")
+    key_set = OpenIdKeySet(METADATA_URL, directory.fetch, min_refresh_interval=0)
+
+    async def scenario():
+        await key_set.get("one")
+        directory.fail = True
+        await key_set.refresh()
+        return await key_set.get("one")
+
+    assert run(scenario()) is not None
+    assert key_set.refresh_errors == 1
+
+
+def test_install_registers_the_key_sets(monkeypatch):
+    monkeypatch.setattr(JwtTokenExtractor, "metadataCache", {})
+    cache = SigningKeyCache([METADATA_URL])
+    cache.install()
+    assert JwtTokenExtractor.metadataCache[METADATA_URL] is cache.key_sets[METADATA_URL]
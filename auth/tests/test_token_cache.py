@@ -0,0 +1,91 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import asyncio
+
+import pytest
+from botbuilder.core import BotFrameworkAdapter, BotFrameworkAdapterSettings
+from botbuilder.schema import Activity
+from botframework.connector.auth import ClaimsIdentity
+
+from auth import CachingBotFrameworkAdapter, TokenValidationCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def identity(exp=None) -> ClaimsIdentity:
+    claims = {"aud": "app-id"}
+    if exp is not None:
+        claims["exp"] = exp
+    return ClaimsIdentity(claims, True)
+
+
+def test_entries_expire_at_the_token_expiry():
+    clock = Clock()
+    cache = TokenValidationCache(max_ttl=3600, clock=clock)
+    accepted = identity(exp=1060)
+    cache.put("Bearer a", "msteams", "https://smba", accepted)
+    assert cache.get("Bearer a", "msteams", "https://smba") is accepted
+    # The same token checked for another channel or service URL is not a hit.
+    assert cache.get("Bearer a", "webchat", "https://smba") is None
+    assert cache.get("Bearer a", "msteams", "https://other") is None
+
+    clock.now = 1060
+    assert cache.get("Bearer a", "msteams", "https://smba") is None
+    assert len(cache) == 0
+    assert cache.stats() == {"size": 0, "hits": 1, "misses": 3}
+
+
+def test_entries_expire_after_max_ttl_and_expired_tokens_are_skipped():
+    clock = Clock()
+    cache = TokenValidationCache(max_ttl=10, clock=clock)
+    cache.put("Bearer a", "test", "url", identity())
+    cache.put("Bearer expired", "test", "url", identity(exp=999))
+    assert len(cache) == 1
+    clock.now = 1011
+    assert cache.get("Bearer a", "test", "url") is None
+
+
+def test_least_recently_used_entries_are_dropped():
+    cache = TokenValidationCache(max_size=2)
+    for token in ("a", "b"):
+        cache.put(token, "test", "url", identity())
+    cache.get("a", "test", "url")
+    cache.put("c", "test", "url", identity())
+    assert cache.get("a", "test", "url") is not None
+    assert cache.get("b", "test", "url") is None
+
+
+def test_adapter_validates_each_token_once(monkeypatch):
+    validations = []
+
+    async def authenticate(self, request, auth_header):
+        validations.append(auth_header)
+        if auth_header == "Bearer bad":
+            raise PermissionError("Unauthorized")
+        return identity()
+
+    monkeypatch.setattr(BotFrameworkAdapter, "_authenticate_request", authenticate)
+    adapter = CachingBotFrameworkAdapter(
+        BotFrameworkAdapterSettings("", ""), TokenValidationCache()
+    )
+    request = Activity(channel_id="test", service_url="https://example.org")
+
+    async def scenario():
+        for _ in range(3):
+            await adapter._authenticate_request(request, "Bearer good")
+        for _ in range(2):
+            with pytest.raises(PermissionError):
+                await adapter._authenticate_request(request, "Bearer bad")
+        await adapter._authenticate_request(request, "")
+
+    asyncio.run(scenario())
+    # Failed validations are never cached; anonymous requests skip the cache.
+    assert validations == ["Bearer good", "Bearer bad", "Bearer bad", ""]
+    assert adapter.token_cache.stats()["hits"] == 2
@@ -0,0 +1,92 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import hashlib
+import time
+from collections import OrderedDict
+
+from botbuilder.core import BotFrameworkAdapter, BotFrameworkAdapterSettings
+from botbuilder.schema import Activity
+from botframework.connector.auth import ClaimsIdentity
+
+
+class TokenValidationCache:
+    """Remembers the identities of tokens that passed validation.
+
+    Entries are keyed by a hash of the Authorization header together with
+    the channel and service URL the token was checked against, and expire
+    at the token's ``exp`` claim (or after ``max_ttl`` seconds, whichever is
+    first). Failed validations are never cached.
+    """
+
+    def __init__(self, max_size: int = 10000, max_ttl: float = 3600.0, clock=time.time):
+        self.max_size = max_size
+        self.max_ttl = max_ttl
+        self._clock = clock
+        self._entries = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def _key(auth_header: str, channel_id: str, service_url: str):
+        digest = hashlib.sha256(auth_header.encode("utf-8")).digest()
+        return digest, channel_id, service_url
+
+    def get(self, auth_header: str, channel_id: str, service_url: str) -> ClaimsIdentity:
+        key = self._key(auth_header, channel_id, service_url)
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= self._clock():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, auth_header: str, channel_id: str, service_url: str, identity: ClaimsIdentity):
+        if self.max_size <= 0:
+            return
+        now = self._clock()
+        expires_at = now + self.max_ttl
+        expiry = identity.claims.get("exp") if identity.claims else None
+        if isinstance(expiry, (int, float)):
+            expires_at = min(expires_at, expiry)
+        if expires_at <= now:
+            return
+
+        key = self._key(auth_header, channel_id, service_url)
+        self._entries[key] = (expires_at, identity)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+class CachingBotFrameworkAdapter(BotFrameworkAdapter):
+    """BotFrameworkAdapter that skips re-validating tokens it has accepted.
+
+    The Bot Connector reuses one token for many requests, so after the first
+    request only a hash and a dictionary lookup remain on the hot path.
+    """
+
+    def __init__(self, settings: BotFrameworkAdapterSettings, token_cache: TokenValidationCache):
+        super().__init__(settings)
+        self.token_cache = token_cache
+
+    async def _authenticate_request(self, request: Activity, auth_header: str) -> ClaimsIdentity:
+        if not auth_header:
+            # Anonymous (auth disabled) requests need no validation work.
+            return await super()._authenticate_request(request, auth_header)
+
+        identity = self.token_cache.get(auth_header, request.channel_id, request.service_url)
+        if identity is None:
+            identity = await super()._authenticate_request(request, auth_header)
+            self.token_cache.put(auth_header, request.channel_id, request.service_url, identity)
+        return identity
@@ -0,0 +1,6 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+from .standins import StandInServer
+
+__all__ = ["StandInServer"]
@@ -0,0 +1,246 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+"""Offline load test for the /api/messages handler.
+
+Replays scripted conversations against ``app.APP`` with the Bot Connector and
+QnA Maker replaced by a local StandInServer, and reports throughput, turn
+latency percentiles and memory growth per conversation.
+
+    python -m benchmarks.bench_messages --conversations 500 --concurrency 50
+
+Each run appends one JSON line to ``--output`` tagged with the current git
+commit, so runs on different commits can be compared.
+"""
+
+import argparse
+import asyncio
+import gc
+import importlib
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+import uuid
+
+import aiohttp
+from aiohttp import web
+
+from .standins import StandInServer
+
+# welcome -> Choice1 profile flow -> Choice2 preference flow -> QnA questions,
+# each with text one of the replies must contain (None: not checked, QnA
+# answers depend on the stand-in's failure rate).
+SCRIPT = [
+    ("conversationUpdate", None, "Welcome to Meeting Assistant Bot"),
+    ("message", "Choice1", "What is your name?"),
+    ("message", "Alex", "How old are you?"),
+    ("message", "thirty two", "what is your address?"),
+    ("message", "1 Main Street", "Thanks for completing the booking Alex."),
+    ("message", "Choice2", "Which time slot during meetings"),
+    ("message", "one hour", "Which time period you don't want meeting?"),
+    ("message", "after 5pm", "Which transportation you want"),
+    ("message", "bus", "You have selected bus"),
+    ("message", "hi", None),
+    ("message", "What can you do?", None),
+    ("message", "when is lunch", None),
+]
+
+
+def write_kb_export(path: str, answers: dict) -> str:
+    # Same question/answer pairs as the QnA stand-in, in the portal's TSV
+    # export format.
+    with open(path, "w", encoding="utf-8") as file:
+        file.write("Question\tAnswer\tSource\tMetadata\n")
+        for question, answer in answers.items():
+            file.write(f"{question}\t{answer}\tEditorial\t\n")
+    return path
+
+
+def percentile(ordered: list, fraction: float) -> float:
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))
+    return ordered[index]
+
+
+def rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        # Peak rather than current RSS, in KB on Linux and bytes on macOS.
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return usage if sys.platform == "darwin" else usage * 1024
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def build_activity(kind: str, text: str, conversation_id: str, user_id: str, service_url: str) -> dict:
+    activity = {
+        "type": kind,
+        "id": uuid.uuid4().hex,
+        "channelId": "benchmark",
+        "serviceUrl": service_url,
+        "conversation": {"id": conversation_id},
+        "from": {"id": user_id, "name": "user"},
+        "recipient": {"id": "bot", "name": "bot"},
+    }
+    if kind == "conversationUpdate":
+        activity["membersAdded"] = [{"id": user_id, "name": "user"}]
+    else:
+        activity["text"] = text
+    return activity
+
+
+class Benchmark:
+    def __init__(self, args):
+        self.args = args
+        self.latencies = []
+        self.errors = 0
+        self.wrong_replies = 0
+        self.replies = {}
+
+    async def run(self) -> dict:
+        args = self.args
+        standins = await StandInServer(
+            connector_latency=args.connector_latency_ms / 1000,
+            qna_latency=args.qna_latency_ms / 1000,
+            qna_failure_rate=args.qna_failure_rate,
+        ).start()
+        standins.keep_replies = True
+        self.replies = standins.replies
+
+        # app.py reads its configuration at import time.
+        os.environ["QnAEndpointHostName"] = standins.qna_host
+        os.environ["StateStorage"] = args.storage
+        if args.storage == "sqlite":
+            os.environ["StateStoragePath"] = args.storage_path
+        if args.local_kb:
+            os.environ["LocalKbPath"] = write_kb_export(args.local_kb, standins.answers)
+        bot_app = importlib.import_module("app")
+
+        runner = web.AppRunner(bot_app.APP, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        endpoint = f"http://127.0.0.1:{port}/api/messages"
+
+        connector = aiohttp.TCPConnector(limit=args.concurrency)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            await self._drive(session, endpoint, standins.url, args.warmup)
+            self.latencies.clear()
+            self.errors = 0
+            self.wrong_replies = 0
+
+            gc.collect()
+            rss_before = rss_bytes()
+            started = time.perf_counter()
+            await self._drive(session, endpoint, standins.url, args.conversations)
+            elapsed = time.perf_counter() - started
+            gc.collect()
+            rss_after = rss_bytes()
+
+        await runner.cleanup()
+        await standins.stop()
+
+        ordered = sorted(self.latencies)
+        return {
+            "commit": git_commit(),
+            "label": args.label,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "conversations": args.conversations,
+            "concurrency": args.concurrency,
+            "storage": args.storage,
+            "local_kb": bool(args.local_kb),
+            "qna_latency_ms": args.qna_latency_ms,
+            "qna_failure_rate": args.qna_failure_rate,
+            "connector_latency_ms": args.connector_latency_ms,
+            "turns": len(ordered),
+            "errors": self.errors,
+            "wrong_replies": self.wrong_replies,
+            "seconds": round(elapsed, 3),
+            "turns_per_sec": round(len(ordered) / elapsed, 1) if elapsed else 0.0,
+            "p50_ms": round(percentile(ordered, 0.50) * 1000, 2),
+            "p95_ms": round(percentile(ordered, 0.95) * 1000, 2),
+            "p99_ms": round(percentile(ordered, 0.99) * 1000, 2),
+            "max_ms": round(ordered[-1] * 1000, 2) if ordered else 0.0,
+            "connector_calls": standins.activities,
+            "qna_calls": standins.qna_requests,
+            "rss_growth_kb_per_conversation": round(
+                (rss_after - rss_before) / 1024 / max(1, args.conversations), 2
+            ),
+        }
+
+    async def _drive(self, session, endpoint: str, service_url: str, count: int):
+        queue = asyncio.Queue()
+        for _ in range(count):
+            queue.put_nowait(uuid.uuid4().hex)
+
+        async def worker():
+            while not queue.empty():
+                conversation_id = queue.get_nowait()
+                await self._conversation(session, endpoint, service_url, conversation_id)
+
+        await asyncio.gather(*(worker() for _ in range(self.args.concurrency)))
+
+    async def _conversation(self, session, endpoint: str, service_url: str, conversation_id: str):
+        user_id = f"user-{conversation_id[:8]}"
+        for kind, text, expected in SCRIPT:
+            activity = build_activity(kind, text, conversation_id, user_id, service_url)
+            started = time.perf_counter()
+            async with session.post(endpoint, json=activity) as response:
+                await response.read()
+                if response.status >= 300:
+                    self.errors += 1
+            self.latencies.append(time.perf_counter() - started)
+
+            # The turn's replies reached the connector before the response.
+            replies = self.replies.pop(conversation_id, [])
+            if expected is not None and not any(
+                expected in (reply.get("text") or "") for reply in replies
+            ):
+                self.wrong_replies += 1
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--conversations", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=10, help="conversations run before measuring")
+    parser.add_argument("--qna-latency-ms", type=float, default=20.0)
+    parser.add_argument("--qna-failure-rate", type=float, default=0.0, help="share of QnA calls answered with 500")
+    parser.add_argument("--connector-latency-ms", type=float, default=5.0)
+    parser.add_argument("--storage", choices=("memory", "sqlite"), default="memory")
+    parser.add_argument("--storage-path", default="bench_state.sqlite3")
+    parser.add_argument("--local-kb", metavar="PATH", help="write the stand-in answers to PATH and serve them from the local index")
+    parser.add_argument("--label", default="", help="free text stored with the result")
+    parser.add_argument("--output", default="bench_results.jsonl", help="JSON lines file to append to")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    result = asyncio.run(Benchmark(args).run())
+
+    for key, value in result.items():
+        print(f"{key:>32}: {value}")
+    if args.output:
+        with open(args.output, "a") as output:
+            output.write(json.dumps(result) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+"""Import-time budget for the bot's entry point.
+
+Imports ``app`` in fresh interpreters with ``-X importtime`` and reports the
+median total and the slowest top-level packages. Exits with status 1 when
+the median is over ``--budget-ms`` or when a module that is meant to load
+lazily (see DEFERRED) is imported at startup, so it can gate CI.
+
+    python -m benchmarks.import_time --budget-ms 1000 --runs 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from .bench_messages import git_commit
+
+# Loaded by the background warm-up or on first use, never by `import app`.
+DEFERRED = ("recognizers_number", "recognizers_date_time", "numpy", "botbuilder.ai")
+
+
+def measure(module: str) -> dict:
+    """Return {module name: cumulative microseconds} for one cold import."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        check=True,
+    )
+    timings = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        if cumulative.strip().isdigit():
+            timings[name.strip()] = int(cumulative)
+    return timings
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="app")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=1000.0)
+    parser.add_argument("--top", type=int, default=10, help="slowest top-level packages to list")
+    parser.add_argument("--output", default="", help="JSON lines file to append the result to")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    runs = [measure(args.module) for _ in range(args.runs)]
+    totals = [run.get(args.module, 0) / 1000 for run in runs]
+    median = statistics.median(totals)
+
+    last = runs[-1]
+    packages = {}
+    for name, cumulative in last.items():
+        # Cumulative times of nested modules are already in their parent's.
+        top = name.split(".")[0]
+        if top != args.module:
+            packages[top] = max(packages.get(top, 0), cumulative)
+    eager = [
+        lazy for lazy in DEFERRED if any(name == lazy or name.startswith(lazy + ".") for name in last)
+    ]
+
+    print(f"import {args.module}: median {median:.1f} ms over {args.runs} runs (budget {args.budget_ms:.0f} ms)")
+    for name, cumulative in sorted(packages.items(), key=lambda item: -item[1])[: args.top]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+    if eager:
+        print(f"imported at startup but meant to be deferred: {', '.join(eager)}")
+
+    if args.output:
+        with open(args.output, "a") as output:
+            output.write(
+                json.dumps(
+                    {
+                        "commit": git_commit(),
+                        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                        "module": args.module,
+                        "median_ms": round(median, 1),
+                        "budget_ms": args.budget_ms,
+                        "eager": eager,
+                    }
+                )
+                + "\n"
+            )
+
+    return 1 if median > args.budget_ms or eager else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
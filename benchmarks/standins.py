@@ -0,0 +1,201 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import asyncio
+import itertools
+import json
+import random
+import time
+
+import jwt
+from aiohttp import web
+from jwt.algorithms import RSAAlgorithm
+
+# Canned knowledge base served by the QnA Maker stand-in. Keys are matched
+# case-insensitively against the incoming question.
+DEFAULT_ANSWERS = {
+    "hi": "Hello! I am the meeting assistant.",
+    "what can you do": "I can find a time for your meeting.",
+    "how do i upload my calendar": "Choose option 3 and send an .ics or .csv file.",
+}
+
+
+# Channels the stand-in signing key is endorsed for.
+DEFAULT_ENDORSEMENTS = ["benchmark", "emulator", "msteams", "webchat", "directline", "test"]
+
+
+class StandInServer:
+    """Local stand-in for the Bot Connector and the QnA Maker runtime.
+
+    Point an activity's ``service_url`` and ``QnAEndpointHostName`` at
+    ``url`` and ``qna_host`` to run the bot without Azure. Latency and
+    failures can be injected to see how the bot behaves against slow or
+    broken dependencies. Counters record how many calls each side received.
+
+    It also serves an OpenID metadata document and signing key set at
+    ``openid_metadata_url``; ``issue_token`` signs Bot Connector style tokens
+    with a locally generated RSA key for testing token validation.
+    """
+
+    def __init__(
+        self,
+        answers: dict = None,
+        connector_latency: float = 0.0,
+        qna_latency: float = 0.0,
+        qna_failure_rate: float = 0.0,
+        connector_failure_rate: float = 0.0,
+        connector_failure_status: int = 503,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.answers = {
+            key.lower(): value for key, value in (answers or DEFAULT_ANSWERS).items()
+        }
+        self.connector_latency = connector_latency
+        self.qna_latency = qna_latency
+        self.qna_failure_rate = qna_failure_rate
+        self.connector_failure_rate = connector_failure_rate
+        self.connector_failure_status = connector_failure_status
+        self.host = host
+        self.port = port
+
+        self.activities = 0
+        self.qna_requests = 0
+        self.qna_failures = 0
+        self.connector_failures = 0
+        self.openid_requests = 0
+        self.endorsements = list(DEFAULT_ENDORSEMENTS)
+        self.key_id = "stand-in-key"
+        self._private_key = None
+        self.received = []
+        self.keep_activities = False
+        # Sent activities per conversation id, kept when keep_replies is set.
+        self.replies = {}
+        self.keep_replies = False
+
+        self._ids = itertools.count(1)
+        self._runner = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def qna_host(self) -> str:
+        return f"{self.url}/qnamaker"
+
+    @property
+    def openid_metadata_url(self) -> str:
+        return f"{self.url}/v1/.well-known/openidconfiguration"
+
+    def issue_token(self, app_id: str, service_url: str, ttl: float = 3600, **claims) -> str:
+        """A token as the Bot Connector would send it to ``app_id``."""
+        now = int(time.time())
+        payload = {
+            "iss": "https://api.botframework.com",
+            "aud": app_id,
+            "serviceurl": service_url,
+            "nbf": now - 60,
+            "iat": now - 60,
+            "exp": now + int(ttl),
+        }
+        payload.update(claims)
+        return jwt.encode(
+            payload, self._signing_key(), algorithm="RS256", headers={"kid": self.key_id}
+        )
+
+    def _signing_key(self):
+        if self._private_key is None:
+            # Only loaded when tokens are needed.
+            from cryptography.hazmat.primitives.asymmetric import rsa
+
+            self._private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        return self._private_key
+
+    async def start(self) -> "StandInServer":
+        app = web.Application()
+        app.router.add_post(
+            "/v3/conversations/{conversation_id}/activities/{activity_id}", self._activity
+        )
+        app.router.add_post("/v3/conversations/{conversation_id}/activities", self._activity)
+        app.router.add_post(
+            "/qnamaker/knowledgebases/{knowledge_base_id}/generateAnswer", self._generate_answer
+        )
+        app.router.add_get("/v1/.well-known/openidconfiguration", self._openid_metadata)
+        app.router.add_get("/v1/.well-known/keys", self._signing_keys)
+        self.add_routes(app)
+
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def add_routes(self, app: web.Application):
+        """Hook for subclasses that fake further endpoints."""
+
+    async def _activity(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        if self.connector_latency:
+            await asyncio.sleep(self.connector_latency)
+        if self.connector_failure_rate and random.random() < self.connector_failure_rate:
+            self.connector_failures += 1
+            return web.json_response(
+                {"error": {"code": "ServiceError", "message": "stand-in failure"}},
+                status=self.connector_failure_status,
+                headers={"Retry-After": "0"} if self.connector_failure_status == 429 else None,
+            )
+
+        self.activities += 1
+        if self.keep_activities:
+            self.received.append(body)
+        if self.keep_replies:
+            self.replies.setdefault(request.match_info["conversation_id"], []).append(body)
+        return web.json_response({"id": str(next(self._ids))})
+
+    async def _openid_metadata(self, request: web.Request) -> web.Response:
+        self.openid_requests += 1
+        return web.json_response(
+            {
+                "issuer": "https://api.botframework.com",
+                "jwks_uri": f"{self.url}/v1/.well-known/keys",
+                "id_token_signing_alg_values_supported": ["RS256"],
+            }
+        )
+
+    async def _signing_keys(self, request: web.Request) -> web.Response:
+        self.openid_requests += 1
+        key = json.loads(RSAAlgorithm.to_jwk(self._signing_key().public_key()))
+        key.update(kid=self.key_id, use="sig", endorsements=self.endorsements)
+        return web.json_response({"keys": [key]})
+
+    async def _generate_answer(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        self.qna_requests += 1
+        if self.qna_latency:
+            await asyncio.sleep(self.qna_latency)
+        if self.qna_failure_rate and random.random() < self.qna_failure_rate:
+            self.qna_failures += 1
+            return web.json_response({"error": "stand-in failure"}, status=500)
+
+        question = " ".join(str(body.get("question", "")).lower().strip(" ?!.").split())
+        answer = self.answers.get(question)
+        answers = []
+        if answer is not None:
+            answers.append(
+                {
+                    "questions": [question],
+                    "answer": answer,
+                    "score": 90.0,
+                    "id": 1,
+                    "source": "stand-in",
+                    "metadata": [],
+                }
+            )
+        return web.json_response({"answers": answers, "activeLearningEnabled": False})
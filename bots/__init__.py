@@ -2,5 +2,6 @@
 # Licensed under the MIT License.
 
 from .custom_prompt_bot import CustomPromptBot
+from .dialog_engine import DialogEngine, DialogSection, DialogStep
 
-__all__ = ["CustomPromptBot"]
+__all__ = ["CustomPromptBot", "DialogEngine", "DialogSection", "DialogStep"]
@@ -1,14 +1,15 @@
 # Copyright (c) Microsoft Corporation. All rights reserved.
 # Licensed under the MIT License.
 
+import asyncio
 from datetime import datetime
-from botbuilder.ai.qna import QnAMaker, QnAMakerEndpoint
-from recognizers_number import recognize_number, Culture
-from recognizers_date_time import recognize_datetime
+from typing import Optional
 
 from botbuilder.core import (
     ActivityHandler,
+    BotAdapter,
     ConversationState,
+    MemoryStorage,
     TurnContext,
     UserState,
     MessageFactory,
@@ -26,6 +27,28 @@ from botbuilder.schema import (
 )
 
 from data_models import ConversationFlow, Question, Question2, UserProfile, State,Slot,NoMeetingPeriod,Transportation
+from data_models import BusyCalendar, has_changes, mark_clean
+from helpers import (
+    AnswerCache,
+    EventLog,
+    KnowledgeBaseIndex,
+    METRICS,
+    MISSING,
+    QnAClient,
+    QnAUnavailable,
+    RecognizerPool,
+    TemplateCache,
+)
+from proactive import ConversationReferenceStore
+from scheduling import (
+    DEFAULT_ATTACHMENT_HOSTS,
+    CalendarIngestionError,
+    CalendarIngestor,
+    CalendarStore,
+    merge_intervals,
+)
+
+from .dialog_engine import DialogEngine, DialogSection, DialogStep, choice_prompt
 
 
 class ValidationResult:
@@ -37,8 +60,116 @@ class ValidationResult:
         self.message = message
 
 
+# The welcome-card sections and their questions. To ask another question add
+# a Question/Question2 member and a DialogStep here.
+DIALOG_SECTIONS = [
+    DialogSection(
+        State.PROFILE,
+        choice="Choice1",
+        intro="This is user profile section.",
+        question_field="last_question_asked",
+        none_question=Question.NONE,
+        steps=[
+            DialogStep(
+                Question.NAME,
+                "name",
+                "Let's get started. What is your name?",
+                "_validate_name",
+                confirmation=["Hi {value}"],
+            ),
+            DialogStep(
+                Question.AGE,
+                "age",
+                "How old are you?",
+                "_validate_age",
+                confirmation=["I have your age as {value}."],
+            ),
+            DialogStep(
+                Question.ADDR,
+                "addr",
+                "what is your address?",
+                "_validate_addr",
+                confirmation=["Your address {value} is saved."],
+            ),
+        ],
+        outro=[
+            "Thanks for completing the booking {profile.name}.",
+            "Type anything to run the bot again.",
+        ],
+    ),
+    DialogSection(
+        State.PREFERENCE,
+        choice="Choice2",
+        intro="This is personal preference section.",
+        question_field="last_question_asked2",
+        none_question=Question2.NONE,
+        steps=[
+            DialogStep(
+                Question2.MEETINGSOLT,
+                "meetingSlot",
+                choice_prompt(
+                    "Let's get started. Which time slot during meetings do your prefer?",
+                    [
+                        ("HALF HOUR", "half hour"),
+                        ("ONE HOUR", "one hour"),
+                        ("TWO HOURS", "two hours"),
+                        ("NONE", "none"),
+                    ],
+                ),
+                "_validate_choice",
+                validator_args=(Slot,),
+                confirmation=["You have selected {value} for meeting slot"],
+            ),
+            DialogStep(
+                Question2.NOMEETPERIOD,
+                "nomeetPeriod",
+                choice_prompt(
+                    "Next. Which time period you don't want meeting?",
+                    [
+                        ("before 8am", "before 8am"),
+                        ("during lunch time", "during lunch time"),
+                        ("after 5pm", "after 5pm"),
+                        ("NONE", "NONE"),
+                    ],
+                ),
+                "_validate_choice",
+                validator_args=(NoMeetingPeriod,),
+                confirmation=["You have selected {value} for no meeting period."],
+            ),
+            DialogStep(
+                Question2.TRANSPORTATION,
+                "transportation",
+                choice_prompt(
+                    "Next. Which transportation you want to attend meetings?",
+                    [("car", "car"), ("bus", "bus"), ("bicycle", "bicycle"), ("foot", "foot")],
+                ),
+                "_validate_choice",
+                validator_args=(Transportation,),
+                confirmation=["You have selected {value} for meeting transportation."],
+            ),
+        ],
+    ),
+    DialogSection(
+        State.FILE,
+        choice="Choice3",
+        intro="Please upload your calendar as an iCalendar (.ics) or CSV (.csv) file.",
+        idle_reply="upload file state",
+    ),
+    DialogSection(State.HELP, idle_reply="help state"),
+]
+
+
 class CustomPromptBot(ActivityHandler):
-    def __init__(self, config, conversation_state: ConversationState, user_state: UserState):
+    def __init__(
+        self,
+        config,
+        conversation_state: ConversationState,
+        user_state: UserState,
+        calendar_store: CalendarStore = None,
+        reference_store: ConversationReferenceStore = None,
+        event_log: EventLog = None,
+        qna_client: QnAClient = None,
+    ):
         if conversation_state is None:
             raise TypeError(
                 "[CustomPromptBot]: Missing parameter. conversation_state is required but None was given"
@@ -53,20 +184,115 @@ class CustomPromptBot(ActivityHandler):
 
         self.flow_accessor = self.conversation_state.create_property("ConversationFlow")
         self.profile_accessor = self.user_state.create_property("UserProfile")
-        self.qna_maker = QnAMaker(
-            QnAMakerEndpoint(
-                knowledge_base_id=config.QNA_KNOWLEDGEBASE_ID,
-                endpoint_key=config.QNA_ENDPOINT_KEY,
-                host=config.QNA_ENDPOINT_HOST,
+        self.qna_client = qna_client or QnAClient(
+            host=config.QNA_ENDPOINT_HOST,
+            knowledge_base_id=config.QNA_KNOWLEDGEBASE_ID,
+            endpoint_key=config.QNA_ENDPOINT_KEY,
+            timeout=config.QNA_TIMEOUT_SECONDS,
+            pool_size=config.QNA_POOL_SIZE,
+        )
+        self.local_kb = None
+        if config.LOCAL_KB_PATH:
+            self.local_kb = KnowledgeBaseIndex(
+                config.LOCAL_KB_PATH,
+                min_score=config.LOCAL_KB_MIN_SCORE,
+                reload_interval=config.LOCAL_KB_RELOAD_INTERVAL,
             )
-
+        self.answer_cache = AnswerCache(
+            max_size=config.QNA_CACHE_MAX_SIZE, ttl=config.QNA_CACHE_TTL_SECONDS
         )
+        self.recognizers = RecognizerPool(
+            max_workers=config.RECOGNIZER_WORKERS,
+            use_processes=config.RECOGNIZER_USE_PROCESSES,
+            cache_size=config.RECOGNIZER_CACHE_SIZE,
+        )
+        self.templates = TemplateCache()
+        self.templates.register("welcome", self._build_welcome_message)
+        self.templates.register(
+            "nudge.profile",
+            "Your profile is not complete yet. Choose option 1 to fill it in so "
+            "I can find meeting times that suit you.",
+        )
+        self.templates.register(
+            "nudge.calendar",
+            "Please upload your calendar (option 3) so I can find meeting times around it.",
+        )
+        self.templates.register(
+            "qna_unavailable",
+            "Sorry, I can't look that up right now. Please try again in a moment.",
+        )
+        self.dialog = DialogEngine(
+            DIALOG_SECTIONS, self, self._send_welcome_message, templates=self.templates
+        )
+        self.is_ready = False
+        self.calendar_store = calendar_store or CalendarStore(MemoryStorage())
+        self.calendar_ingestor = CalendarIngestor(
+            max_bytes=config.CALENDAR_MAX_BYTES,
+            horizon_days=config.CALENDAR_HORIZON_DAYS,
+            allowed_hosts=config.CALENDAR_ATTACHMENT_HOSTS or DEFAULT_ATTACHMENT_HOSTS,
+        )
+        self.reference_store = reference_store
+        self.event_log = event_log
+
+    async def warm_up(self):
+        # Builds the recognizer models and the local knowledge base index.
+        # Turns are served meanwhile: they build the recognizers on demand
+        # and send every question to QnA Maker.
+        jobs = [self.recognizers.warm_up()]
+        if self.local_kb is not None:
+            jobs.append(self._load_local_kb())
+        await asyncio.gather(*jobs)
+        self.is_ready = True
+
+    async def _load_local_kb(self):
+        # A missing or broken export must not keep the bot from getting
+        # ready: the index stays empty, so every question goes to QnA Maker
+        # until the watcher finds a good file.
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, self.local_kb.load)
+        except Exception as error:  # pylint: disable=broad-except
+            self.local_kb.reload_errors += 1
+            if self.event_log is not None:
+                self.event_log.error("local_kb_load_failed", error, path=self.local_kb.path)
 
     async def on_turn(self, turn_context: TurnContext):
         await super().on_turn(turn_context)
 
-        await self.conversation_state.save_changes(turn_context)
-        await self.user_state.save_changes(turn_context)
+        # The state models track their own changes, so read-only turns (QnA
+        # questions, welcome cards) skip both the change hash and the write.
+        with METRICS.span("save_changes"):
+            for bot_state in (self.conversation_state, self.user_state):
+                state = bot_state.get(turn_context)
+                if has_changes(state):
+                    await bot_state.save_changes(turn_context, force=True)
+                    mark_clean(state)
+
+        if self.reference_store is not None and turn_context.activity.type == ActivityTypes.message:
+            # Where to reach this user for reminders; only written on change.
+            # A failure here only costs a reminder, so it must not fail the
+            # turn (on_error would then reset the conversation).
+            try:
+                await self.reference_store.save(turn_context.activity)
+            except Exception as error:  # pylint: disable=broad-except
+                if self.event_log is not None:
+                    activity = turn_context.activity
+                    self.event_log.error(
+                        "reference_save_failed",
+                        error,
+                        conversation_id=activity.conversation.id if activity.conversation else "",
+                    )
+
+    async def build_nudge(self, turn_context: TurnContext) -> Optional[Activity]:
+        # Runs in a proactive turn for one stored conversation reference.
+        # Returns the reminder this user needs, or None if they are all set.
+        profile = await self.profile_accessor.get(turn_context, UserProfile)
+        if not (profile.name and profile.age and profile.addr):
+            return self.templates.get("nudge.profile", turn_context.activity.locale)
+
+        calendar = await self.calendar_store.load(CalendarStore.key_for(turn_context))
+        if calendar is None:
+            return self.templates.get("nudge.calendar", turn_context.activity.locale)
+        return None
 
     async def on_members_added_activity(
             self, members_added: [ChannelAccount], turn_context: TurnContext
@@ -80,6 +306,12 @@ class CustomPromptBot(ActivityHandler):
                 await self._send_welcome_message(turn_context)
 
     async def _send_welcome_message(self, turn_context: TurnContext):
+        await turn_context.send_activity(
+            self.templates.get("welcome", turn_context.activity.locale)
+        )
+
+    @staticmethod
+    def _build_welcome_message() -> Activity:
         card = HeroCard(
             text="You can find introduction and complete your personal information",
             buttons=[
@@ -98,8 +330,7 @@ class CustomPromptBot(ActivityHandler):
             ],
         )
 
-        reply = MessageFactory.attachment(CardFactory.hero_card(card))
-        await turn_context.send_activity(reply)
+        return MessageFactory.attachment(CardFactory.hero_card(card))
 
 
     async def on_message_activity(self, turn_context: TurnContext):
@@ -120,126 +351,84 @@ class CustomPromptBot(ActivityHandler):
         # await self._fill_out_user_profile(flow, profile, turn_context)
 
     async def _handle_incoming_attachment(self, turn_context: TurnContext):
-        await turn_context.send_activity("you have send a file.")
-
-    async def _handle_user_info(self, turn_context: TurnContext):
-
-        reply = Activity(type=ActivityTypes.message)
-        profile = await self.profile_accessor.get(turn_context, UserProfile)
-        flow = await self.flow_accessor.get(turn_context, ConversationFlow)
-
-        if flow.CalenderState == State.NONE:
-            mess = turn_context.activity.text
-            if mess == "Choice1":
-                # reply.text = "This is user profile section."
-                flow.CalenderState = State.PROFILE
-                await turn_context.send_activity("This is user profile section.")
-                await self._fill_out_user_profile(flow, profile, turn_context)
-            elif mess == "Choice2":
-                # reply.text = "This is personal preference section."
-                flow.CalenderState = State.PREFERENCE
-                await turn_context.send_activity("This is personal preference section.")
-                await self._fill_out_personal_preference(flow, profile, turn_context)
-                # await self.test(flow, profile, turn_context)
-            elif mess == "Choice3":
-                # reply.text = "This is an uploaded attachment."
-                flow.CalenderState = State.FILE
-                await turn_context.send_activity("This is uploaded attachment.")
-            else:
-                response = await self.qna_maker.get_answers(turn_context)
-                if response and len(response) > 0:
-                    await turn_context.send_activity(MessageFactory.text(response[0].answer))
-                else:
-                    await turn_context.send_activity("No QnA Maker answers were found.")
-
-                await self._send_welcome_message(turn_context)
-            # await turn_context.send_activity(reply)
-
-        elif flow.CalenderState == State.PROFILE:
-            await self._fill_out_user_profile(flow, profile, turn_context)
+        with METRICS.span("state_load"):
+            flow = await self.flow_accessor.get(turn_context, ConversationFlow)
+
+        # The connector client the adapter made for this turn holds the
+        # credentials channels expect on attachment downloads.
+        client = turn_context.turn_state.get(BotAdapter.BOT_CONNECTOR_CLIENT_KEY)
+        credentials = client.config.credentials if client is not None else None
+
+        intervals = []
+        sources = []
+        for attachment in turn_context.activity.attachments:
+            try:
+                calendar = await self.calendar_ingestor.ingest(attachment, credentials=credentials)
+            except CalendarIngestionError as error:
+                await turn_context.send_activity(MessageFactory.text(str(error)))
+                continue
+            intervals.extend(calendar.intervals)
+            sources.append(calendar.source or "calendar")
+
+        if not sources:
+            return
+
+        calendar = BusyCalendar.from_intervals(
+            merge_intervals(intervals), source=", ".join(sources), updated=calendar.updated
+        )
+        await self.calendar_store.save(CalendarStore.key_for(turn_context), calendar)
+        await turn_context.send_activity(
+            MessageFactory.text(
+                f"Your calendar {calendar.source} is saved with {len(calendar)} busy periods."
+            )
+        )
 
-        elif flow.CalenderState == State.PREFERENCE:
-            # await turn_context.send_activity("personal preference state")
-            await self._fill_out_personal_preference(flow, profile, turn_context)
-            # await self.test(flow, profile, turn_context)
+        if flow.CalenderState == State.FILE:
+            flow.CalenderState = State.NONE
+            await self._send_welcome_message(turn_context)
 
-        elif flow.CalenderState == State.FILE:
-            await turn_context.send_activity("upload file state")
-        elif flow.CalenderState == State.HELP:
-            await turn_context.send_activity("help state")
+    async def _handle_user_info(self, turn_context: TurnContext):
+        with METRICS.span("state_load"):
+            profile = await self.profile_accessor.get(turn_context, UserProfile)
+            flow = await self.flow_accessor.get(turn_context, ConversationFlow)
 
-    async def _fill_out_user_profile(
-        self, flow: ConversationFlow, profile: UserProfile, turn_context: TurnContext
-    ):
-        user_input = turn_context.activity.text.strip()
+        if await self.dialog.on_message(flow, profile, turn_context):
+            return
 
-        # ask for name
-        if flow.last_question_asked == Question.NONE:
+        try:
+            answer = await self._get_qna_answer(turn_context)
+        except QnAUnavailable:
             await turn_context.send_activity(
-                MessageFactory.text("Let's get started. What is your name?")
+                self.templates.get("qna_unavailable", turn_context.activity.locale)
             )
-            flow.last_question_asked = Question.NAME
-
-        # validate name then ask for age
-        elif flow.last_question_asked == Question.NAME:
-            validate_result = self._validate_name(user_input)
-            if not validate_result.is_valid:
-                await turn_context.send_activity(
-                    MessageFactory.text(validate_result.message)
-                )
-            else:
-                profile.name = validate_result.value
-                await turn_context.send_activity(
-                    MessageFactory.text(f"Hi {profile.name}")
-                )
-                await turn_context.send_activity(
-                    MessageFactory.text("How old are you?")
-                )
-                flow.last_question_asked = Question.AGE
-
-        # validate age then ask for date
-        elif flow.last_question_asked == Question.AGE:
-            validate_result = self._validate_age(user_input)
-            if not validate_result.is_valid:
-                await turn_context.send_activity(
-                    MessageFactory.text(validate_result.message)
-                )
-            else:
-                profile.age = validate_result.value
-                await turn_context.send_activity(
-                    MessageFactory.text(f"I have your age as {profile.age}.")
-                )
-                await turn_context.send_activity(
-                    MessageFactory.text("what is your address?")
-                )
-                flow.last_question_asked = Question.ADDR
-
-        # validate date and wrap it up
-        elif flow.last_question_asked == Question.ADDR:
-            validate_result = self._validate_addr(user_input)
-            if not validate_result.is_valid:
-                await turn_context.send_activity(
-                    MessageFactory.text(validate_result.message)
-                )
+        else:
+            if answer is not None:
+                await turn_context.send_activity(MessageFactory.text(answer))
             else:
-                profile.addr = validate_result.value
-                await turn_context.send_activity(
-                    MessageFactory.text(
-                        f"Your address {profile.addr} is saved."
-                    )
-                )
-                await turn_context.send_activity(
-                    MessageFactory.text(
-                        f"Thanks for completing the booking {profile.name}."
-                    )
-                )
-                await turn_context.send_activity(
-                    MessageFactory.text("Type anything to run the bot again.")
-                )
-                flow.last_question_asked = Question.NONE
-                flow.CalenderState = State.NONE
-
-                await self._send_welcome_message(turn_context)
+                await turn_context.send_activity("No QnA Maker answers were found.")
+
+        await self._send_welcome_message(turn_context)
+
+    async def _get_qna_answer(self, turn_context: TurnContext):
+        # Most traffic repeats the same few questions, so answers (including
+        # "no answer") are cached by normalized question text.
+        question = turn_context.activity.text
+        if self.local_kb is not None:
+            # Confident local matches skip QnA Maker and are not cached, so a
+            # reloaded knowledge base takes effect immediately.
+            answer = self.local_kb.answer(question)
+            if answer is not None:
+                return answer
+
+        answer = self.answer_cache.get(question)
+        if answer is not MISSING:
+            return answer
+
+        # Failures raise QnAUnavailable and are not cached.
+        with METRICS.span("qna"):
+            answer = await self.qna_client.get_answer(question)
+        self.answer_cache.put(question, answer)
+        return answer
 
     def _validate_name(self, user_input: str) -> ValidationResult:
         if not user_input:
@@ -250,13 +439,14 @@ class CustomPromptBot(ActivityHandler):
 
         return ValidationResult(is_valid=True, value=user_input)
 
-    def _validate_age(self, user_input: str) -> ValidationResult:
+    async def _validate_age(self, user_input: str) -> ValidationResult:
         # Attempt to convert the Recognizer result to an integer. This works for "a dozen", "twelve", "12", and so on.
-        # The recognizer returns a list of potential recognition results, if any.
-        results = recognize_number(user_input, Culture.English)
-        for result in results:
-            if "value" in result.resolution:
-                age = int(result.resolution["value"])
+        # The recognizer returns a list of potential recognition resolutions, if any.
+        with METRICS.span("recognizer"):
+            resolutions = await self.recognizers.number(user_input)
+        for resolution in resolutions:
+            if "value" in resolution:
+                age = int(resolution["value"])
                 if 18 <= age <= 120:
                     return ValidationResult(is_valid=True, value=age)
 
@@ -264,14 +454,15 @@ class CustomPromptBot(ActivityHandler):
             is_valid=False, message="Please enter an age between 18 and 120."
         )
 
-    def _validate_date(self, user_input: str) -> ValidationResult:
+    async def _validate_date(self, user_input: str) -> ValidationResult:
         try:
             # Try to recognize the input as a date-time. This works for responses such as "11/14/2018", "9pm",
             # "tomorrow", "Sunday at 5pm", and so on. The recognizer returns a list of potential recognition results,
             # if any.
-            results = recognize_datetime(user_input, Culture.English)
+            with METRICS.span("recognizer"):
+                results = await self.recognizers.datetime(user_input)
             for result in results:
-                for resolution in result.resolution["values"]:
+                for resolution in result["values"]:
                     if "value" in resolution:
                         now = datetime.now()
 
@@ -308,6 +499,16 @@ class CustomPromptBot(ActivityHandler):
     def _validate_addr(self, user_input: str) -> ValidationResult:
         return ValidationResult(is_valid=True, value=user_input)
 
+    def _validate_choice(self, choice_type, user_input: str) -> ValidationResult:
+        choice = choice_type.parse(user_input)
+        if choice is None:
+            options = ", ".join(member.label for member in choice_type)
+            return ValidationResult(
+                is_valid=False, message=f"Please choose one of: {options}."
+            )
+
+        return ValidationResult(is_valid=True, value=choice)
+
     async def test(
             self, flow: ConversationFlow, profile: UserProfile, turn_context: TurnContext
     ):
@@ -322,75 +523,3 @@ class CustomPromptBot(ActivityHandler):
         )
 
         return await turn_context.send_activity(reply)
-    async def _fill_out_personal_preference(
-            self, flow: ConversationFlow, profile: UserProfile, turn_context: TurnContext
-    ):
-        # await turn_context.send_activity("_fill_out_personal_preference")
-        user_input = turn_context.activity.text.strip()
-
-        # ask for meeting slot
-        if flow.last_question_asked2 == Question2.NONE:
-            # await turn_context.send_activity(
-            #     MessageFactory.text("Let's get started. Which time slot during meetings do your prefer?")
-            # )
-            reply = MessageFactory.text("Let's get started. Which time slot during meetings do your prefer?")
-            reply.suggested_actions = SuggestedActions(
-                actions=[
-                    CardAction(title="HALF HOUR", type=ActionTypes.im_back, value="half hour"),
-                    CardAction(title="ONE HOUR", type=ActionTypes.im_back, value="one hour"),
-                    CardAction(title="TWO HOURS", type=ActionTypes.im_back, value="two hours"),
-                    CardAction(title="NONE", type=ActionTypes.im_back, value="none"),
-                ]
-            )
-            flow.last_question_asked2 = Question2.MEETINGSOLT
-
-            return await turn_context.send_activity(reply)
-
-        # validate name then ask for age
-        elif flow.last_question_asked2 == Question2.MEETINGSOLT:
-            profile.meetingSlot = turn_context.activity.text
-            await turn_context.send_activity(
-                MessageFactory.text(f"You have selected {profile.meetingSlot} for meeting slot")
-            )
-            flow.last_question_asked2 = Question2.NOMEETPERIOD
-            reply = MessageFactory.text("Next. Which time period you don't want meeting?")
-            reply.suggested_actions = SuggestedActions(
-                actions=[
-                    CardAction(title="before 8am", type=ActionTypes.im_back, value="before 8am"),
-                    CardAction(title="during lunch time", type=ActionTypes.im_back, value="during lunch time"),
-                    CardAction(title="after 5pm", type=ActionTypes.im_back, value="after 5pm"),
-                    CardAction(title="NONE", type=ActionTypes.im_back, value="NONE"),
-                ]
-            )
-            return await turn_context.send_activity(reply)
-
-        # validate age then ask for date
-        elif flow.last_question_asked2 == Question2.NOMEETPERIOD:
-            profile.nomeetPeriod = turn_context.activity.text
-            flow.last_question_asked2 = Question2.TRANSPORTATION
-            await turn_context.send_activity(
-                MessageFactory.text(f"You have selected {profile.nomeetPeriod} for no meeting period.")
-            )
-            reply = MessageFactory.text("Next. Which transportation you want to attend meetings?")
-            reply.suggested_actions = SuggestedActions(
-                actions=[
-                    CardAction(title="car", type=ActionTypes.im_back, value="car"),
-                    CardAction(title="bus", type=ActionTypes.im_back, value="bus"),
-                    CardAction(title="bicycle", type=ActionTypes.im_back, value="bicycle"),
-                    CardAction(title="foot", type=ActionTypes.im_back, value="foot"),
-                ]
-            )
-            return await turn_context.send_activity(reply)
-
-        # validate date and wrap it up
-        elif flow.last_question_asked2 == Question2.TRANSPORTATION:
-            profile.transportation = turn_context.activity.text
-            flow.last_question_asked2 = Question2.NONE
-            await turn_context.send_activity(
-                MessageFactory.text(f"You have selected {profile.transportation} for meeting transportation.")
-            )
-
-            flow.CalenderState = State.NONE
-            await self._send_welcome_message(turn_context)
-
-
@@ -0,0 +1,215 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import inspect
+from functools import partial
+from typing import Awaitable, Callable, Dict, Sequence, Tuple, Union
+
+from botbuilder.core import MessageFactory, TurnContext
+from botbuilder.schema import Activity, ActionTypes, CardAction, SuggestedActions
+
+from data_models import ChoiceEnum, ConversationFlow, State, UserProfile
+from helpers import TemplateCache
+
+
+def choice_prompt(text: str, choices: Sequence[Tuple[str, str]]) -> Activity:
+    """A text prompt with one im_back suggested action per (title, value)."""
+    reply = MessageFactory.text(text)
+    reply.suggested_actions = SuggestedActions(
+        actions=[
+            CardAction(title=title, type=ActionTypes.im_back, value=value)
+            for title, value in choices
+        ]
+    )
+    return reply
+
+
+class DialogStep:
+    """One question of a section.
+
+    ``question`` is recorded in the ConversationFlow while the bot waits for
+    the answer. The answer is checked by the bot method named ``validator``
+    (called with ``validator_args`` first, sync or async) and its value is
+    stored on ``UserProfile.<field>``. ``confirmation`` lines are then sent,
+    formatted with ``value`` (a choice's label) and ``profile``.
+    """
+
+    def __init__(
+        self,
+        question,
+        field: str,
+        prompt: Union[str, Activity],
+        validator: str,
+        validator_args: tuple = (),
+        confirmation: Sequence[str] = (),
+    ):
+        self.question = question
+        self.field = field
+        self.prompt = MessageFactory.text(prompt) if isinstance(prompt, str) else prompt
+        self.validator = validator
+        self.validator_args = tuple(validator_args)
+        self.confirmation = tuple(confirmation)
+
+
+class DialogSection:
+    """A welcome-card choice and the questions asked after picking it.
+
+    ``question_field`` names the ConversationFlow attribute holding the
+    current question and ``none_question`` its idle value. Sections without
+    steps only send ``intro`` and then answer every message with
+    ``idle_reply``.
+    """
+
+    def __init__(
+        self,
+        state: State,
+        choice: str = None,
+        intro: str = None,
+        steps: Sequence[DialogStep] = (),
+        outro: Sequence[str] = (),
+        question_field: str = None,
+        none_question=None,
+        idle_reply: str = None,
+    ):
+        self.state = state
+        self.choice = choice
+        self.intro = intro
+        self.steps = tuple(steps)
+        self.outro = tuple(outro)
+        self.question_field = question_field
+        self.none_question = none_question
+        self.idle_reply = idle_reply
+
+
+class _CompiledStep:
+    __slots__ = ("step", "next", "validate")
+
+    def __init__(self, step: DialogStep, next_step: DialogStep, validate: Callable):
+        self.step = step
+        self.next = next_step
+        self.validate = validate
+
+
+class DialogEngine:
+    """Table-driven state machine for the welcome-card sections.
+
+    The sections are compiled once: choices, states and (state, question)
+    pairs map straight to their handlers, and validators are bound to the
+    bot up front. A turn is a couple of dict lookups instead of a walk
+    through if/elif chains, and adding a question means adding a
+    DialogStep, not another branch.
+
+    Step prompts are registered in ``templates`` as ``<STATE>.<QUESTION>``
+    (for example ``PREFERENCE.MEETINGSOLT``), so a localized prompt can be
+    registered under the same id for another locale.
+
+    ``on_complete`` is awaited after the last step of a section.
+    ``validators`` maps each UserProfile field to its bound validator, for
+    checking answers that do not arrive as messages (bulk imports).
+    """
+
+    def __init__(
+        self,
+        sections: Sequence[DialogSection],
+        bot,
+        on_complete: Callable[[TurnContext], Awaitable],
+        templates: TemplateCache = None,
+    ):
+        self.on_complete = on_complete
+        self.templates = templates or TemplateCache()
+        self._by_choice: Dict[str, DialogSection] = {}
+        self._by_state: Dict[State, DialogSection] = {}
+        self._steps: Dict[tuple, _CompiledStep] = {}
+        self.validators: Dict[str, Callable] = {}
+
+        for section in sections:
+            if section.choice:
+                self._by_choice[section.choice] = section
+            self._by_state[section.state] = section
+            for index, step in enumerate(section.steps):
+                self.templates.register(self.prompt_id(section, step), step.prompt)
+                next_step = section.steps[index + 1] if index + 1 < len(section.steps) else None
+                validate = partial(getattr(bot, step.validator), *step.validator_args)
+                self._steps[(section.state, step.question)] = _CompiledStep(step, next_step, validate)
+                self.validators[step.field] = validate
+
+    async def on_message(
+        self, flow: ConversationFlow, profile: UserProfile, turn_context: TurnContext
+    ) -> bool:
+        """Run one turn; False means the message is not part of any section."""
+        if flow.CalenderState == State.NONE:
+            section = self._by_choice.get(turn_context.activity.text)
+            if section is None:
+                return False
+            flow.CalenderState = section.state
+            if section.intro:
+                await turn_context.send_activity(section.intro)
+            if section.steps:
+                await self._ask(section.steps[0], section, flow, turn_context)
+            return True
+
+        section = self._by_state.get(flow.CalenderState)
+        if section is None:
+            return False
+        if not section.steps:
+            if section.idle_reply:
+                await turn_context.send_activity(section.idle_reply)
+            return True
+
+        compiled = self._steps.get(
+            (section.state, getattr(flow, section.question_field))
+        )
+        if compiled is None:
+            await self._ask(section.steps[0], section, flow, turn_context)
+            return True
+
+        await self._answer(compiled, section, flow, profile, turn_context)
+        return True
+
+    async def _answer(
+        self,
+        compiled: _CompiledStep,
+        section: DialogSection,
+        flow: ConversationFlow,
+        profile: UserProfile,
+        turn_context: TurnContext,
+    ):
+        user_input = (turn_context.activity.text or "").strip()
+        result = compiled.validate(user_input)
+        if inspect.isawaitable(result):
+            result = await result
+        if not result.is_valid:
+            await turn_context.send_activity(MessageFactory.text(result.message))
+            return
+
+        step = compiled.step
+        setattr(profile, step.field, result.value)
+        value = result.value.label if isinstance(result.value, ChoiceEnum) else result.value
+        for line in step.confirmation:
+            await turn_context.send_activity(
+                MessageFactory.text(line.format(value=value, profile=profile))
+            )
+
+        if compiled.next is not None:
+            await self._ask(compiled.next, section, flow, turn_context)
+            return
+
+        setattr(flow, section.question_field, section.none_question)
+        for line in section.outro:
+            await turn_context.send_activity(
+                MessageFactory.text(line.format(profile=profile))
+            )
+        flow.CalenderState = State.NONE
+        await self.on_complete(turn_context)
+
+    @staticmethod
+    def prompt_id(section: DialogSection, step: DialogStep) -> str:
+        return f"{section.state.name}.{step.question.name}"
+
+    async def _ask(
+        self, step: DialogStep, section: DialogSection, flow: ConversationFlow, turn_context: TurnContext
+    ):
+        setattr(flow, section.question_field, step.question)
+        await turn_context.send_activity(
+            self.templates.get(self.prompt_id(section, step), turn_context.activity.locale)
+        )
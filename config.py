@@ -14,6 +14,103 @@ class DefaultConfig:
     APP_ID = os.environ.get("MicrosoftAppId", "")
     APP_PASSWORD = os.environ.get("MicrosoftAppPassword", "")
 
+    # Inbound token validation. Accepted tokens are cached until they expire;
+    # signing keys are refreshed in the background. OpenIdMetadataUrl
+    # overrides the Bot Connector's metadata document (for testing).
+    AUTH_TOKEN_CACHE_SIZE = int(os.environ.get("AuthTokenCacheSize", "10000"))
+    OPENID_METADATA_URL = os.environ.get("OpenIdMetadataUrl", "")
+    SIGNING_KEY_REFRESH_INTERVAL = float(os.environ.get("SigningKeyRefreshInterval", "86400"))
+
     QNA_KNOWLEDGEBASE_ID = os.environ.get("QnAKnowledgebaseId", "c2da8213-cef3-44e8-9696-3981b5c46556")
     QNA_ENDPOINT_KEY = os.environ.get("QnAEndpointKey", "45bfd31a-273d-4670-b292-5adc111b5740")
     QNA_ENDPOINT_HOST = os.environ.get("QnAEndpointHostName", "https://qnamaker-fei.azurewebsites.net/qnamaker")
+
+    # Answer cache in front of QnA Maker. A size of 0 disables caching.
+    QNA_CACHE_MAX_SIZE = int(os.environ.get("QnACacheMaxSize", "1024"))
+    QNA_CACHE_TTL_SECONDS = float(os.environ.get("QnACacheTtlSeconds", "300"))
+    # Per-question deadline and keep-alive pool size for QnA Maker calls.
+    QNA_TIMEOUT_SECONDS = float(os.environ.get("QnATimeoutSeconds", "3"))
+    QNA_POOL_SIZE = int(os.environ.get("QnAPoolSize", "32"))
+    # Optional local copy of the knowledge base (QnA Maker .tsv or .json
+    # export). Questions matching it with at least LOCAL_KB_MIN_SCORE
+    # confidence are answered without calling QnA Maker. The file is
+    # re-read when it changes.
+    LOCAL_KB_PATH = os.environ.get("LocalKbPath", "")
+    LOCAL_KB_MIN_SCORE = float(os.environ.get("LocalKbMinScore", "0.7"))
+    LOCAL_KB_RELOAD_INTERVAL = float(os.environ.get("LocalKbReloadInterval", "5"))
+
+    # State storage backend: "memory" (process local) or "sqlite" (durable,
+    # write-behind). Flush interval is the longest a write waits for its commit.
+    STATE_STORAGE = os.environ.get("StateStorage", "memory")
+    STATE_STORAGE_PATH = os.environ.get("StateStoragePath", "bot_state.sqlite3")
+    STATE_STORAGE_FLUSH_INTERVAL = float(os.environ.get("StateStorageFlushInterval", "0.05"))
+    # "memory" storage limits: total size of the stored state, and how long an
+    # idle conversation's state is kept (0 keeps it until evicted for space).
+    STATE_MEMORY_BUDGET_MB = int(os.environ.get("StateMemoryBudgetMb", "256"))
+    STATE_IDLE_TTL_SECONDS = float(os.environ.get("StateIdleTtlSeconds", "86400"))
+
+    # Recognizers-Text runs off the event loop. Set RecognizerUseProcesses=1 to
+    # use worker processes instead of threads.
+    RECOGNIZER_WORKERS = int(os.environ.get("RecognizerWorkers", "2"))
+    RECOGNIZER_USE_PROCESSES = os.environ.get("RecognizerUseProcesses", "0") == "1"
+    RECOGNIZER_CACHE_SIZE = int(os.environ.get("RecognizerCacheSize", "4096"))
+
+    # Buffer a turn's outgoing activities and send them in one flush, in the
+    # order they were sent. Merging consecutive plain text messages into one
+    # message changes what users see, so it is opt-in.
+    OUTBOUND_BATCHING = os.environ.get("OutboundBatching", "1") == "1"
+    OUTBOUND_MERGE_TEXT = os.environ.get("OutboundMergeText", "0") == "1"
+
+    # Parse message and conversationUpdate activities straight from the JSON
+    # body, deserializing rarely used fields only when read. Bodies larger
+    # than MAX_ACTIVITY_BYTES are rejected with 413.
+    FAST_ACTIVITY_PARSING = os.environ.get("FastActivityParsing", "1") == "1"
+    MAX_ACTIVITY_BYTES = int(os.environ.get("MaxActivityBytes", 1024 * 1024))
+
+    # Calendar uploads: size cap and how many days ahead busy time is kept.
+    CALENDAR_MAX_BYTES = int(os.environ.get("CalendarMaxBytes", str(5 * 1024 * 1024)))
+    CALENDAR_HORIZON_DAYS = int(os.environ.get("CalendarHorizonDays", "90"))
+    # Comma separated hosts (``*.domain`` for subdomains) calendar links may be
+    # downloaded from; empty keeps the Bot Framework and Teams defaults.
+    CALENDAR_ATTACHMENT_HOSTS = [
+        host.strip()
+        for host in os.environ.get("CalendarAttachmentHosts", "").split(",")
+        if host.strip()
+    ]
+
+    # Record every inbound activity and reply to segment files in
+    # TranscriptDir (empty disables). Replay with `python -m transcripts.cli`.
+    TRANSCRIPT_DIR = os.environ.get("TranscriptDir", "")
+    TRANSCRIPT_SEGMENT_MB = int(os.environ.get("TranscriptSegmentMb", "64"))
+    TRANSCRIPT_QUEUE_SIZE = int(os.environ.get("TranscriptQueueSize", "10000"))
+
+    # Per-phase turn latency histograms, served on /metrics in Prometheus format.
+    METRICS_ENABLED = os.environ.get("Metrics", "1") == "1"
+
+    # Turn errors and other events, logged as JSON lines by a background
+    # thread. Empty path logs to stderr; the file rotates at EventLogMaxMb
+    # keeping EventLogBackups old files. A full queue drops records.
+    EVENT_LOG_PATH = os.environ.get("EventLogPath", "")
+    EVENT_LOG_MAX_MB = int(os.environ.get("EventLogMaxMb", "10"))
+    EVENT_LOG_BACKUPS = int(os.environ.get("EventLogBackups", "5"))
+    EVENT_LOG_QUEUE_SIZE = int(os.environ.get("EventLogQueueSize", "10000"))
+
+    # Number of worker processes sharing the port. More than one requires
+    # StateStorage=sqlite. SIGHUP to the master gracefully restarts workers.
+    WORKERS = int(os.environ.get("Workers", "1"))
+
+    # Admission control: turns run one at a time per conversation, at most
+    # MaxInFlightTurns at once overall. Excess turns get 429/503 + Retry-After.
+    MAX_IN_FLIGHT_TURNS = int(os.environ.get("MaxInFlightTurns", "64"))
+    MAX_WAITING_TURNS = int(os.environ.get("MaxWaitingTurns", "256"))
+    MAX_TURNS_PER_CONVERSATION = int(os.environ.get("MaxTurnsPerConversation", "4"))
+    ADMISSION_QUEUE_TIMEOUT = float(os.environ.get("AdmissionQueueTimeout", "5"))
+    RETRY_AFTER_SECONDS = int(os.environ.get("RetryAfterSeconds", "1"))
+
+    # Proactive reminders to users with an incomplete profile or no calendar.
+    # POST /api/proactive/nudges (with "Authorization: Bearer <token>") starts
+    # a run and GET reports its progress; without a token the route is off.
+    PROACTIVE_ADMIN_TOKEN = os.environ.get("ProactiveAdminToken", "")
+    PROACTIVE_CONCURRENCY = int(os.environ.get("ProactiveConcurrency", "8"))
+    PROACTIVE_RATE_PER_SECOND = float(os.environ.get("ProactiveRatePerSecond", "20"))
+    PROACTIVE_MAX_ATTEMPTS = int(os.environ.get("ProactiveMaxAttempts", "4"))
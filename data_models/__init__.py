@@ -3,5 +3,8 @@
 
 from .conversation_flow import ConversationFlow, Question, State, Question2
 from .user_profile import UserProfile, Slot,NoMeetingPeriod,Transportation
+from .busy_calendar import BusyCalendar
+from .tracked_state import ChoiceEnum, TrackedState, has_changes, mark_clean
 
-__all__ = ["ConversationFlow", "Question", "UserProfile", "State", "Question2","Slot","NoMeetingPeriod","Transportation"]
+__all__ = ["ConversationFlow", "Question", "UserProfile", "State", "Question2","Slot","NoMeetingPeriod","Transportation",
+           "BusyCalendar", "ChoiceEnum", "TrackedState", "has_changes", "mark_clean"]
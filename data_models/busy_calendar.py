@@ -0,0 +1,45 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+from typing import List, Tuple
+
+from .tracked_state import TrackedState
+
+
+class BusyCalendar(TrackedState):
+    """A user's busy time as sorted, non-overlapping [start, end) intervals.
+
+    Times are whole minutes since the Unix epoch (UTC). They are stored
+    delta-encoded as ``[start0, length0, gap1, length1, ...]`` so that a month
+    of meetings is a short list of small integers rather than timestamps.
+    """
+
+    __slots__ = ("encoded", "source", "updated")
+
+    def __init__(self, encoded: List[int] = None, source: str = None, updated: int = 0):
+        self.encoded = encoded if encoded is not None else []
+        self.source = source
+        self.updated = updated
+
+    @classmethod
+    def from_intervals(cls, intervals: List[Tuple[int, int]], source: str = None, updated: int = 0):
+        encoded = []
+        previous_end = 0
+        for start, end in intervals:
+            encoded.append(start - previous_end)
+            encoded.append(end - start)
+            previous_end = end
+        return cls(encoded, source, updated)
+
+    @property
+    def intervals(self) -> List[Tuple[int, int]]:
+        intervals = []
+        position = 0
+        encoded = self.encoded
+        for index in range(0, len(encoded) - 1, 2):
+            start = position + encoded[index]
+            position = start + encoded[index + 1]
+            intervals.append((start, position))
+        return intervals
+
+    def __len__(self):
+        return len(self.encoded) // 2
@@ -3,6 +3,8 @@
 
 from enum import Enum
 
+from .tracked_state import TrackedState
+
 
 class Question(Enum):
     NAME = 1
@@ -24,7 +26,15 @@ class State(Enum):
     NONE = 5
 
 
-class ConversationFlow:
+class ConversationFlow(TrackedState):
+    __slots__ = ("last_question_asked", "last_question_asked2", "CalenderState")
+
+    _enum_fields = {
+        "last_question_asked": Question,
+        "last_question_asked2": Question2,
+        "CalenderState": State,
+    }
+
     def __init__(
         self, last_question_asked: Question = Question.NONE, state=State.NONE, last_question_asked2=Question2.NONE
     ):
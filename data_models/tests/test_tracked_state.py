@@ -0,0 +1,72 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import jsonpickle
+
+from data_models import (
+    NoMeetingPeriod,
+    Slot,
+    Transportation,
+    UserProfile,
+    has_changes,
+    mark_clean,
+)
+
+
+def restore(profile: UserProfile) -> UserProfile:
+    # The round trip the state storages make.
+    return jsonpickle.decode(jsonpickle.encode(profile))
+
+
+def test_new_objects_start_dirty():
+    assert UserProfile().is_dirty
+
+
+def test_restored_objects_start_clean_and_track_assignments():
+    profile = restore(UserProfile(name="Alex", age=32, meetingslot=Slot.ONE_HOUR))
+    assert not profile.is_dirty
+    assert profile.name == "Alex"
+    assert profile.meetingSlot is Slot.ONE_HOUR
+
+    # Assigning the value it already has is not a change.
+    profile.name = "Alex"
+    assert not profile.is_dirty
+    profile.age = 33
+    assert profile.is_dirty
+
+
+def test_state_is_a_versioned_list_with_enum_values():
+    profile = UserProfile(
+        name="Alex",
+        age=32,
+        addr="1 Main Street",
+        meetingslot=Slot.TWO_HOURS,
+        nomeetperiod=NoMeetingPeriod.AFTER_5PM,
+        transportation=Transportation.BUS,
+    )
+    assert profile.__getstate__() == [UserProfile.VERSION, "Alex", 32, "1 Main Street", 3, 3, 2]
+    assert restore(profile) == profile
+
+
+def test_older_payloads_are_upgraded():
+    profile = UserProfile.__new__(UserProfile)
+    # A dict payload without the newer fields, holding suggested action text.
+    profile.__setstate__({"name": "Alex", "age": 40, "meetingSlot": "ONE HOUR"})
+    assert profile.meetingSlot is Slot.ONE_HOUR
+    assert profile.transportation is Transportation.FOOT
+    assert not profile.is_dirty
+
+
+def test_has_changes_and_mark_clean():
+    clean = restore(UserProfile(name="Alex"))
+    state = {"UserProfile": clean}
+    assert not has_changes(state)
+
+    clean.addr = "2 Main Street"
+    assert has_changes(state)
+    mark_clean(state)
+    assert not has_changes(state)
+
+    # Untracked values are always written.
+    assert has_changes({"other": {"value": 1}})
+    assert not has_changes(None)
@@ -0,0 +1,129 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+from enum import Enum
+
+_UNSET = object()
+
+
+class ChoiceEnum(Enum):
+    """Enum that can be parsed from the text of a suggested action."""
+
+    @classmethod
+    def parse(cls, text: str):
+        if not text:
+            return None
+        key = " ".join(text.lower().replace("_", " ").split())
+        for member in cls:
+            if key == member.name.lower().replace("_", " ") or key == member.label:
+                return member
+        return None
+
+    @property
+    def label(self) -> str:
+        return self.name.lower().replace("_", " ")
+
+
+class TrackedState:
+    """Slotted state object that remembers whether it changed since it was loaded.
+
+    Subclasses list their persisted attributes in ``__slots__``; attributes
+    named in ``_enum_fields`` are stored as their integer value. The stored
+    form is a flat list ``[VERSION, field1, field2, ...]`` instead of a
+    per-attribute dict, which keeps state payloads and the per-turn change
+    hash small.
+
+    Objects created in code start dirty so that they get written once; objects
+    restored from storage start clean and only become dirty when an attribute
+    is assigned a different value.
+    """
+
+    __slots__ = ("_dirty",)
+
+    VERSION = 1
+    _enum_fields = {}
+    _field_names = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._field_names = tuple(name for name in cls.__slots__ if name != "_dirty")
+
+    def __setattr__(self, name, value):
+        if name != "_dirty" and getattr(self, name, _UNSET) != value:
+            object.__setattr__(self, "_dirty", True)
+        object.__setattr__(self, name, value)
+
+    @property
+    def is_dirty(self) -> bool:
+        return getattr(self, "_dirty", True)
+
+    def mark_clean(self):
+        object.__setattr__(self, "_dirty", False)
+
+    def __getstate__(self):
+        state = [self.VERSION]
+        for name in self._field_names:
+            value = getattr(self, name, None)
+            if isinstance(value, Enum):
+                value = value.value
+            state.append(value)
+        return state
+
+    def __setstate__(self, state):
+        if isinstance(state, dict):
+            values = state
+        else:
+            # state[0] is the schema version; only version 1 exists so far.
+            values = dict(zip(self._field_names, state[1:]))
+
+        # Start from the constructor defaults so fields missing from older
+        # payloads still get a value.
+        type(self).__init__(self)
+        for name in self._field_names:
+            if name not in values:
+                continue
+            value = values[name]
+            enum_type = self._enum_fields.get(name)
+            if enum_type is not None:
+                value = self._decode_enum(enum_type, value, getattr(self, name))
+            object.__setattr__(self, name, value)
+        self.mark_clean()
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return self.__getstate__() == other.__getstate__()
+
+    __hash__ = None
+
+    @staticmethod
+    def _decode_enum(enum_type, value, default):
+        if isinstance(value, enum_type):
+            return value
+        if isinstance(value, int):
+            return enum_type(value)
+        if isinstance(value, str) and issubclass(enum_type, ChoiceEnum):
+            # Profiles written before these fields were enums hold the raw
+            # text of the suggested action.
+            parsed = enum_type.parse(value)
+            if parsed is not None:
+                return parsed
+        return default
+
+
+def has_changes(state: dict) -> bool:
+    """True if any tracked object in a BotState dict needs to be written."""
+    if not state:
+        return False
+    return any(
+        not isinstance(value, TrackedState) or value.is_dirty
+        for value in state.values()
+    )
+
+
+def mark_clean(state: dict):
+    if not state:
+        return
+    for value in state.values():
+        if isinstance(value, TrackedState):
+            value.mark_clean()
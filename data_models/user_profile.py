@@ -1,26 +1,44 @@
 # Copyright (c) Microsoft Corporation. All rights reserved.
 # Licensed under the MIT License.
-from enum import Enum
+from .tracked_state import ChoiceEnum, TrackedState
 
-class Slot(Enum):
+class Slot(ChoiceEnum):
     HALF_HOUR = 1
     ONE_HOUR = 2
     TWO_HOURS = 3
     NONE = 4
 
-class NoMeetingPeriod(Enum):
+class NoMeetingPeriod(ChoiceEnum):
     BEFORE_8AM = 1
     DURING_LUNCH = 2
     AFTER_5PM = 3
     NONE = 4
 
-class Transportation(Enum):
+    @property
+    def label(self) -> str:
+        if self is NoMeetingPeriod.BEFORE_8AM:
+            return "before 8am"
+        if self is NoMeetingPeriod.DURING_LUNCH:
+            return "during lunch time"
+        if self is NoMeetingPeriod.AFTER_5PM:
+            return "after 5pm"
+        return "none"
+
+class Transportation(ChoiceEnum):
     CAR = 1
     BUS = 2
     BICYCLE = 3
     FOOT = 4
 
-class UserProfile:
+class UserProfile(TrackedState):
+    __slots__ = ("name", "age", "addr", "meetingSlot", "nomeetPeriod", "transportation")
+
+    _enum_fields = {
+        "meetingSlot": Slot,
+        "nomeetPeriod": NoMeetingPeriod,
+        "transportation": Transportation,
+    }
+
     def __init__(self, name: str = None, age: int = 0, addr: str = None, meetingslot = Slot.NONE, nomeetperiod = NoMeetingPeriod.NONE, transportation = Transportation.FOOT):
         self.name = name
         self.age = age
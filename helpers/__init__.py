@@ -0,0 +1,36 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+from .activity_parser import ActivityTooLarge, LazyActivity, parse_activity
+from .admission import AdmissionController, Overloaded
+from .answer_cache import AnswerCache, MISSING, normalize_question
+from .event_log import EventLog
+from .kb_index import KnowledgeBaseIndex, read_kb_export
+from .metrics import METRICS, PhaseMetrics, phase_of
+from .prefork import PreforkServer, WORKER_INDEX_ENV
+from .qna_client import QnAClient, QnAUnavailable
+from .recognizer_pool import RecognizerPool
+from .templates import TemplateCache
+
+__all__ = [
+    "ActivityTooLarge",
+    "LazyActivity",
+    "parse_activity",
+    "AdmissionController",
+    "Overloaded",
+    "AnswerCache",
+    "MISSING",
+    "normalize_question",
+    "EventLog",
+    "KnowledgeBaseIndex",
+    "read_kb_export",
+    "METRICS",
+    "PhaseMetrics",
+    "phase_of",
+    "PreforkServer",
+    "WORKER_INDEX_ENV",
+    "QnAClient",
+    "QnAUnavailable",
+    "RecognizerPool",
+    "TemplateCache",
+]
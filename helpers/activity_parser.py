@@ -0,0 +1,126 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import json
+
+from botbuilder.schema import (
+    Activity,
+    ActivityTypes,
+    Attachment,
+    ChannelAccount,
+    ConversationAccount,
+)
+import botbuilder.schema as schema
+from msrest import Deserializer
+
+try:
+    import orjson
+
+    _loads = orjson.loads
+except ImportError:  # orjson is optional
+    _loads = json.loads
+
+_DESERIALIZER = Deserializer(
+    {name: value for name, value in vars(schema).items() if isinstance(value, type)}
+)
+
+# Activity types the fast path handles; anything else takes the full
+# msrest deserializer.
+FAST_TYPES = frozenset((ActivityTypes.message, ActivityTypes.conversation_update))
+
+
+class ActivityTooLarge(ValueError):
+    pass
+
+
+class LazyActivity(Activity):
+    """Activity whose fields are read from the raw JSON on first access.
+
+    The fields every turn touches (ids, accounts, text, attachments) are set
+    up front; all others are deserialized individually by msrest the first
+    time something reads them, and then kept. It is a real Activity, so the
+    adapter, TurnContext and the connector serializer treat it as one.
+    """
+
+    def __getattr__(self, name: str):
+        # Only called for attributes that are not set yet.
+        attribute = Activity._attribute_map.get(name)
+        raw = self.__dict__.get("_raw")
+        if attribute is None or raw is None:
+            raise AttributeError(name)
+
+        value = raw.get(attribute["key"])
+        if value is not None and attribute["type"] != "str":
+            value = _DESERIALIZER.deserialize_data(value, attribute["type"])
+        setattr(self, name, value)
+        return value
+
+
+def _account(raw: dict, account_type=ChannelAccount):
+    if raw is None:
+        return None
+    if account_type is ConversationAccount:
+        return ConversationAccount(
+            id=raw.get("id"),
+            name=raw.get("name"),
+            is_group=raw.get("isGroup"),
+            conversation_type=raw.get("conversationType"),
+            # The schema's key, so both paths agree on what they read.
+            tenant_id=raw.get("tenantID"),
+            aad_object_id=raw.get("aadObjectId"),
+            role=raw.get("role"),
+        )
+    return ChannelAccount(
+        id=raw.get("id"),
+        name=raw.get("name"),
+        aad_object_id=raw.get("aadObjectId"),
+        role=raw.get("role"),
+    )
+
+
+def _attachments(raw: list):
+    if raw is None:
+        return None
+    return [
+        Attachment(
+            content_type=item.get("contentType"),
+            content_url=item.get("contentUrl"),
+            content=item.get("content"),
+            name=item.get("name"),
+            thumbnail_url=item.get("thumbnailUrl"),
+        )
+        for item in raw
+    ]
+
+
+def parse_activity(body: bytes, max_bytes: int = None) -> Activity:
+    """Decode a request body into an Activity, taking the fast path when possible."""
+    if max_bytes is not None and len(body) > max_bytes:
+        raise ActivityTooLarge(f"Activity body is larger than {max_bytes} bytes")
+
+    raw = _loads(body)
+    if not isinstance(raw, dict) or raw.get("type") not in FAST_TYPES:
+        return Activity().deserialize(raw)
+
+    activity = LazyActivity.__new__(LazyActivity)
+    members_added = raw.get("membersAdded")
+    activity.__dict__.update(
+        _raw=raw,
+        additional_properties={},
+        type=raw.get("type"),
+        id=raw.get("id"),
+        channel_id=raw.get("channelId"),
+        service_url=raw.get("serviceUrl"),
+        text=raw.get("text"),
+        locale=raw.get("locale"),
+        reply_to_id=raw.get("replyToId"),
+        delivery_mode=raw.get("deliveryMode"),
+        from_property=_account(raw.get("from")),
+        recipient=_account(raw.get("recipient")),
+        conversation=_account(raw.get("conversation"), ConversationAccount),
+        attachments=_attachments(raw.get("attachments")),
+        members_added=[_account(member) for member in members_added]
+        if members_added is not None
+        else None,
+    )
+    return activity
@@ -0,0 +1,142 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+from http import HTTPStatus
+
+
+class Overloaded(Exception):
+    """A turn was shed; reply with ``status`` and a Retry-After header."""
+
+    def __init__(self, status: int, retry_after: int, reason: str):
+        super().__init__(reason)
+        self.status = status
+        self.retry_after = retry_after
+
+
+class _Conversation:
+    __slots__ = ("lock", "pending")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.pending = 0
+
+
+class AdmissionController:
+    """Orders turns per conversation and bounds how many run at once.
+
+    Turns of one conversation run one at a time in arrival order, so a
+    double-clicked card action cannot run two state updates concurrently.
+    At most ``max_per_conversation`` turns of a conversation may be waiting
+    or running; more are rejected with 429.
+
+    Across conversations at most ``max_in_flight`` turns run at once. Up to
+    ``max_waiting`` more wait for a slot, each for at most ``queue_timeout``
+    seconds; beyond that turns are rejected with 503. Shedding early keeps
+    the latency of admitted turns bounded instead of letting every turn slow
+    down under a burst.
+
+    Ordering is per process; with several workers a conversation's turns
+    may still land on different workers.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = 64,
+        max_waiting: int = 256,
+        max_per_conversation: int = 4,
+        queue_timeout: float = 5.0,
+        retry_after: int = 1,
+    ):
+        self.max_in_flight = max_in_flight
+        self.max_waiting = max_waiting
+        self.max_per_conversation = max_per_conversation
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+
+        self._in_flight = 0
+        self._waiters = deque()
+        self._conversations = {}
+
+        self.admitted = 0
+        self.rejected_conversation = 0
+        self.rejected_overload = 0
+
+    @asynccontextmanager
+    async def admit(self, conversation_id: str):
+        conversation = self._conversations.get(conversation_id)
+        if conversation is None:
+            conversation = self._conversations[conversation_id] = _Conversation()
+        if conversation.pending >= self.max_per_conversation:
+            self.rejected_conversation += 1
+            raise Overloaded(
+                HTTPStatus.TOO_MANY_REQUESTS,
+                self.retry_after,
+                "Too many turns queued for this conversation",
+            )
+
+        conversation.pending += 1
+        try:
+            async with conversation.lock:
+                await self._acquire()
+                self.admitted += 1
+                try:
+                    yield
+                finally:
+                    self._release()
+        finally:
+            conversation.pending -= 1
+            if conversation.pending == 0:
+                del self._conversations[conversation_id]
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self._in_flight,
+            "waiting": len(self._waiters),
+            "conversations": len(self._conversations),
+            "admitted": self.admitted,
+            "rejected_conversation": self.rejected_conversation,
+            "rejected_overload": self.rejected_overload,
+        }
+
+    async def _acquire(self):
+        if self._in_flight < self.max_in_flight and not self._waiters:
+            self._in_flight += 1
+            return
+        if len(self._waiters) >= self.max_waiting:
+            self.rejected_overload += 1
+            raise Overloaded(
+                HTTPStatus.SERVICE_UNAVAILABLE, self.retry_after, "Bot is overloaded"
+            )
+
+        waiter = asyncio.get_event_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as error:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as we gave up; pass it on.
+                self._release()
+            else:
+                waiter.cancel()
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+            if isinstance(error, asyncio.CancelledError):
+                raise
+            self.rejected_overload += 1
+            raise Overloaded(
+                HTTPStatus.SERVICE_UNAVAILABLE, self.retry_after, "Timed out waiting for a turn slot"
+            )
+
+    def _release(self):
+        # Hand the slot straight to the oldest waiter, if any.
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._in_flight -= 1
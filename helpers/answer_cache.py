@@ -0,0 +1,87 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import re
+import time
+from collections import OrderedDict
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+# Marker returned by AnswerCache.get when nothing usable is cached. A cached
+# None is a legitimate value ("QnA Maker had no answer for this question").
+MISSING = object()
+
+
+def normalize_question(text: str) -> str:
+    """Map equivalent phrasings of a question ("Hi!", " hi ") to one key."""
+    if not text:
+        return ""
+    text = _PUNCTUATION.sub(" ", text.lower())
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+class AnswerCache:
+    """Bounded LRU cache with a per-entry time to live.
+
+    A max_size of 0 disables the cache: every lookup is a miss and nothing is
+    stored.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 300.0, clock=time.monotonic):
+        if max_size < 0:
+            raise ValueError("[AnswerCache]: max_size must not be negative")
+        if ttl <= 0:
+            raise ValueError("[AnswerCache]: ttl must be positive")
+
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, question: str):
+        key = normalize_question(question)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return MISSING
+
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            del self._entries[key]
+            self.misses += 1
+            return MISSING
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, question: str, value):
+        if self.max_size == 0:
+            return
+
+        key = normalize_question(question)
+        self._entries[key] = (self._clock() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
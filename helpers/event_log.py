@@ -0,0 +1,226 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import json
+import os
+import queue
+import sys
+import threading
+import time
+import traceback
+import weakref
+from datetime import datetime, timezone
+
+LEVELS = {"debug": 10, "info": 20, "warning": 30, "error": 40}
+
+# Put on the queue by close() to stop the writer.
+_STOP = object()
+
+
+class EventLog:
+    """Structured event log, written as JSON lines by a background thread.
+
+    ``log()`` only captures the record and puts it on a bounded queue, so it
+    never blocks the event loop; formatting (including tracebacks) and
+    writing happen on the writer thread, ``batch_size`` records per write.
+    Once the queue is half full, records below ``error`` level are sampled
+    (one in ``sample_every`` is kept); when it is full every record is
+    dropped. ``stats()`` counts both.
+
+    With a ``path`` the file is rotated when it would grow past
+    ``max_bytes``, keeping ``backup_count`` old files (``path.1`` is the
+    newest); without one records go to stderr.
+
+    A forked child (a prefork worker) starts with an empty queue and its
+    own writer thread, since threads do not survive the fork, and writes
+    to its own file, ``path`` with its pid inserted before the extension
+    (``events.1234.log``), so processes never rotate each other's file.
+    """
+
+    def __init__(
+        self,
+        path: str = "",
+        max_bytes: int = 10 * 1024 * 1024,
+        backup_count: int = 5,
+        queue_size: int = 10000,
+        batch_size: int = 256,
+        sample_every: int = 10,
+        level: str = "info",
+    ):
+        if queue_size <= 0:
+            raise ValueError("EventLog: queue_size must be positive")
+        self.path = path
+        # The file this process writes; path itself in the process that made the log.
+        self.file_path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.batch_size = batch_size
+        self.sample_every = max(1, sample_every)
+        self.level = LEVELS[level]
+        self._queue_size = queue_size
+        self._high_water = queue_size // 2
+        self._reset()
+
+        reference = weakref.ref(self)
+        os.register_at_fork(
+            after_in_child=lambda: reference() is not None and reference()._after_fork()
+        )
+
+    def _after_fork(self):
+        if self.path:
+            root, extension = os.path.splitext(self.path)
+            self.file_path = f"{root}.{os.getpid()}{extension}"
+        self._reset()
+
+    def _reset(self):
+        self._queue = queue.Queue(maxsize=self._queue_size)
+        self._sampled = 0
+        self._stream = None
+        self._size = 0
+        self._thread = None
+        self._lock = threading.Lock()
+
+        self.written = 0
+        self.dropped = 0
+        self.sampled_out = 0
+        self.write_errors = 0
+        self.rotations = 0
+
+    def log(self, event: str, level: str = "info", error: BaseException = None, **fields) -> bool:
+        """Queue one record; False if it was dropped or filtered out."""
+        severity = LEVELS[level]
+        if severity < self.level:
+            return False
+        if severity < LEVELS["error"] and self._queue.qsize() >= self._high_water:
+            self._sampled += 1
+            if self._sampled % self.sample_every:
+                self.sampled_out += 1
+                return False
+
+        self._start()
+        try:
+            self._queue.put_nowait((time.time(), level, event, error, fields))
+        except queue.Full:
+            self.dropped += 1
+            return False
+        return True
+
+    def error(self, event: str, error: BaseException = None, **fields) -> bool:
+        return self.log(event, "error", error, **fields)
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "sampled_out": self.sampled_out,
+            "write_errors": self.write_errors,
+            "rotations": self.rotations,
+        }
+
+    def close(self, timeout: float = 5.0):
+        """Write what is queued and stop the writer thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        # Blocks only if the queue is full, which the writer is draining.
+        self._queue.put(_STOP)
+        thread.join(timeout)
+
+    def _start(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="event-log", daemon=True
+                )
+                self._thread.start()
+
+    # The methods below only ever run on the writer thread.
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if _STOP in batch:
+                stopping = True
+                batch = [record for record in batch if record is not _STOP]
+
+            lines = []
+            for record in batch:
+                try:
+                    lines.append(self._format(record))
+                except Exception:  # pylint: disable=broad-except
+                    # An unprintable field must not stop the writer.
+                    self.write_errors += 1
+            try:
+                self._write(lines)
+                self.written += len(lines)
+            except OSError:
+                self.write_errors += 1
+                self.dropped += len(lines)
+
+        if self._stream is not None:
+            self._stream.close()
+        self._stream = None
+
+    @staticmethod
+    def _format(record) -> str:
+        created, level, event, error, fields = record
+        entry = {
+            "time": datetime.fromtimestamp(created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": level,
+            "event": event,
+        }
+        entry.update(fields)
+        if error is not None:
+            entry["error"] = f"{type(error).__name__}: {error}"
+            entry["traceback"] = "".join(
+                traceback.format_exception(type(error), error, error.__traceback__)
+            )
+        return json.dumps(entry, default=str) + "\n"
+
+    def _write(self, lines):
+        if not self.path:
+            sys.stderr.write("".join(lines))
+            sys.stderr.flush()
+            return
+
+        if self._stream is None:
+            self._open()
+        chunk = []
+        for line in lines:
+            data = line.encode("utf-8")
+            if self.max_bytes > 0 and self._size and self._size + len(data) > self.max_bytes:
+                self._stream.write(b"".join(chunk))
+                chunk = []
+                self._rotate()
+            chunk.append(data)
+            self._size += len(data)
+        self._stream.write(b"".join(chunk))
+        self._stream.flush()
+
+    def _open(self):
+        self._stream = open(self.file_path, "ab")
+        self._size = self._stream.tell()
+
+    def _rotate(self):
+        self._stream.close()
+        self._stream = None
+        if self.backup_count > 0:
+            for index in range(self.backup_count - 1, 0, -1):
+                source = f"{self.file_path}.{index}"
+                if os.path.exists(source):
+                    os.replace(source, f"{self.file_path}.{index + 1}")
+            os.replace(self.file_path, f"{self.file_path}.1")
+        else:
+            os.remove(self.file_path)
+        self.rotations += 1
+        self._open()
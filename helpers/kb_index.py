@@ -0,0 +1,214 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import asyncio
+import csv
+import json
+import math
+import os
+import re
+from collections import Counter
+
+_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list:
+    return _TOKEN.findall(text.lower()) if text else []
+
+
+def read_kb_export(path: str) -> list:
+    """Read a QnA Maker knowledge base export as (questions, answer) pairs.
+
+    Both the portal's tab separated export (Question, Answer, ... columns,
+    one row per question) and the JSON download format ({"qnaDocuments":
+    [{"questions": [...], "answer": ...}]}) are accepted.
+    """
+    if path.lower().endswith(".json"):
+        with open(path, encoding="utf-8-sig") as file:
+            documents = json.load(file)
+        if isinstance(documents, dict):
+            documents = documents.get("qnaDocuments") or documents.get("qnaList") or []
+        return [
+            (document.get("questions") or [], document["answer"])
+            for document in documents
+            if document.get("answer")
+        ]
+
+    pairs = {}
+    with open(path, encoding="utf-8-sig", newline="") as file:
+        for row in csv.DictReader(file, delimiter="\t"):
+            question, answer = row.get("Question"), row.get("Answer")
+            if question and answer:
+                pairs.setdefault(answer, []).append(question)
+    return [(questions, answer) for answer, questions in pairs.items()]
+
+
+class _Snapshot:
+    # BM25 over every KB question. Immutable once built, so turns can read it
+    # while a reload builds the next one.
+
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self, pairs: list):
+        self.answers = []
+        postings = {}
+        lengths = []
+        for questions, answer in pairs:
+            for question in questions:
+                terms = Counter(tokenize(question))
+                if not terms:
+                    continue
+                document = len(lengths)
+                self.answers.append(answer)
+                lengths.append(sum(terms.values()))
+                for term, count in terms.items():
+                    postings.setdefault(term, []).append((document, count))
+
+        count = len(lengths)
+        self.average_length = sum(lengths) / count if count else 0.0
+        self.unseen_idf = math.log(1 + (count + 0.5) / 0.5)
+        self.idf = {
+            term: math.log(1 + (count - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in postings.items()
+        }
+        self.postings = {
+            term: [(document, self._weight(frequency, lengths[document])) for document, frequency in docs]
+            for term, docs in postings.items()
+        }
+        # A question's score against itself, used to turn raw scores into
+        # a 0..1 confidence.
+        self.self_scores = [0.0] * count
+        for term, docs in self.postings.items():
+            for document, weight in docs:
+                self.self_scores[document] += self.idf[term] * weight
+
+    def __len__(self):
+        return len(self.answers)
+
+    def _weight(self, frequency: int, length: int) -> float:
+        norm = 1 - self.B + self.B * length / self.average_length if self.average_length else 1.0
+        return frequency * (self.K1 + 1) / (frequency + self.K1 * norm)
+
+    def best(self, question: str):
+        terms = Counter(tokenize(question))
+        if not terms or not self.answers:
+            return 0.0, None
+
+        scores = {}
+        query_self_score = 0.0
+        length = sum(terms.values())
+        for term, frequency in terms.items():
+            idf = self.idf.get(term, self.unseen_idf)
+            query_self_score += idf * self._weight(frequency, length)
+            for document, weight in self.postings.get(term, ()):
+                scores[document] = scores.get(document, 0.0) + idf * weight
+
+        if not scores:
+            return 0.0, None
+        document = max(scores, key=scores.get)
+        confidence = scores[document] / math.sqrt(query_self_score * self.self_scores[document])
+        return min(confidence, 1.0), self.answers[document]
+
+
+def _build_snapshot(path: str) -> _Snapshot:
+    return _Snapshot(read_kb_export(path))
+
+
+class KnowledgeBaseIndex:
+    """In-process BM25 index over a QnA Maker knowledge base export.
+
+    ``answer`` returns the best local answer when its confidence (1.0 for an
+    exact question match) is at least ``min_score``, and None otherwise so
+    the caller can ask the remote service. ``watch`` polls the file and
+    rebuilds the index in a worker thread; turns keep using the previous
+    index until the new one is swapped in.
+    """
+
+    def __init__(self, path: str, min_score: float = 0.7, reload_interval: float = 5.0):
+        if not 0 < min_score <= 1:
+            raise ValueError("[KnowledgeBaseIndex]: min_score must be in (0, 1]")
+
+        self.path = path
+        self.min_score = min_score
+        self.reload_interval = reload_interval
+        self._snapshot = _Snapshot([])
+        self._mtime = None
+        self._watcher = None
+
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self.reload_errors = 0
+
+    def __len__(self):
+        return len(self._snapshot)
+
+    def load(self):
+        """Build the index synchronously; errors propagate."""
+        mtime = os.stat(self.path).st_mtime
+        self._snapshot = _build_snapshot(self.path)
+        self._mtime = mtime
+        self.reloads += 1
+
+    def answer(self, question: str):
+        score, answer = self._snapshot.best(question)
+        if answer is None or score < self.min_score:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return answer
+
+    async def reload_if_changed(self) -> bool:
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            return False
+        if mtime == self._mtime:
+            return False
+
+        try:
+            snapshot = await asyncio.get_running_loop().run_in_executor(
+                None, _build_snapshot, self.path
+            )
+        except Exception:  # pylint: disable=broad-except
+            # Keep serving the last good index; retried on the next change.
+            self.reload_errors += 1
+            self._mtime = mtime
+            return False
+
+        self._snapshot = snapshot
+        self._mtime = mtime
+        self.reloads += 1
+        return True
+
+    def watch(self):
+        if self._watcher is None and self.reload_interval > 0:
+            self._watcher = asyncio.ensure_future(self._watch())
+
+    async def close(self):
+        if self._watcher is not None:
+            self._watcher.cancel()
+            try:
+                await self._watcher
+            except asyncio.CancelledError:
+                pass
+            self._watcher = None
+
+    def stats(self) -> dict:
+        return {
+            "questions": len(self._snapshot),
+            "hits": self.hits,
+            "misses": self.misses,
+            "reloads": self.reloads,
+            "reload_errors": self.reload_errors,
+        }
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            try:
+                await self.reload_if_changed()
+            except Exception:  # pylint: disable=broad-except
+                # Whatever went wrong, the next poll tries again.
+                self.reload_errors += 1
@@ -0,0 +1,154 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+from bisect import bisect_left
+from time import perf_counter
+from typing import Callable, Dict, Iterable
+
+# Upper bounds in seconds, from sub-millisecond cache hits to slow remote calls.
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+)
+
+# Set on exceptions raised inside a span to the phase they were raised in.
+PHASE_ATTRIBUTE = "_bot_phase"
+
+
+def phase_of(error: BaseException) -> str:
+    """The innermost timed phase ``error`` escaped from, or "" if unknown."""
+    return getattr(error, PHASE_ATTRIBUTE, "")
+
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds=DEFAULT_BUCKETS):
+        self.bounds = tuple(bounds)
+        # One slot per bound plus the +Inf bucket; counts are not cumulative.
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class _Span:
+    __slots__ = ("_metrics", "_phase", "_started")
+
+    def __init__(self, metrics: "PhaseMetrics", phase: str):
+        self._metrics = metrics
+        self._phase = phase
+        self._started = 0.0
+
+    def __enter__(self):
+        self._started = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._metrics.observe(self._phase, perf_counter() - self._started)
+        if exc_value is not None and not hasattr(exc_value, PHASE_ATTRIBUTE):
+            # Innermost span wins; error handlers read it with phase_of().
+            try:
+                setattr(exc_value, PHASE_ATTRIBUTE, self._phase)
+            except AttributeError:
+                pass
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class PhaseMetrics:
+    """Latency histograms per turn phase, rendered in Prometheus text format.
+
+    ``with METRICS.span("qna"): ...`` times a block. When disabled, span()
+    returns a shared no-op context manager, so instrumented code pays one
+    attribute check per span.
+
+    Collectors are callables returning ``{metric_name: value}``. Their values
+    are exported as gauges (cache sizes, queue lengths), except the names
+    listed as ``counters`` when the collector is added: running totals such
+    as hits or rejections, exported as Prometheus counters with a ``_total``
+    suffix so ``rate()`` and reset detection work.
+    """
+
+    def __init__(self, enabled: bool = True, buckets=DEFAULT_BUCKETS, prefix: str = "bot"):
+        self.enabled = enabled
+        self.buckets = tuple(buckets)
+        self.prefix = prefix
+        self._histograms: Dict[str, Histogram] = {}
+        self._collectors = []
+
+    def span(self, phase: str):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, phase)
+
+    def observe(self, phase: str, seconds: float):
+        if not self.enabled:
+            return
+        histogram = self._histograms.get(phase)
+        if histogram is None:
+            histogram = self._histograms[phase] = Histogram(self.buckets)
+        histogram.observe(seconds)
+
+    def add_collector(
+        self, collector: Callable[[], Dict[str, float]], counters: Iterable[str] = ()
+    ):
+        self._collectors.append((collector, frozenset(counters)))
+
+    def add_stats(
+        self, name: str, stats: Callable[[], Dict[str, float]], counters: Iterable[str] = ()
+    ):
+        """Export a component's ``stats()`` as ``{prefix}_{name}_{key}``."""
+        self.add_collector(
+            lambda: {f"{name}_{key}": value for key, value in stats().items()},
+            counters=(f"{name}_{key}" for key in counters),
+        )
+
+    def reset(self):
+        self._histograms.clear()
+
+    def render(self) -> str:
+        name = f"{self.prefix}_phase_seconds"
+        lines = [
+            f"# HELP {name} Time spent in each phase of a turn.",
+            f"# TYPE {name} histogram",
+        ]
+        for phase in sorted(self._histograms):
+            histogram = self._histograms[phase]
+            cumulative = 0
+            for bound, count in zip(histogram.bounds, histogram.counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{{phase="{phase}",le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{phase="{phase}",le="+Inf"}} {histogram.count}')
+            lines.append(f'{name}_sum{{phase="{phase}"}} {histogram.sum:.6f}')
+            lines.append(f'{name}_count{{phase="{phase}"}} {histogram.count}')
+
+        for collector, counters in self._collectors:
+            for metric, value in sorted(collector().items()):
+                if metric in counters:
+                    metric = f"{self.prefix}_{metric}_total"
+                    lines.append(f"# TYPE {metric} counter")
+                else:
+                    metric = f"{self.prefix}_{metric}"
+                    lines.append(f"# TYPE {metric} gauge")
+                lines.append(f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+
+# Shared by app.py, the bot and the middleware; app.py sets ``enabled``.
+METRICS = PhaseMetrics()
@@ -0,0 +1,236 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import asyncio
+import multiprocessing
+import os
+import signal
+import socket
+import time
+from typing import Callable
+
+from aiohttp import web
+
+from .event_log import EventLog
+
+# Set in each worker so request handlers can report which worker answered.
+WORKER_INDEX_ENV = "BOT_WORKER_INDEX"
+
+
+class PreforkServer:
+    """Pre-fork master that runs an aiohttp app in several worker processes.
+
+    The master binds the listening socket once and forks ``workers``
+    children that all accept on it, so the kernel spreads connections across
+    them. The app object is built in the master before forking (like
+    gunicorn's ``--preload``); nothing in it may have started threads or
+    connections at that point.
+
+    The master then supervises:
+
+    * a worker that exits is replaced (with a short back-off if it keeps
+      crashing),
+    * a worker whose heartbeat is older than ``heartbeat_timeout`` is killed
+      and replaced, which catches a wedged event loop,
+    * SIGHUP starts a fresh set of workers and then asks the old ones to
+      finish their in-flight requests and exit (graceful restart); the old
+      ones drain while supervision goes on, and each generation beats in
+      its own heartbeat slots so a draining worker cannot hide a hung one,
+    * SIGINT/SIGTERM stop all workers gracefully and exit.
+
+    The master reports worker exits and restarts to ``event_log``.
+
+    Because workers are forked from the master, a restart recycles processes
+    but does not load new code; restart the master to deploy.
+    """
+
+    def __init__(
+        self,
+        app_factory: Callable[[], web.Application],
+        workers: int,
+        host: str = "localhost",
+        port: int = 3978,
+        heartbeat_interval: float = 1.0,
+        heartbeat_timeout: float = 30.0,
+        graceful_timeout: float = 30.0,
+        event_log: EventLog = None,
+    ):
+        if workers < 1:
+            raise ValueError("PreforkServer: workers must be at least 1")
+        self.app_factory = app_factory
+        self.workers = workers
+        self.host = host
+        self.port = port
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_timeout = heartbeat_timeout
+        self.graceful_timeout = graceful_timeout
+        self.event_log = event_log or EventLog()
+
+        self._context = multiprocessing.get_context("fork")
+        # Two slots per worker; consecutive generations alternate between them.
+        self._heartbeats = self._context.Array("d", 2 * workers, lock=False)
+        self._generation = 0
+        self._processes = [None] * workers
+        self._crashes = [0] * workers
+        # Old workers finishing their requests after a restart: (process, generation, deadline).
+        self._draining = []
+        self._socket = None
+        self._restart_requested = False
+        self._stopping = False
+
+    def run(self):
+        self._socket = socket.create_server(
+            (self.host, self.port), reuse_port=False, backlog=1024
+        )
+        self._socket.set_inheritable(True)
+        signal.signal(signal.SIGHUP, self._on_sighup)
+        signal.signal(signal.SIGTERM, self._on_stop)
+        signal.signal(signal.SIGINT, self._on_stop)
+
+        self.event_log.log(
+            "prefork_started",
+            pid=os.getpid(),
+            url=f"http://{self.host}:{self.port}",
+            workers=self.workers,
+        )
+        for index in range(self.workers):
+            self._spawn(index)
+
+        try:
+            while not self._stopping:
+                if self._restart_requested:
+                    self._restart_requested = False
+                    self._restart()
+                self._supervise()
+                self._reap_draining()
+                time.sleep(self.heartbeat_interval)
+        finally:
+            self._stop_all(list(self._processes) + [process for process, _, _ in self._draining])
+            self._draining = []
+            self._socket.close()
+
+    def _slot(self, index: int, generation: int = None) -> int:
+        generation = self._generation if generation is None else generation
+        return (generation % 2) * self.workers + index
+
+    def _spawn(self, index: int):
+        slot = self._slot(index)
+        self._heartbeats[slot] = time.time()
+        process = self._context.Process(
+            target=self._serve, args=(index, slot), name=f"bot-worker-{index}", daemon=False
+        )
+        process.start()
+        self._processes[index] = process
+
+    def _supervise(self):
+        now = time.time()
+        for index, process in enumerate(self._processes):
+            if process is None:
+                continue
+            if not process.is_alive():
+                process.join()
+                self._crashes[index] += 1
+                self.event_log.log(
+                    "worker_exited",
+                    "warning",
+                    worker=index,
+                    pid=process.pid,
+                    exitcode=process.exitcode,
+                )
+                # Back off a little when a worker keeps dying at startup.
+                time.sleep(min(5.0, 0.1 * 2 ** min(self._crashes[index], 6)))
+                self._spawn(index)
+            elif now - self._heartbeats[self._slot(index)] > self.heartbeat_timeout:
+                self.event_log.log("worker_hung", "warning", worker=index, pid=process.pid)
+                process.kill()
+            else:
+                self._crashes[index] = 0
+
+    def _restart(self):
+        self._generation += 1
+        # Workers two generations back still beat in the slots the new ones
+        # take over; they have had their chance to drain.
+        for process, generation, _ in self._draining:
+            if generation % 2 == self._generation % 2 and process.is_alive():
+                process.kill()
+        self._reap_draining()
+
+        old = [process for process in self._processes if process is not None]
+        for index in range(self.workers):
+            self._spawn(index)
+        # The new workers accept on the shared socket right away, so the old
+        # ones can drain and exit while supervision carries on.
+        deadline = time.time() + self.graceful_timeout
+        for process in old:
+            if process.is_alive():
+                process.terminate()
+            self._draining.append((process, self._generation - 1, deadline))
+        self.event_log.log("workers_restarted", generation=self._generation, draining=len(old))
+
+    def _reap_draining(self):
+        now = time.time()
+        remaining = []
+        for process, generation, deadline in self._draining:
+            if process.is_alive() and now > deadline:
+                self.event_log.log("worker_drain_timeout", "warning", pid=process.pid)
+                process.kill()
+            if process.is_alive():
+                remaining.append((process, generation, deadline))
+            else:
+                process.join()
+        self._draining = remaining
+
+    def _stop_all(self, processes):
+        for process in processes:
+            if process is not None and process.is_alive():
+                process.terminate()
+        deadline = time.time() + self.graceful_timeout
+        for process in processes:
+            if process is None:
+                continue
+            process.join(max(0.0, deadline - time.time()))
+            if process.is_alive():
+                process.kill()
+                process.join()
+
+    def _on_sighup(self, signum, frame):
+        self._restart_requested = True
+
+    def _on_stop(self, signum, frame):
+        self._stopping = True
+
+    def _serve(self, index: int, slot: int):
+        # Runs in the worker. Drop the master's signal handlers; aiohttp
+        # installs its own SIGINT/SIGTERM handling for a graceful shutdown.
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        os.environ[WORKER_INDEX_ENV] = str(index)
+
+        app = self.app_factory()
+        heartbeats = self._heartbeats
+        interval = self.heartbeat_interval
+
+        tasks = []
+
+        async def heartbeat():
+            while True:
+                heartbeats[slot] = time.time()
+                await asyncio.sleep(interval)
+
+        async def start_heartbeat(app: web.Application):
+            tasks.append(asyncio.ensure_future(heartbeat()))
+
+        async def stop_heartbeat(app: web.Application):
+            for task in tasks:
+                task.cancel()
+
+        app.on_startup.append(start_heartbeat)
+        app.on_cleanup.append(stop_heartbeat)
+        web.run_app(
+            app,
+            sock=self._socket,
+            shutdown_timeout=self.graceful_timeout,
+            print=None,
+            access_log=None,
+        )
@@ -0,0 +1,139 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import asyncio
+import json
+
+import aiohttp
+
+from .answer_cache import normalize_question
+
+
+class QnAUnavailable(Exception):
+    """QnA Maker did not answer in time or failed; callers send a fallback."""
+
+
+class QnAClient:
+    """QnA Maker generateAnswer client shared by every turn.
+
+    Requests go through one keep-alive connection pool of at most
+    ``pool_size`` connections. Concurrent calls for the same normalized
+    question share a single HTTP request. Each call waits at most
+    ``timeout`` seconds and raises QnAUnavailable when the deadline passes or
+    the service fails, so a slow knowledge base cannot hold a turn open.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        knowledge_base_id: str,
+        endpoint_key: str,
+        timeout: float = 3.0,
+        pool_size: int = 32,
+        keepalive_timeout: float = 30.0,
+        score_threshold: float = 0.3,
+    ):
+        if timeout <= 0:
+            raise ValueError("[QnAClient]: timeout must be positive")
+
+        self.url = f"{host.rstrip('/')}/knowledgebases/{knowledge_base_id}/generateAnswer"
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.keepalive_timeout = keepalive_timeout
+        self.score_threshold = score_threshold
+        self._headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"EndpointKey {endpoint_key}",
+            "Ocp-Apim-Subscription-Key": f"EndpointKey {endpoint_key}",
+        }
+        self._session = None
+        self._in_flight = {}
+
+        self.requests = 0
+        self.coalesced = 0
+        self.timeouts = 0
+        self.failures = 0
+
+    async def get_answer(self, question: str):
+        """Return the best answer above the score threshold, or None."""
+        key = normalize_question(question)
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._query(question))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+        else:
+            self.coalesced += 1
+
+        try:
+            # Shielded so one caller giving up does not cancel the request
+            # other callers are waiting on.
+            return await asyncio.wait_for(asyncio.shield(task), self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise QnAUnavailable("QnA Maker did not answer in time")
+
+    async def close(self):
+        for task in list(self._in_flight.values()):
+            task.cancel()
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "coalesced": self.coalesced,
+            "timeouts": self.timeouts,
+            "failures": self.failures,
+            "in_flight": len(self._in_flight),
+        }
+
+    def _finished(self, key: str, task: asyncio.Future):
+        self._in_flight.pop(key, None)
+        # Mark the error as retrieved even when every caller already gave up.
+        if not task.cancelled():
+            task.exception()
+
+    async def _query(self, question: str):
+        if self._session is None:
+            # Created on first use so it binds to the serving event loop.
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.pool_size, keepalive_timeout=self.keepalive_timeout
+                ),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+
+        self.requests += 1
+        body = json.dumps({"question": question, "top": 1, "scoreThreshold": self.score_threshold})
+        try:
+            async with self._session.post(self.url, data=body, headers=self._headers) as response:
+                if response.status != 200:
+                    raise QnAUnavailable(f"QnA Maker returned status {response.status}")
+                result = await response.json()
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as error:
+            self.failures += 1
+            raise QnAUnavailable(f"QnA Maker request failed: {error}")
+        except QnAUnavailable:
+            self.failures += 1
+            raise
+
+        # A 200 with another shape is as useless as an error status.
+        answers = (result.get("answers") or []) if isinstance(result, dict) else None
+        if not isinstance(answers, list) or not all(
+            isinstance(answer, dict)
+            and isinstance(answer.get("score", 0), (int, float))
+            and isinstance(answer.get("answer"), str)
+            for answer in answers
+        ):
+            self.failures += 1
+            raise QnAUnavailable("QnA Maker returned an unexpected response")
+
+        # generateAnswer scores are percentages.
+        answers = [
+            answer for answer in answers if answer.get("score", 0) / 100 > self.score_threshold
+        ]
+        if not answers:
+            return None
+        return max(answers, key=lambda answer: answer.get("score", 0))["answer"]
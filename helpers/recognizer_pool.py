@@ -0,0 +1,136 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import asyncio
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date
+
+# recognizers_text.Culture.English. The recognizer packages take a few
+# hundred milliseconds to import, so they are only imported by the workers.
+ENGLISH = "en-us"
+
+
+# Worker functions live at module level so they can be pickled into a
+# process pool. They return the plain resolution dicts, not ModelResults.
+def _recognize_number(text: str, culture: str) -> list:
+    from recognizers_number import recognize_number
+
+    return [result.resolution for result in recognize_number(text, culture)]
+
+
+def _recognize_datetime(text: str, culture: str) -> list:
+    from recognizers_date_time import recognize_datetime
+
+    return [result.resolution for result in recognize_datetime(text, culture)]
+
+
+def _warm_up(culture: str = ENGLISH) -> int:
+    # The recognizers compile their regex models on first use (~1s for
+    # date/time), so run one query of each kind in every worker.
+    _recognize_number("twelve", culture)
+    _recognize_datetime("tomorrow at 5pm", culture)
+    return os.getpid()
+
+
+def _started() -> int:
+    # Submitted by warm_up(): the initializer has already done the work.
+    return os.getpid()
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().split()) if text else ""
+
+
+class RecognizerPool:
+    """Runs Recognizers-Text off the event loop and memoizes the results.
+
+    Cache misses are dispatched to a thread pool, or to a process pool when
+    ``use_processes`` is set (the recognizers are pure Python, so only
+    processes take the parsing off the GIL). The pool is created on first
+    use, so a pool built in a prefork master is not forked into the
+    workers. Concurrent lookups of the same input share one recognition.
+
+    Date/time results depend on the current day ("tomorrow"), so they are
+    cached per calendar day.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 2,
+        use_processes: bool = False,
+        cache_size: int = 4096,
+        culture: str = ENGLISH,
+    ):
+        self.max_workers = max_workers
+        self.use_processes = use_processes
+        self.cache_size = cache_size
+        self.culture = culture
+
+        self._executor = None
+        self._cache = OrderedDict()
+        self._inflight = {}
+        self.is_warm = False
+
+        self.hits = 0
+        self.misses = 0
+
+    async def warm_up(self):
+        # Submitting one task per worker makes the pool start all of them,
+        # and each one runs _warm_up as its initializer.
+        loop = asyncio.get_event_loop()
+        executor = self._get_executor()
+        await asyncio.gather(
+            *(loop.run_in_executor(executor, _started) for _ in range(self.max_workers))
+        )
+        self.is_warm = True
+
+    async def number(self, text: str) -> list:
+        return await self._recognize(_recognize_number, ("number", _normalize(text)), text)
+
+    async def datetime(self, text: str) -> list:
+        key = ("datetime", _normalize(text), date.today())
+        return await self._recognize(_recognize_datetime, key, text)
+
+    def close(self):
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def stats(self) -> dict:
+        return {"size": len(self._cache), "hits": self.hits, "misses": self.misses}
+
+    async def _recognize(self, func, key, text: str) -> list:
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return self._cache[key]
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.hits += 1
+            return await asyncio.shield(pending)
+
+        self.misses += 1
+        loop = asyncio.get_event_loop()
+        pending = loop.run_in_executor(self._get_executor(), func, text, self.culture)
+        self._inflight[key] = pending
+        try:
+            results = await asyncio.shield(pending)
+        finally:
+            self._inflight.pop(key, None)
+
+        if self.cache_size > 0:
+            self._cache[key] = results
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return results
+
+    def _get_executor(self):
+        if self._executor is None:
+            executor_type = ProcessPoolExecutor if self.use_processes else ThreadPoolExecutor
+            self._executor = executor_type(
+                max_workers=self.max_workers, initializer=_warm_up, initargs=(self.culture,)
+            )
+        return self._executor
@@ -0,0 +1,76 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+from copy import copy
+from typing import Callable, Dict, Tuple, Union
+
+from botbuilder.core import MessageFactory
+from botbuilder.schema import Activity, Attachment
+from msrest.serialization import Model
+
+
+class TemplateCache:
+    """Static reply activities built once and looked up by id and locale.
+
+    Templates are built when registered. Card attachments are stored already
+    serialized (plain dicts in wire format), so sending one skips building the
+    card objects and the msrest walk over them; TurnContext still copies the
+    activity before it is sent, so the cached template is never mutated.
+
+    ``get`` falls back from ``de-DE`` to ``de`` to the default locale.
+    """
+
+    def __init__(self, default_locale: str = "en-US"):
+        self.default_locale = default_locale.lower()
+        self._templates: Dict[Tuple[str, str], Activity] = {}
+
+    def register(
+        self,
+        template_id: str,
+        template: Union[str, Activity, Callable[[], Activity]],
+        locale: str = None,
+    ) -> Activity:
+        if callable(template):
+            template = template()
+        if isinstance(template, str):
+            template = MessageFactory.text(template)
+
+        activity = self._freeze(template)
+        self._templates[(template_id, (locale or self.default_locale).lower())] = activity
+        return activity
+
+    def get(self, template_id: str, locale: str = None) -> Activity:
+        if locale:
+            locale = locale.lower()
+            activity = self._templates.get((template_id, locale))
+            if activity is not None:
+                return activity
+            activity = self._templates.get((template_id, locale.split("-")[0]))
+            if activity is not None:
+                return activity
+        activity = self._templates.get((template_id, self.default_locale))
+        if activity is None:
+            raise KeyError(f"TemplateCache: no template '{template_id}'")
+        return activity
+
+    def __contains__(self, template_id: str) -> bool:
+        return any(key[0] == template_id for key in self._templates)
+
+    @staticmethod
+    def _freeze(activity: Activity) -> Activity:
+        if not activity.attachments:
+            return activity
+        frozen = copy(activity)
+        frozen.attachments = [
+            Attachment(
+                content_type=attachment.content_type,
+                content_url=attachment.content_url,
+                content=attachment.content.serialize()
+                if isinstance(attachment.content, Model)
+                else attachment.content,
+                name=attachment.name,
+                thumbnail_url=attachment.thumbnail_url,
+            )
+            for attachment in activity.attachments
+        ]
+        return frozen
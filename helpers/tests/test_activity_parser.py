@@ -0,0 +1,62 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import json
+
+import pytest
+from botbuilder.schema import Activity
+
+from helpers import ActivityTooLarge, LazyActivity, parse_activity
+
+MESSAGE = {
+    "type": "message",
+    "id": "1",
+    "channelId": "msteams",
+    "serviceUrl": "https://smba.trafficmanager.net/emea/",
+    "text": "hello",
+    "from": {"id": "user", "name": "Alex", "aadObjectId": "aad"},
+    "recipient": {"id": "bot"},
+    "conversation": {"id": "conversation", "isGroup": False, "tenantID": "tenant"},
+    "attachments": [{"contentType": "text/calendar", "name": "work.ics", "content": "x"}],
+    "timestamp": "2024-03-01T09:30:00Z",
+    "channelData": {"tenant": {"id": "tenant"}},
+    "entities": [{"type": "clientInfo", "locale": "en-US"}],
+}
+
+
+def test_messages_take_the_fast_path():
+    activity = parse_activity(json.dumps(MESSAGE).encode())
+    assert isinstance(activity, LazyActivity)
+    assert activity.text == "hello"
+    assert activity.from_property.aad_object_id == "aad"
+    assert activity.conversation.tenant_id == "tenant"
+    assert activity.attachments[0].name == "work.ics"
+
+
+def test_other_fields_are_deserialized_on_first_access():
+    activity = parse_activity(json.dumps(MESSAGE).encode())
+    assert "timestamp" not in activity.__dict__
+    assert activity.timestamp.year == 2024
+    assert activity.entities[0].type == "clientInfo"
+    assert activity.channel_data == {"tenant": {"id": "tenant"}}
+    assert activity.value is None
+    with pytest.raises(AttributeError):
+        activity.not_a_field  # pylint: disable=pointless-statement
+
+
+def test_fast_path_matches_the_msrest_deserializer():
+    fast = parse_activity(json.dumps(MESSAGE).encode())
+    full = Activity().deserialize(MESSAGE)
+    assert fast.serialize() == full.serialize()
+
+
+def test_other_types_take_the_full_deserializer():
+    body = json.dumps({"type": "invoke", "name": "adaptiveCard/action", "value": {"a": 1}})
+    activity = parse_activity(body.encode())
+    assert type(activity) is Activity
+    assert activity.value == {"a": 1}
+
+
+def test_large_bodies_are_rejected():
+    with pytest.raises(ActivityTooLarge):
+        parse_activity(b"{}" * 100, max_bytes=10)
@@ -0,0 +1,108 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import asyncio
+from http import HTTPStatus
+
+import pytest
+
+from helpers import AdmissionController, Overloaded
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+async def hold(controller, conversation_id, release, log=None):
+    async with controller.admit(conversation_id):
+        if log is not None:
+            log.append(conversation_id)
+        await release.wait()
+
+
+def test_turns_of_one_conversation_run_in_order():
+    async def scenario():
+        controller = AdmissionController()
+        order = []
+
+        async def turn(number):
+            async with controller.admit("conversation"):
+                order.append(("start", number))
+                await asyncio.sleep(0.01)
+                order.append(("end", number))
+
+        await asyncio.gather(*(turn(number) for number in range(3)))
+        return order, controller.stats()
+
+    order, stats = run(scenario())
+    assert order == [("start", 0), ("end", 0), ("start", 1), ("end", 1), ("start", 2), ("end", 2)]
+    assert stats["admitted"] == 3
+    assert stats["conversations"] == 0
+
+
+def test_too_many_turns_for_one_conversation_are_rejected():
+    async def scenario():
+        controller = AdmissionController(max_per_conversation=2)
+        release = asyncio.Event()
+        held = [asyncio.ensure_future(hold(controller, "busy", release)) for _ in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded) as error:
+            async with controller.admit("busy"):
+                pass
+        # Other conversations are not affected.
+        async with controller.admit("other"):
+            pass
+        release.set()
+        await asyncio.gather(*held)
+        return error.value, controller.stats()
+
+    error, stats = run(scenario())
+    assert error.status == HTTPStatus.TOO_MANY_REQUESTS
+    assert stats["rejected_conversation"] == 1
+
+
+def test_turns_beyond_the_waiting_queue_are_shed():
+    async def scenario():
+        controller = AdmissionController(max_in_flight=1, max_waiting=1, retry_after=7)
+        release = asyncio.Event()
+        log = []
+        held = [
+            asyncio.ensure_future(hold(controller, name, release, log)) for name in ("a", "b")
+        ]
+        await asyncio.sleep(0)
+        assert controller.stats()["waiting"] == 1
+        with pytest.raises(Overloaded) as error:
+            async with controller.admit("c"):
+                pass
+        release.set()
+        await asyncio.gather(*held)
+        return error.value, log, controller.stats()
+
+    error, log, stats = run(scenario())
+    assert error.status == HTTPStatus.SERVICE_UNAVAILABLE
+    assert error.retry_after == 7
+    # The waiting turn was handed the slot when the first one finished.
+    assert log == ["a", "b"]
+    assert stats["in_flight"] == 0
+    assert stats["rejected_overload"] == 1
+
+
+def test_waiting_turns_time_out():
+    async def scenario():
+        controller = AdmissionController(max_in_flight=1, queue_timeout=0.01)
+        release = asyncio.Event()
+        held = asyncio.ensure_future(hold(controller, "a", release))
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded):
+            async with controller.admit("b"):
+                pass
+        release.set()
+        await held
+        # The slot is free again once the holder finished.
+        async with controller.admit("b"):
+            pass
+        return controller.stats()
+
+    stats = run(scenario())
+    assert stats["waiting"] == 0
+    assert stats["in_flight"] == 0
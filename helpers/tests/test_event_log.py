@@ -0,0 +1,85 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import json
+import os
+
+from helpers import EventLog
+
+
+def read_events(path) -> list:
+    with open(path, encoding="utf-8") as file:
+        return [json.loads(line) for line in file]
+
+
+def test_records_are_written_as_json_lines(tmp_path):
+    path = str(tmp_path / "events.log")
+    log = EventLog(path, level="info")
+    assert log.log("turn", conversation_id="c1")
+    assert not log.log("noise", "debug")
+    try:
+        raise ValueError("boom")
+    except ValueError as error:
+        log.error("turn_failed", error)
+    log.close()
+
+    first, second = read_events(path)
+    assert (first["event"], first["level"], first["conversation_id"]) == ("turn", "info", "c1")
+    assert second["error"] == "ValueError: boom"
+    assert "raise ValueError" in second["traceback"]
+    assert log.stats()["written"] == 2
+
+
+def test_files_are_rotated(tmp_path):
+    path = str(tmp_path / "events.log")
+    log = EventLog(path, max_bytes=300, backup_count=2)
+    for index in range(20):
+        log.log("tick", index=index, padding="x" * 50)
+    log.close()
+
+    assert log.rotations > 2
+    assert sorted(os.listdir(tmp_path)) == ["events.log", "events.log.1", "events.log.2"]
+    for name in os.listdir(tmp_path):
+        assert os.path.getsize(tmp_path / name) <= 300
+    # The newest records are in the current file.
+    assert read_events(path)[-1]["index"] == 19
+
+
+def test_backlog_is_sampled_then_dropped_but_errors_are_kept():
+    log = EventLog(queue_size=10, sample_every=2)
+    # No writer thread, so the queue only fills.
+    log._start = lambda: None
+    accepted = [log.log("tick") for _ in range(20)]
+    assert accepted[:5] == [True] * 5
+    assert log.stats()["sampled_out"] > 0
+    assert log.stats()["dropped"] > 0
+    assert log.stats()["queued"] == 10
+
+    # Errors skip sampling, but a full queue has no room for them either.
+    log.error("failed")
+    assert log.stats()["dropped"] >= 2
+
+
+def test_forked_children_write_their_own_file(tmp_path):
+    path = str(tmp_path / "events.log")
+    log = EventLog(path)
+    log.log("parent")
+
+    pid = os.fork()
+    if pid == 0:
+        # The child: nothing queued in the parent is written twice.
+        code = 1
+        try:
+            log.log("child")
+            log.close()
+            code = 0 if log.stats()["written"] == 1 else 1
+        finally:
+            os._exit(code)
+
+    _, status = os.waitpid(pid, 0)
+    log.close()
+    assert os.waitstatus_to_exitcode(status) == 0
+    assert log.file_path == path
+    assert [event["event"] for event in read_events(path)] == ["parent"]
+    child_path = tmp_path / f"events.{pid}.log"
+    assert [event["event"] for event in read_events(child_path)] == ["child"]
@@ -0,0 +1,95 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import asyncio
+import json
+import os
+
+import pytest
+
+from helpers import KnowledgeBaseIndex, read_kb_export
+
+TSV = (
+    "Question\tAnswer\tSource\n"
+    "What are your opening hours?\tWe are open 9 to 5.\tEditorial\n"
+    "When are you open?\tWe are open 9 to 5.\tEditorial\n"
+    "How do I reset my password?\tUse the reset link on the sign-in page.\tEditorial\n"
+    "Where is the office?\tAt 1 Main Street.\tEditorial\n"
+)
+
+
+@pytest.fixture
+def kb_path(tmp_path):
+    path = tmp_path / "kb.tsv"
+    path.write_text(TSV, encoding="utf-8")
+    return str(path)
+
+
+def test_reads_tsv_and_json_exports(tmp_path, kb_path):
+    assert read_kb_export(kb_path)[0] == (
+        ["What are your opening hours?", "When are you open?"],
+        "We are open 9 to 5.",
+    )
+
+    json_path = tmp_path / "kb.json"
+    json_path.write_text(
+        json.dumps(
+            {
+                "qnaDocuments": [
+                    {"questions": ["Hi"], "answer": "Hello!"},
+                    {"questions": ["Empty"], "answer": ""},
+                ]
+            }
+        ),
+        encoding="utf-8",
+    )
+    assert read_kb_export(str(json_path)) == [(["Hi"], "Hello!")]
+
+
+def test_exact_questions_match_with_full_confidence(kb_path):
+    index = KnowledgeBaseIndex(kb_path, min_score=1.0)
+    index.load()
+    assert len(index) == 4
+    assert index.answer("where is the OFFICE") == "At 1 Main Street."
+
+
+def test_ranks_the_closest_question_first(kb_path):
+    index = KnowledgeBaseIndex(kb_path, min_score=0.3)
+    index.load()
+    assert index.answer("reset password") == "Use the reset link on the sign-in page."
+    assert index.answer("opening hours please") == "We are open 9 to 5."
+
+
+def test_weak_matches_are_left_to_the_service(kb_path):
+    index = KnowledgeBaseIndex(kb_path, min_score=0.7)
+    index.load()
+    assert index.answer("is the weather nice where you are") is None
+    assert index.answer("") is None
+    assert index.stats()["misses"] == 2
+
+
+def test_min_score_must_be_a_confidence():
+    with pytest.raises(ValueError):
+        KnowledgeBaseIndex("kb.tsv", min_score=0)
+
+
+def test_reload_keeps_the_last_good_index(kb_path):
+    index = KnowledgeBaseIndex(kb_path, min_score=1.0)
+    index.load()
+    mtime = os.stat(kb_path).st_mtime
+
+    # An export that cannot be read does not replace the index.
+    os.remove(kb_path)
+    os.mkdir(kb_path)
+    os.utime(kb_path, (mtime + 10, mtime + 10))
+    assert not asyncio.run(index.reload_if_changed())
+    assert index.stats()["reload_errors"] == 1
+    assert index.answer("Where is the office?") == "At 1 Main Street."
+
+    os.rmdir(kb_path)
+    with open(kb_path, "w", encoding="utf-8") as file:
+        file.write("Question\tAnswer\nWhere is the office?\tWe moved to 2 Main Street.\n")
+    os.utime(kb_path, (mtime + 20, mtime + 20))
+    assert asyncio.run(index.reload_if_changed())
+    assert index.answer("Where is the office?") == "We moved to 2 Main Street."
+    assert len(index) == 1
@@ -0,0 +1,99 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import time
+
+import pytest
+
+from helpers import PreforkServer
+
+
+class RecordingLog:
+    def __init__(self):
+        self.events = []
+
+    def log(self, event, level="info", error=None, **fields):
+        self.events.append(event)
+        return True
+
+
+class FakeProcess:
+    def __init__(self, pid: int, alive: bool = True):
+        self.pid = pid
+        self.alive = alive
+        self.killed = False
+        self.terminated = False
+        self.joined = False
+
+    def is_alive(self):
+        return self.alive
+
+    def kill(self):
+        self.killed = True
+        self.alive = False
+
+    def terminate(self):
+        # Asked to drain; the process lives on until its requests finish.
+        self.terminated = True
+
+    def join(self, timeout=None):
+        self.joined = True
+
+
+def server(**options) -> PreforkServer:
+    return PreforkServer(lambda: None, workers=3, event_log=RecordingLog(), **options)
+
+
+def test_workers_are_required():
+    with pytest.raises(ValueError):
+        PreforkServer(lambda: None, workers=0)
+
+
+def test_generations_alternate_heartbeat_slots():
+    prefork = server()
+    assert [prefork._slot(index) for index in range(3)] == [0, 1, 2]
+    prefork._generation = 1
+    assert [prefork._slot(index) for index in range(3)] == [3, 4, 5]
+    assert prefork._slot(2, generation=2) == 2
+
+
+def test_reap_draining_kills_workers_past_their_deadline():
+    prefork = server()
+    finished = FakeProcess(1, alive=False)
+    draining = FakeProcess(2)
+    overdue = FakeProcess(3)
+    now = time.time()
+    prefork._draining = [(finished, 0, now + 60), (draining, 0, now + 60), (overdue, 0, now - 1)]
+
+    prefork._reap_draining()
+
+    assert prefork._draining == [(draining, 0, now + 60)]
+    assert finished.joined and overdue.killed and overdue.joined
+    assert not draining.killed
+    assert prefork.event_log.events == ["worker_drain_timeout"]
+
+
+def test_restart_drains_old_workers_without_waiting(monkeypatch):
+    prefork = server()
+
+    def spawn(index):
+        prefork._processes[index] = FakeProcess(10 + index)
+
+    monkeypatch.setattr(prefork, "_spawn", spawn)
+    old = [FakeProcess(index) for index in range(3)]
+    prefork._processes = list(old)
+    # Still draining from two restarts ago: it would share the new slots.
+    stale = FakeProcess(99)
+    prefork._draining = [(stale, 0, time.time() + 60)]
+    prefork._generation = 1
+
+    prefork._restart()
+
+    assert prefork._generation == 2
+    assert stale.killed
+    assert [process.pid for process in prefork._processes] == [10, 11, 12]
+    assert all(process.terminated for process in old)
+    assert [(process, generation) for process, generation, _ in prefork._draining] == [
+        (process, 1) for process in old
+    ]
+    assert prefork.event_log.events[-1] == "workers_restarted"
@@ -0,0 +1,109 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import asyncio
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from helpers import QnAClient, QnAUnavailable
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+async def ask(respond, questions, timeout=1.0):
+    """Serve generateAnswer with ``respond`` and ask each question concurrently."""
+    received = []
+
+    async def handler(request):
+        received.append(await request.json())
+        return await respond(request)
+
+    app = web.Application()
+    app.router.add_post("/qnamaker/knowledgebases/kb/generateAnswer", handler)
+    async with TestServer(app, host="127.0.0.1") as server:
+        client = QnAClient(str(server.make_url("/qnamaker")), "kb", "key", timeout=timeout)
+        try:
+            results = await asyncio.gather(
+                *(client.get_answer(question) for question in questions), return_exceptions=True
+            )
+        finally:
+            await client.close()
+    return results, received, client.stats()
+
+
+def answers(*pairs):
+    async def respond(request):
+        return web.json_response(
+            {"answers": [{"answer": answer, "score": score} for answer, score in pairs]}
+        )
+
+    return respond
+
+
+def test_returns_the_best_answer_above_the_threshold():
+    results, received, _ = run(ask(answers(("low", 10), ("best", 90), ("good", 60)), ["hi"]))
+    assert results == ["best"]
+    assert received == [{"question": "hi", "top": 1, "scoreThreshold": 0.3}]
+
+
+def test_no_answer_above_the_threshold_is_none():
+    results, _, _ = run(ask(answers(("low", 10)), ["hi"]))
+    assert results == [None]
+
+
+def test_concurrent_questions_share_one_request():
+    async def respond(request):
+        await asyncio.sleep(0.05)
+        return await answers(("hello", 90))(request)
+
+    results, received, stats = run(ask(respond, ["Hello there", "hello  THERE", "bye"]))
+    assert results == ["hello", "hello", "hello"]
+    assert len(received) == 2
+    assert stats["coalesced"] == 1
+
+
+def test_slow_answers_time_out():
+    async def respond(request):
+        await asyncio.sleep(1)
+        return await answers(("late", 90))(request)
+
+    results, _, stats = run(ask(respond, ["hi"], timeout=0.05))
+    assert isinstance(results[0], QnAUnavailable)
+    assert stats["timeouts"] == 1
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        None,
+        [],
+        "answers",
+        {"answers": "none"},
+        {"answers": [{"answer": None, "score": 90}]},
+        {"answers": [{"answer": "hi", "score": "high"}]},
+    ],
+)
+def test_malformed_bodies_are_unavailable(body):
+    async def respond(request):
+        return web.json_response(body)
+
+    results, _, stats = run(ask(respond, ["hi"]))
+    assert isinstance(results[0], QnAUnavailable)
+    assert stats["failures"] == 1
+
+
+def test_error_statuses_and_invalid_json_are_unavailable():
+    async def error(request):
+        return web.Response(status=500)
+
+    async def garbage(request):
+        return web.Response(text="not json", content_type="application/json")
+
+    for respond in (error, garbage):
+        results, _, stats = run(ask(respond, ["hi"]))
+        assert isinstance(results[0], QnAUnavailable)
+        assert stats["failures"] == 1
@@ -0,0 +1,95 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import asyncio
+import threading
+
+import pytest
+
+from helpers import RecognizerPool
+from helpers import recognizer_pool
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+class Calls(list):
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+        self.release.set()
+
+    def recognize(self, text, culture):
+        self.release.wait(5)
+        self.append(text)
+        return [{"value": text}]
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    # Counts recognitions and skips the slow recognizer imports.
+    seen = Calls()
+    monkeypatch.setattr(recognizer_pool, "_recognize_number", seen.recognize)
+    monkeypatch.setattr(recognizer_pool, "_warm_up", lambda culture: 0)
+    return seen
+
+
+def test_executor_is_created_on_first_use(calls):
+    pool = RecognizerPool()
+    assert pool._executor is None
+    assert run(pool.number("12")) == [{"value": "12"}]
+    assert pool._executor is not None
+    pool.close()
+    assert pool._executor is None
+
+
+def test_results_are_memoized_by_normalized_text(calls):
+    pool = RecognizerPool()
+    run(pool.number("Twelve"))
+    run(pool.number("  twelve "))
+    pool.close()
+    assert calls == ["Twelve"]
+    assert pool.stats() == {"size": 1, "hits": 1, "misses": 1}
+
+
+def test_concurrent_lookups_share_one_recognition(calls):
+    pool = RecognizerPool()
+    calls.release.clear()
+
+    async def lookups():
+        pending = [asyncio.ensure_future(pool.number("twelve")) for _ in range(5)]
+        await asyncio.sleep(0.05)
+        calls.release.set()
+        return await asyncio.gather(*pending)
+
+    assert run(lookups()) == [[{"value": "twelve"}]] * 5
+    pool.close()
+    assert calls == ["twelve"]
+
+
+def test_cache_is_bounded(calls):
+    pool = RecognizerPool(cache_size=2)
+
+    async def lookups():
+        for text in ("one", "two", "three", "one"):
+            await pool.number(text)
+
+    run(lookups())
+    pool.close()
+    assert calls == ["one", "two", "three", "one"]
+    assert pool.stats()["size"] == 2
+
+
+def test_warm_up_starts_the_workers(calls):
+    pool = RecognizerPool(max_workers=2)
+    run(pool.warm_up())
+    pool.close()
+    assert pool.is_warm
+
+
+def test_recognizes_with_the_real_models():
+    pool = RecognizerPool(max_workers=1)
+    resolutions = run(pool.number("a dozen"))
+    pool.close()
+    assert resolutions[0]["value"] == "12"
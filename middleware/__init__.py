@@ -0,0 +1,7 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+from .outbound_batching import OutboundBatchingMiddleware
+from .transcript_recorder import TranscriptRecorderMiddleware
+
+__all__ = ["OutboundBatchingMiddleware", "TranscriptRecorderMiddleware"]
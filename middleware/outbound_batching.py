@@ -0,0 +1,193 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import itertools
+from copy import copy
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+from botbuilder.core import Middleware, TurnContext
+from botbuilder.schema import Activity, ActivityTypes, InputHints, ResourceResponse
+
+from helpers import METRICS, EventLog
+
+# Activities that must reach the user when they are sent, not at the end of
+# the turn. Anything buffered before one of these is flushed first so the
+# order the bot produced is kept.
+UNBUFFERED_TYPES = (ActivityTypes.typing, ActivityTypes.invoke_response, "delay")
+
+# Buffered sends are answered with ids carrying this prefix until flushed.
+PENDING_ID_PREFIX = "pending-"
+
+
+class OutboundBatchingMiddleware(Middleware):
+    """Collects every activity a turn sends and delivers them in one flush.
+
+    While the turn runs, ``send_activity``/``send_activities`` only append to
+    a turn-scoped buffer; the buffer is sent through a single
+    ``send_activities`` call after the bot's logic returns (or raises; a
+    failed flush is then logged to ``event_log`` and the turn's own error
+    is the one raised).
+
+    A buffered send returns a ResourceResponse with a placeholder id; the
+    flush replaces it with the id the channel assigned. Updating or deleting
+    an activity by its placeholder flushes the buffer first and then uses
+    the real id.
+
+    The Bot Connector still takes one request per activity, so with
+    ``merge_text`` consecutive plain text messages are also merged into one
+    message (paragraphs separated by a blank line). A text message directly
+    followed by a prompt with suggested actions is merged into the prompt.
+    Cards and other attachments are never merged. Merging changes what
+    users see, so it is off by default.
+    """
+
+    def __init__(
+        self,
+        merge_text: bool = False,
+        unbuffered_types=UNBUFFERED_TYPES,
+        event_log: EventLog = None,
+    ):
+        self.merge_text = merge_text
+        self.unbuffered_types = tuple(unbuffered_types)
+        self.event_log = event_log
+        self._pending_ids = itertools.count(1)
+
+    async def on_turn(
+        self, context: TurnContext, logic: Callable[[TurnContext], Awaitable]
+    ):
+        if _is_continuation(context.activity):
+            # Proactive turns send what the caller asks for, and the caller
+            # needs send errors raised where it sent, not after the turn.
+            return await logic()
+
+        buffer: List[Tuple[Activity, ResourceResponse]] = []
+        # Placeholder id -> the response handed out for it.
+        placeholders: Dict[str, ResourceResponse] = {}
+
+        async def send_activities(activities: List[Activity]) -> List[ResourceResponse]:
+            if any(activity.type in self.unbuffered_types for activity in activities):
+                await self._flush(context, buffer)
+                return await TurnContext.send_activities(context, activities)
+
+            responses = []
+            for activity in activities:
+                response = ResourceResponse(id=f"{PENDING_ID_PREFIX}{next(self._pending_ids)}")
+                placeholders[response.id] = response
+                buffer.append((activity, response))
+                responses.append(response)
+            if any(activity.type != ActivityTypes.trace for activity in activities):
+                context.responded = True
+            return responses
+
+        async def resolve_id(activity_id: str) -> str:
+            response = placeholders.get(activity_id)
+            if response is None:
+                return activity_id
+            if response.id == activity_id:
+                await self._flush(context, buffer)
+            return response.id
+
+        async def update_activity(turn_context: TurnContext, activity: Activity, next_update):
+            activity.id = await resolve_id(activity.id)
+            return await next_update()
+
+        async def delete_activity(turn_context: TurnContext, reference, next_delete):
+            reference.activity_id = await resolve_id(reference.activity_id)
+            return await next_delete()
+
+        context.on_update_activity(update_activity)
+        context.on_delete_activity(delete_activity)
+
+        # send_activity() goes through self.send_activities, so shadowing the
+        # method on this context instance captures both.
+        context.send_activities = send_activities
+        try:
+            try:
+                await logic()
+            finally:
+                # Restore direct sends for anything after the turn, such as
+                # the adapter's on_turn_error handler.
+                del context.send_activities
+        except Exception:
+            # Still deliver what the turn sent before failing, but never let
+            # a send error replace the one on_turn_error should see.
+            try:
+                await self._flush(context, buffer)
+            except Exception as flush_error:  # pylint: disable=broad-except
+                if self.event_log is not None:
+                    activity = context.activity
+                    self.event_log.error(
+                        "flush_failed",
+                        flush_error,
+                        conversation_id=activity.conversation.id if activity.conversation else "",
+                    )
+            raise
+        await self._flush(context, buffer)
+
+    async def _flush(self, context: TurnContext, buffer: List[Tuple[Activity, ResourceResponse]]):
+        if not buffer:
+            return
+        pending = list(buffer)
+        buffer.clear()
+        activities = [activity for activity, _ in pending]
+        if self.merge_text:
+            groups = self._coalesce(activities)
+        else:
+            groups = [(activity, [index]) for index, activity in enumerate(activities)]
+
+        with METRICS.span("send"):
+            sent = await TurnContext.send_activities(context, [activity for activity, _ in groups])
+
+        # Hand the channel's ids to the responses the turn was given; merged
+        # activities share the id of the message they became.
+        for (_, indices), response in zip(groups, sent or []):
+            for index in indices:
+                pending[index][1].id = response.id if response is not None else None
+
+    @staticmethod
+    def _coalesce(activities: List[Activity]) -> List[Tuple[Activity, List[int]]]:
+        # (activity to send, indices of the buffered activities it carries)
+        merged = []
+        for index, activity in enumerate(activities):
+            previous = merged[-1][0] if merged else None
+            if (
+                previous is not None
+                and _is_plain_text(previous)
+                and _can_absorb_text(activity)
+                and previous.text_format == activity.text_format
+            ):
+                combined = copy(activity)
+                combined.text = f"{previous.text}\n\n{activity.text}"
+                merged[-1] = (combined, merged[-1][1] + [index])
+            else:
+                merged.append((activity, [index]))
+        return merged
+
+
+def _is_continuation(activity: Activity) -> bool:
+    # The activity continue_conversation starts its turn with.
+    return activity.type == ActivityTypes.event and activity.name == "ContinueConversation"
+
+
+def _is_message(activity: Activity) -> bool:
+    return activity.type in (None, ActivityTypes.message)
+
+
+def _can_absorb_text(activity: Activity) -> bool:
+    return (
+        _is_message(activity)
+        and bool(activity.text)
+        and not activity.attachments
+        and not activity.speak
+        and not activity.value
+        and not activity.channel_data
+        and not activity.entities
+    )
+
+
+def _is_plain_text(activity: Activity) -> bool:
+    return (
+        _can_absorb_text(activity)
+        and not activity.suggested_actions
+        and activity.input_hint in (None, InputHints.accepting_input)
+    )
@@ -0,0 +1,158 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import asyncio
+from typing import List
+
+import pytest
+from botbuilder.core import BotAdapter, MessageFactory, TurnContext
+from botbuilder.schema import (
+    Activity,
+    ActivityTypes,
+    ChannelAccount,
+    ConversationAccount,
+    ConversationReference,
+    ResourceResponse,
+)
+
+from middleware import OutboundBatchingMiddleware
+from middleware.outbound_batching import PENDING_ID_PREFIX
+
+
+class RecordingAdapter(BotAdapter):
+    def __init__(self, fail_sends: bool = False):
+        super().__init__()
+        self.fail_sends = fail_sends
+        self.calls: List[List[Activity]] = []
+        self.updated = []
+        self.deleted = []
+
+    async def send_activities(self, context, activities):
+        if self.fail_sends:
+            raise ConnectionError("connector down")
+        self.calls.append(list(activities))
+        start = sum(len(call) for call in self.calls[:-1])
+        return [ResourceResponse(id=f"sent-{start + n}") for n in range(len(activities))]
+
+    async def update_activity(self, context, activity):
+        self.updated.append(activity.id)
+
+    async def delete_activity(self, context, reference: ConversationReference):
+        self.deleted.append(reference.activity_id)
+
+
+class RecordingLog:
+    def __init__(self):
+        self.errors = []
+
+    def error(self, event, error, **fields):
+        self.errors.append((event, error))
+
+
+def incoming() -> Activity:
+    return Activity(
+        type=ActivityTypes.message,
+        text="hi",
+        channel_id="test",
+        service_url="https://example.org",
+        conversation=ConversationAccount(id="conversation"),
+        from_property=ChannelAccount(id="user"),
+        recipient=ChannelAccount(id="bot"),
+    )
+
+
+def turn(logic, adapter=None, **options):
+    adapter = adapter or RecordingAdapter()
+    adapter.use(OutboundBatchingMiddleware(**options))
+    context = TurnContext(adapter, incoming())
+    asyncio.run(adapter.run_pipeline(context, logic))
+    return adapter
+
+
+def texts(adapter) -> List[List[str]]:
+    return [[activity.text for activity in call] for call in adapter.calls]
+
+
+def test_sends_are_flushed_in_one_call_in_order():
+    async def logic(context):
+        await context.send_activity("one")
+        await context.send_activities([MessageFactory.text("two"), MessageFactory.text("three")])
+        assert context.responded
+
+    assert texts(turn(logic)) == [["one", "two", "three"]]
+
+
+def test_typing_flushes_what_was_buffered_first():
+    async def logic(context):
+        await context.send_activity("before")
+        await context.send_activity(Activity(type=ActivityTypes.typing))
+        await context.send_activity("after")
+
+    adapter = turn(logic)
+    assert [[activity.type for activity in call] for call in adapter.calls] == [
+        ["message"],
+        ["typing"],
+        ["message"],
+    ]
+
+
+@pytest.mark.parametrize("merge_text, expected", [(False, 3), (True, 1)])
+def test_text_is_only_merged_when_enabled(merge_text, expected):
+    async def logic(context):
+        await context.send_activity("one")
+        await context.send_activity("two")
+        await context.send_activity(MessageFactory.suggested_actions([], "Pick one"))
+
+    adapter = turn(logic, merge_text=merge_text)
+    assert len(adapter.calls[0]) == expected
+    if merge_text:
+        assert adapter.calls[0][0].text == "one\n\ntwo\n\nPick one"
+
+
+def test_responses_carry_the_channel_ids_after_the_flush():
+    responses = []
+
+    async def logic(context):
+        responses.append(await context.send_activity("one"))
+        responses.append(await context.send_activity("two"))
+        assert responses[0].id.startswith(PENDING_ID_PREFIX)
+
+    turn(logic, merge_text=True)
+    # Merged messages share the id of the message they became.
+    assert [response.id for response in responses] == ["sent-0", "sent-0"]
+
+
+def test_update_and_delete_by_placeholder_use_the_real_id():
+    async def logic(context):
+        first = await context.send_activity("one")
+        second = await context.send_activity("two")
+        await context.update_activity(Activity(id=first.id, type=ActivityTypes.message, text="1"))
+        await context.delete_activity(second.id)
+
+    adapter = turn(logic)
+    assert texts(adapter) == [["one", "two"]]
+    assert adapter.updated == ["sent-0"]
+    assert adapter.deleted == ["sent-1"]
+
+
+def test_turn_error_is_raised_after_flushing():
+    async def logic(context):
+        await context.send_activity("partial")
+        raise ValueError("bot failed")
+
+    adapter = RecordingAdapter()
+    with pytest.raises(ValueError):
+        turn(logic, adapter)
+    assert texts(adapter) == [["partial"]]
+
+
+def test_flush_error_does_not_replace_the_turn_error():
+    async def logic(context):
+        await context.send_activity("partial")
+        raise ValueError("bot failed")
+
+    log = RecordingLog()
+    with pytest.raises(ValueError):
+        turn(logic, RecordingAdapter(fail_sends=True), event_log=log)
+    assert [event for event, _ in log.errors] == ["flush_failed"]
+    assert isinstance(log.errors[0][1], ConnectionError)
@@ -0,0 +1,50 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+from typing import Awaitable, Callable, List
+
+from botbuilder.core import Middleware, TurnContext
+from botbuilder.schema import Activity
+
+from transcripts import INBOUND, OUTBOUND, TranscriptWriter, delete_marker, update_marker
+
+
+class TranscriptRecorderMiddleware(Middleware):
+    """Records every turn's inbound activity and the activities it sends.
+
+    Updates and deletes of sent activities are recorded as outbound too.
+
+    Sends are recorded as they reach the adapter, so registered after
+    OutboundBatchingMiddleware it sees the merged replies the user got.
+    Recording only queues the activity on the ``writer``.
+    """
+
+    def __init__(self, writer: TranscriptWriter):
+        if writer is None:
+            raise TypeError("TranscriptRecorderMiddleware: writer is required")
+        self.writer = writer
+
+    async def on_turn(
+        self, context: TurnContext, logic: Callable[[TurnContext], Awaitable]
+    ):
+        self.writer.append(INBOUND, context.activity)
+
+        async def record_sends(
+            turn_context: TurnContext, activities: List[Activity], next_send: Callable
+        ):
+            for activity in activities:
+                self.writer.append(OUTBOUND, activity)
+            return await next_send()
+
+        async def record_update(turn_context: TurnContext, activity: Activity, next_update: Callable):
+            self.writer.append(OUTBOUND, update_marker(activity))
+            return await next_update()
+
+        async def record_delete(turn_context: TurnContext, reference, next_delete: Callable):
+            self.writer.append(OUTBOUND, delete_marker(turn_context.activity, reference))
+            return await next_delete()
+
+        context.on_send_activities(record_sends)
+        context.on_update_activity(record_update)
+        context.on_delete_activity(record_delete)
+        await logic()
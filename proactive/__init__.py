@@ -0,0 +1,12 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+from .fan_out import FanOutProgress, ProactiveFanOut, TokenBucket
+from .references import ConversationReferenceStore
+
+__all__ = [
+    "ConversationReferenceStore",
+    "FanOutProgress",
+    "ProactiveFanOut",
+    "TokenBucket",
+]
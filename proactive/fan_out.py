@@ -0,0 +1,233 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import asyncio
+import random
+import time
+from typing import AsyncIterable, Awaitable, Callable, Dict, Optional
+
+import aiohttp
+from botbuilder.core import BotAdapter, TurnContext
+from botbuilder.schema import Activity, ConversationReference
+from botframework.connector.auth import AuthenticationConstants, ClaimsIdentity
+from msrest.exceptions import ClientRequestError, HttpOperationError
+
+# Connector statuses worth another attempt; anything else (403 blocked,
+# 404 conversation gone, ...) fails the user right away.
+RETRY_STATUSES = (408, 429, 500, 502, 503, 504)
+
+
+class TokenBucket:
+    """Allows ``rate`` acquisitions per second with bursts of ``burst``."""
+
+    def __init__(self, rate: float, burst: int = 1, clock=time.monotonic):
+        if rate <= 0:
+            raise ValueError("[TokenBucket]: rate must be positive")
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._clock = clock
+        self._tokens = float(self.burst)
+        self._updated = clock()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        # The lock makes waiters take tokens in arrival order.
+        async with self._lock:
+            while True:
+                now = self._clock()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class FanOutProgress:
+    def __init__(self):
+        self.queued = 0
+        self.sent = 0
+        self.skipped = 0
+        self.failed = 0
+        self.retries = 0
+        self.in_flight = 0
+        self.started = time.time()
+        self.finished = None
+        # user id -> last error, for the users that could not be reached.
+        self.failures: Dict[str, str] = {}
+
+    @property
+    def done(self) -> bool:
+        return self.finished is not None
+
+    def as_dict(self) -> dict:
+        end = self.finished if self.finished is not None else time.time()
+        return {
+            "queued": self.queued,
+            "sent": self.sent,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "retries": self.retries,
+            "in_flight": self.in_flight,
+            "done": self.done,
+            "seconds": round(end - self.started, 3),
+            "failures": dict(list(self.failures.items())[:100]),
+        }
+
+
+class ProactiveFanOut:
+    """Sends one proactive message to each of many conversations.
+
+    Every reference gets its own ``continue_conversation`` turn in which
+    ``build(turn_context)`` returns the activity to send, or None to skip the
+    user. At most ``concurrency`` turns run at once and sends on each channel
+    are limited to ``rate_per_second``. Throttling, timeouts and 5xx answers
+    from the connector are retried up to ``max_attempts`` times with
+    exponential backoff and jitter (or the Retry-After the channel asked
+    for). ``on_progress`` is called every ``report_every`` completed users and
+    once at the end.
+    """
+
+    def __init__(
+        self,
+        adapter: BotAdapter,
+        app_id: str = None,
+        concurrency: int = 8,
+        rate_per_second: float = 20.0,
+        burst: int = 20,
+        max_attempts: int = 4,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+        report_every: int = 100,
+    ):
+        self.adapter = adapter
+        self.app_id = app_id
+        self.concurrency = concurrency
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.report_every = report_every
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    async def run(
+        self,
+        references: AsyncIterable[ConversationReference],
+        build: Callable[[TurnContext], Awaitable[Optional[Activity]]],
+        on_progress: Callable[[FanOutProgress], None] = None,
+        progress: FanOutProgress = None,
+    ) -> FanOutProgress:
+        progress = progress or FanOutProgress()
+        # Bounded so a large reference list is streamed, not loaded at once.
+        queue = asyncio.Queue(maxsize=self.concurrency * 2)
+
+        async def worker():
+            while True:
+                reference = await queue.get()
+                if reference is None:
+                    return
+                progress.in_flight += 1
+                try:
+                    await self._deliver(reference, build, progress)
+                except Exception as error:  # pylint: disable=broad-except
+                    # e.g. continue_conversation failing before the callback
+                    # runs; the worker must live on or queue.put() hangs.
+                    user_id = reference.user.id if reference.user else "?"
+                    progress.failed += 1
+                    progress.failures[user_id] = f"{type(error).__name__}: {error}"
+                finally:
+                    progress.in_flight -= 1
+                completed = progress.sent + progress.skipped + progress.failed
+                if on_progress is not None and completed % self.report_every == 0:
+                    on_progress(progress)
+
+        workers = [asyncio.ensure_future(worker()) for _ in range(self.concurrency)]
+        try:
+            async for reference in references:
+                progress.queued += 1
+                await queue.put(reference)
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+        finally:
+            for task in workers:
+                task.cancel()
+            progress.finished = time.time()
+
+        if on_progress is not None:
+            on_progress(progress)
+        return progress
+
+    async def _deliver(self, reference: ConversationReference, build, progress: FanOutProgress):
+        user_id = reference.user.id if reference.user else "?"
+        for attempt in range(1, self.max_attempts + 1):
+            outcome = {}
+
+            async def callback(turn_context: TurnContext):
+                # Errors are caught here; left to propagate they would go
+                # to the adapter's on_turn_error, which messages the user.
+                try:
+                    activity = await build(turn_context)
+                    if activity is None:
+                        outcome["skipped"] = True
+                        return
+                    await self._bucket(reference.channel_id).acquire()
+                    await turn_context.send_activity(activity)
+                except Exception as error:  # pylint: disable=broad-except
+                    outcome["error"] = error
+
+            await self.adapter.continue_conversation(
+                reference, callback, claims_identity=self._identity()
+            )
+
+            error = outcome.get("error")
+            if error is None:
+                if outcome.get("skipped"):
+                    progress.skipped += 1
+                else:
+                    progress.sent += 1
+                return
+
+            delay = self._retry_delay(error, attempt)
+            if delay is None or attempt == self.max_attempts:
+                progress.failed += 1
+                progress.failures[user_id] = f"{type(error).__name__}: {error}"
+                return
+            progress.retries += 1
+            await asyncio.sleep(delay)
+
+    def _bucket(self, channel_id: str) -> TokenBucket:
+        bucket = self._buckets.get(channel_id)
+        if bucket is None:
+            bucket = TokenBucket(self.rate_per_second, self.burst)
+            self._buckets[channel_id] = bucket
+        return bucket
+
+    def _identity(self) -> ClaimsIdentity:
+        # continue_conversation needs the bot's identity; with no app id
+        # (local development) the connector is called anonymously.
+        return ClaimsIdentity(
+            claims={
+                AuthenticationConstants.AUDIENCE_CLAIM: self.app_id,
+                AuthenticationConstants.APP_ID_CLAIM: self.app_id,
+            },
+            is_authenticated=True,
+        )
+
+    def _retry_delay(self, error: Exception, attempt: int) -> Optional[float]:
+        if isinstance(error, HttpOperationError):
+            response = error.response
+            status = getattr(response, "status_code", None)
+            if status not in RETRY_STATUSES:
+                return None
+            retry_after = response.headers.get("Retry-After") if response is not None else None
+            if retry_after and retry_after.isdigit():
+                return min(float(retry_after), self.max_delay)
+        elif not isinstance(
+            error, (ClientRequestError, aiohttp.ClientError, asyncio.TimeoutError, OSError)
+        ):
+            return None
+
+        backoff = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return backoff * random.uniform(0.5, 1.0)
@@ -0,0 +1,69 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+from typing import AsyncIterator
+
+from botbuilder.core import Storage, TurnContext
+from botbuilder.schema import Activity, ConversationReference
+
+
+class ConversationReferenceStore:
+    """Remembers where each user can be reached for proactive messages.
+
+    A user's latest ConversationReference is kept under
+    ``{channel}/references/{user}``, one item per user, and the references
+    are enumerated with the storage's ``scan_keys()``. Saving a new user
+    therefore never touches an item shared with other users, whichever
+    worker saves it. A reference is only rewritten when the user's
+    conversation or service URL changed since the stored one.
+    """
+
+    KEY_PATTERN = "%/references/%"
+
+    def __init__(self, storage: Storage):
+        if storage is None:
+            raise TypeError("ConversationReferenceStore: storage is required")
+        if not hasattr(storage, "scan_keys"):
+            raise TypeError("ConversationReferenceStore: storage must support scan_keys()")
+        self.storage = storage
+
+    @staticmethod
+    def get_storage_key(channel_id: str, user_id: str) -> str:
+        return f"{channel_id}/references/{user_id}"
+
+    async def save(self, activity: Activity) -> bool:
+        if not activity.from_property or not activity.conversation:
+            return False
+
+        key = self.get_storage_key(activity.channel_id, activity.from_property.id)
+        stored = (await self.storage.read([key])).get(key)
+        if (
+            stored is not None
+            and (stored.get("conversation") or {}).get("id") == activity.conversation.id
+            and stored.get("serviceUrl") == activity.service_url
+        ):
+            return False
+
+        reference = TurnContext.get_conversation_reference(activity)
+        await self.storage.write({key: reference.serialize()})
+        return True
+
+    async def iterate(self, batch_size: int = 100) -> AsyncIterator[ConversationReference]:
+        """Yield every stored reference, reading ``batch_size`` at a time."""
+        chunk = []
+        async for key in self.storage.scan_keys(self.KEY_PATTERN, page_size=batch_size):
+            chunk.append(key)
+            if len(chunk) >= batch_size:
+                async for reference in self._read(chunk):
+                    yield reference
+                chunk = []
+        async for reference in self._read(chunk):
+            yield reference
+
+    async def _read(self, keys) -> AsyncIterator[ConversationReference]:
+        if not keys:
+            return
+        items = await self.storage.read(keys)
+        for key in keys:
+            if key in items:
+                yield ConversationReference().deserialize(items[key])
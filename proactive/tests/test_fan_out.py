@@ -0,0 +1,133 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import asyncio
+import time
+
+import pytest
+from botbuilder.core import BotAdapter, TurnContext
+from botbuilder.schema import (
+    Activity,
+    ActivityTypes,
+    ChannelAccount,
+    ConversationAccount,
+    ConversationReference,
+    ResourceResponse,
+)
+
+from proactive import ProactiveFanOut, TokenBucket
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+class FlakyAdapter(BotAdapter):
+    """Fails each user's first ``failures[user]`` sends with that error."""
+
+    def __init__(self, failures=None):
+        super().__init__()
+        self.failures = failures or {}
+        self.sent = []
+
+    async def continue_conversation(
+        self, reference, callback, bot_id=None, claims_identity=None, audience=None
+    ):
+        context = TurnContext(
+            self,
+            Activity(
+                type=ActivityTypes.event,
+                name="ContinueConversation",
+                channel_id=reference.channel_id,
+                conversation=reference.conversation,
+                from_property=reference.user,
+                recipient=reference.bot,
+            ),
+        )
+        return await self.run_pipeline(context, callback)
+
+    async def send_activities(self, context, activities):
+        user = context.activity.from_property.id
+        count, error = self.failures.get(user, (0, None))
+        if count:
+            self.failures[user] = (count - 1, error)
+            raise error
+        self.sent.append(user)
+        return [ResourceResponse(id=user) for _ in activities]
+
+    async def update_activity(self, context, activity):
+        raise NotImplementedError()
+
+    async def delete_activity(self, context, reference):
+        raise NotImplementedError()
+
+
+def reference(user: str) -> ConversationReference:
+    return ConversationReference(
+        channel_id="test",
+        service_url="https://example.org",
+        user=ChannelAccount(id=user),
+        bot=ChannelAccount(id="bot"),
+        conversation=ConversationAccount(id=f"conversation-{user}"),
+    )
+
+
+async def references(count: int):
+    for index in range(count):
+        yield reference(f"user{index}")
+
+
+async def hello(turn_context):
+    if turn_context.activity.from_property.id == "user0":
+        return None
+    return Activity(type=ActivityTypes.message, text="hello")
+
+
+def test_token_bucket_limits_the_rate():
+    async def scenario():
+        bucket = TokenBucket(rate=100, burst=2)
+        started = time.monotonic()
+        for _ in range(6):
+            await bucket.acquire()
+        return time.monotonic() - started
+
+    # Two tokens up front, then one every 10ms.
+    assert run(scenario()) >= 0.035
+
+
+def test_token_bucket_needs_a_rate():
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
+
+
+def test_every_user_is_sent_to_or_skipped():
+    adapter = FlakyAdapter()
+    reports = []
+    fan_out = ProactiveFanOut(adapter, concurrency=3, rate_per_second=1000, report_every=5)
+    progress = run(
+        fan_out.run(references(10), hello, on_progress=lambda done: reports.append(done.as_dict()))
+    )
+    assert sorted(adapter.sent) == sorted(f"user{index}" for index in range(1, 10))
+    assert (progress.queued, progress.sent, progress.skipped, progress.failed) == (10, 9, 1, 0)
+    assert progress.done
+    assert len(reports) == 3
+    assert reports[-1]["done"]
+
+
+def test_transient_errors_are_retried_and_others_fail():
+    adapter = FlakyAdapter(
+        {
+            "user1": (2, ConnectionError("reset")),
+            "user2": (1, ValueError("bad card")),
+            "user3": (9, asyncio.TimeoutError()),
+        }
+    )
+    fan_out = ProactiveFanOut(adapter, rate_per_second=1000, max_attempts=3, base_delay=0.001)
+    progress = run(fan_out.run(references(4), hello))
+    assert sorted(adapter.sent) == ["user1"]
+    assert progress.sent == 1
+    assert progress.failed == 2
+    # user1 twice, user3 on attempts one and two.
+    assert progress.retries == 4
+    assert set(progress.failures) == {"user2", "user3"}
+    assert progress.failures["user2"] == "ValueError: bad card"
@@ -0,0 +1,59 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import asyncio
+
+import pytest
+from botbuilder.core import MemoryStorage
+from botbuilder.schema import Activity, ActivityTypes, ChannelAccount, ConversationAccount
+
+from proactive import ConversationReferenceStore
+from storage import BoundedMemoryStorage
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def message(user: str, conversation: str = "conversation", service_url="https://example.org"):
+    return Activity(
+        type=ActivityTypes.message,
+        channel_id="test",
+        service_url=service_url,
+        from_property=ChannelAccount(id=user),
+        recipient=ChannelAccount(id="bot"),
+        conversation=ConversationAccount(id=f"{conversation}-{user}"),
+    )
+
+
+def test_storage_must_support_scan_keys():
+    with pytest.raises(TypeError):
+        ConversationReferenceStore(MemoryStorage())
+
+
+def test_references_are_only_rewritten_when_they_change():
+    async def scenario():
+        store = ConversationReferenceStore(BoundedMemoryStorage())
+        return [
+            await store.save(message("alex")),
+            await store.save(message("alex")),
+            await store.save(message("alex", service_url="https://other.example.org")),
+            await store.save(message("alex", conversation="new")),
+        ]
+
+    assert run(scenario()) == [True, False, True, True]
+
+
+def test_iterate_yields_every_user_in_batches():
+    async def scenario():
+        storage = BoundedMemoryStorage()
+        store = ConversationReferenceStore(storage)
+        for index in range(7):
+            await store.save(message(f"user{index}"))
+        await storage.write({"test/users/user0": {}})
+        return [reference async for reference in store.iterate(batch_size=3)]
+
+    references = run(scenario())
+    assert [reference.user.id for reference in references] == [f"user{i}" for i in range(7)]
+    assert references[0].conversation.id == "conversation-user0"
+    assert references[0].service_url == "https://example.org"
@@ -0,0 +1,20 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+from .bulk import (
+    ImportProgress,
+    ProfileExporter,
+    ProfileImporter,
+    profile_to_row,
+    read_rows,
+    user_state_key,
+)
+
+__all__ = [
+    "ImportProgress",
+    "ProfileExporter",
+    "ProfileImporter",
+    "profile_to_row",
+    "read_rows",
+    "user_state_key",
+]
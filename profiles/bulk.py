@@ -0,0 +1,246 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import asyncio
+import csv
+import inspect
+import json
+import time
+from enum import Enum
+from typing import AsyncIterator, Callable, Dict, Iterable, Iterator, Optional, TextIO, Tuple
+
+from botbuilder.core import Storage
+
+from data_models import UserProfile
+
+# Property name the bot's profile accessor stores the UserProfile under.
+PROFILE_PROPERTY = "UserProfile"
+PROFILE_FIELDS = ("name", "age", "addr", "meetingSlot", "nomeetPeriod", "transportation")
+COLUMNS = ("channel_id", "user_id") + PROFILE_FIELDS
+
+
+def user_state_key(channel_id: str, user_id: str) -> str:
+    # Same key UserState uses for the user's state.
+    return f"{channel_id}/users/{user_id}"
+
+
+def read_rows(stream: TextIO, fmt: str) -> Iterator[Tuple[int, Optional[dict]]]:
+    """Yield (line number, row) from a CSV or JSON lines stream, one at a time.
+
+    A JSON line that is not an object is yielded as None.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+        return
+
+    for number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield number, row if isinstance(row, dict) else None
+
+
+def profile_to_row(channel_id: str, user_id: str, profile: UserProfile) -> dict:
+    # Choices are written as their labels, which the validators parse back.
+    row = {"channel_id": channel_id, "user_id": user_id}
+    for field in PROFILE_FIELDS:
+        value = getattr(profile, field, None)
+        row[field] = value.label if isinstance(value, Enum) else (value or "")
+    return row
+
+
+class ImportProgress:
+    def __init__(self):
+        self.read = 0
+        self.imported = 0
+        self.rejected = 0
+        self.batches = 0
+        self.started = time.time()
+        self.finished = None
+
+    def as_dict(self) -> dict:
+        end = self.finished if self.finished is not None else time.time()
+        seconds = end - self.started
+        return {
+            "read": self.read,
+            "imported": self.imported,
+            "rejected": self.rejected,
+            "batches": self.batches,
+            "seconds": round(seconds, 3),
+            "rows_per_second": round(self.read / seconds, 1) if seconds else 0.0,
+        }
+
+
+class ProfileImporter:
+    """Writes user profiles from rows of text into UserState storage.
+
+    Every non-empty field of a row is checked by the same validator the
+    dialog uses for that answer (``validators`` maps field to validator,
+    see DialogEngine.validators); a row with an invalid field is rejected
+    as a whole. Rows are handled ``batch_size`` at a time: validated
+    concurrently, then merged into the users' stored profiles with one
+    storage read and one write. Fields a row leaves empty keep their stored
+    value. Storages with a ``flush()`` are flushed after every batch, so at
+    most one batch is held in memory. ``on_progress`` is called every
+    ``report_every`` batches and once at the end.
+    """
+
+    def __init__(
+        self,
+        storage: Storage,
+        validators: Dict[str, Callable],
+        default_channel: str = None,
+        batch_size: int = 500,
+        report_every: int = 20,
+    ):
+        if storage is None:
+            raise TypeError("ProfileImporter: storage is required")
+        if batch_size <= 0:
+            raise ValueError("ProfileImporter: batch_size must be positive")
+        self.storage = storage
+        self.validators = {
+            field: validate for field, validate in validators.items() if field in PROFILE_FIELDS
+        }
+        self.default_channel = default_channel
+        self.batch_size = batch_size
+        self.report_every = report_every
+
+    async def run(
+        self,
+        rows: Iterable[Tuple[int, Optional[dict]]],
+        on_reject: Callable[[int, str], None] = None,
+        on_progress: Callable[[ImportProgress], None] = None,
+    ) -> ImportProgress:
+        progress = ImportProgress()
+        batch = []
+        try:
+            for line, row in rows:
+                progress.read += 1
+                batch.append((line, row))
+                if len(batch) >= self.batch_size:
+                    await self._import_batch(batch, progress, on_reject)
+                    batch = []
+                    if on_progress is not None and progress.batches % self.report_every == 0:
+                        on_progress(progress)
+            if batch:
+                await self._import_batch(batch, progress, on_reject)
+        finally:
+            progress.finished = time.time()
+
+        if on_progress is not None:
+            on_progress(progress)
+        return progress
+
+    async def _import_batch(self, batch, progress: ImportProgress, on_reject):
+        results = await asyncio.gather(*(self._validate_row(row) for _, row in batch))
+
+        accepted = []
+        for (line, _), (key, values, error) in zip(batch, results):
+            if error is not None:
+                progress.rejected += 1
+                if on_reject is not None:
+                    on_reject(line, error)
+            else:
+                accepted.append((key, values))
+
+        if accepted:
+            changes = await self.storage.read(list(dict.fromkeys(key for key, _ in accepted)))
+            for key, values in accepted:
+                # A user listed twice in a batch gets both rows, in order.
+                state = changes.setdefault(key, {})
+                profile = state.get(PROFILE_PROPERTY)
+                if profile is None:
+                    profile = UserProfile()
+                    state[PROFILE_PROPERTY] = profile
+                for field, value in values.items():
+                    setattr(profile, field, value)
+            await self.storage.write(changes)
+            flush = getattr(self.storage, "flush", None)
+            if flush is not None:
+                await flush()
+
+        progress.imported += len(accepted)
+        progress.batches += 1
+
+    async def _validate_row(self, row: Optional[dict]):
+        if row is None:
+            return None, None, "not a JSON object"
+
+        channel_id = str(row.get("channel_id") or self.default_channel or "").strip()
+        user_id = str(row.get("user_id") or "").strip()
+        if not channel_id or not user_id:
+            return None, None, "channel_id and user_id are required"
+
+        values = {}
+        for field, validate in self.validators.items():
+            text = row.get(field)
+            text = "" if text is None else str(text).strip()
+            if not text:
+                continue
+            result = validate(text)
+            if inspect.isawaitable(result):
+                result = await result
+            if not result.is_valid:
+                return None, None, f"{field}: {result.message}"
+            values[field] = result.value
+        return user_state_key(channel_id, user_id), values, None
+
+
+class ProfileExporter:
+    """Streams every stored user profile as a row of text.
+
+    Needs a storage that can list its keys (``scan_keys``, e.g.
+    SqliteStorage); profiles are read ``batch_size`` users at a time.
+    """
+
+    def __init__(self, storage: Storage, batch_size: int = 500):
+        if not hasattr(storage, "scan_keys"):
+            raise TypeError("ProfileExporter: storage must support scan_keys()")
+        if batch_size <= 0:
+            raise ValueError("ProfileExporter: batch_size must be positive")
+        self.storage = storage
+        self.batch_size = batch_size
+
+    async def rows(self) -> AsyncIterator[dict]:
+        keys = []
+        async for key in self.storage.scan_keys("%/users/%", page_size=self.batch_size):
+            keys.append(key)
+            if len(keys) >= self.batch_size:
+                async for row in self._read(keys):
+                    yield row
+                keys = []
+        async for row in self._read(keys):
+            yield row
+
+    async def _read(self, keys) -> AsyncIterator[dict]:
+        if not keys:
+            return
+        items = await self.storage.read(keys)
+        for key in keys:
+            state = items.get(key)
+            profile = state.get(PROFILE_PROPERTY) if isinstance(state, dict) else None
+            if profile is None:
+                continue
+            channel_id, user_id = key.split("/users/", 1)
+            yield profile_to_row(channel_id, user_id, profile)
+
+    async def write(self, stream: TextIO, fmt: str) -> int:
+        """Write every profile to ``stream`` as CSV or JSON lines; returns the count."""
+        writer = None
+        if fmt == "csv":
+            writer = csv.DictWriter(stream, fieldnames=COLUMNS)
+            writer.writeheader()
+
+        count = 0
+        async for row in self.rows():
+            if writer is not None:
+                writer.writerow(row)
+            else:
+                stream.write(json.dumps(row) + "\n")
+            count += 1
+        return count
@@ -0,0 +1,134 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+"""Bulk import and export of user profiles in the configured state storage.
+
+    python -m profiles.cli import users.csv --channel msteams --errors rejected.jsonl
+    python -m profiles.cli export profiles.jsonl
+
+Rows have the columns channel_id, user_id, name, age, addr, meetingSlot,
+nomeetPeriod and transportation; files ending in .csv are CSV, anything else
+is JSON lines. Imported values go through the bot's own validators, with
+the number and date recognizers running in a pool of processes. Needs
+StateStorage=sqlite, since the bot's memory storage is private to its
+process.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+from .bulk import ImportProgress, ProfileExporter, ProfileImporter, read_rows
+
+
+def file_format(path: str, fmt: str) -> str:
+    if fmt:
+        return fmt
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    load = commands.add_parser("import", help="validate and store profiles from a file")
+    load.add_argument("path", help="CSV or JSON lines file, - for stdin")
+    load.add_argument("--channel", default="", help="channel_id for rows without one")
+    load.add_argument("--errors", default="", help="JSON lines file for rejected rows")
+
+    dump = commands.add_parser("export", help="write every stored profile to a file")
+    dump.add_argument("path", help="CSV or JSON lines file, - for stdout")
+
+    for command in (load, dump):
+        command.add_argument("--format", choices=("csv", "jsonl"), default="")
+        command.add_argument("--batch-size", type=int, default=500)
+    return parser.parse_args(argv)
+
+
+def report(progress: ImportProgress):
+    print(json.dumps(progress.as_dict()), file=sys.stderr)
+
+
+def create_validators(config, storage):
+    """The dialog's validators, bound to a bot made from ``config``.
+
+    The bot is not served; only its validators and recognizer pool are
+    used, with one recognizer process per CPU so a batch is validated in
+    parallel.
+    """
+    from botbuilder.core import ConversationState, UserState
+
+    from bots import CustomPromptBot
+
+    config.RECOGNIZER_USE_PROCESSES = True
+    config.RECOGNIZER_WORKERS = os.cpu_count() or 1
+    bot = CustomPromptBot(config, ConversationState(storage), UserState(storage))
+    return bot.dialog.validators, bot.recognizers
+
+
+async def run_import(args, config, storage) -> int:
+    fmt = file_format(args.path, args.format)
+    source = sys.stdin if args.path == "-" else open(args.path, newline="")
+    errors = open(args.errors, "w") if args.errors else None
+
+    def on_reject(line: int, error: str):
+        if errors is not None:
+            errors.write(json.dumps({"line": line, "error": error}) + "\n")
+
+    validators, recognizers = create_validators(config, storage)
+    importer = ProfileImporter(
+        storage,
+        validators,
+        default_channel=args.channel or None,
+        batch_size=args.batch_size,
+    )
+    try:
+        await recognizers.warm_up()
+        progress = await importer.run(read_rows(source, fmt), on_reject, report)
+    finally:
+        recognizers.close()
+        if source is not sys.stdin:
+            source.close()
+        if errors is not None:
+            errors.close()
+    return 1 if progress.rejected else 0
+
+
+async def run_export(args, storage) -> int:
+    fmt = file_format(args.path, args.format)
+    target = sys.stdout if args.path == "-" else open(args.path, "w", newline="")
+    try:
+        count = await ProfileExporter(storage, batch_size=args.batch_size).write(target, fmt)
+    finally:
+        if target is not sys.stdout:
+            target.close()
+    print(json.dumps({"exported": count}), file=sys.stderr)
+    return 0
+
+
+async def run(args) -> int:
+    # The storage the server is configured with, without building the app.
+    from config import DefaultConfig
+    from storage import create_storage
+
+    config = DefaultConfig()
+    if config.STATE_STORAGE != "sqlite":
+        print("profiles.cli needs StateStorage=sqlite", file=sys.stderr)
+        return 2
+    storage = create_storage(config)
+    try:
+        if args.command == "import":
+            return await run_import(args, config, storage)
+        return await run_export(args, storage)
+    finally:
+        await storage.close()
+
+
+def main(argv=None) -> int:
+    return asyncio.run(run(parse_args(argv)))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
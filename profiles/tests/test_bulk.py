@@ -0,0 +1,117 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import asyncio
+import io
+
+import pytest
+from botbuilder.core import MemoryStorage
+
+from data_models import NoMeetingPeriod, Transportation, UserProfile
+from profiles import ProfileExporter, ProfileImporter, read_rows, user_state_key
+from storage import BoundedMemoryStorage
+
+
+class Result:
+    def __init__(self, is_valid: bool, value=None, message: str = None):
+        self.is_valid = is_valid
+        self.value = value
+        self.message = message
+
+
+def validate_age(text: str) -> Result:
+    if text.isdigit() and 18 <= int(text) <= 120:
+        return Result(True, int(text))
+    return Result(False, message="Please enter an age between 18 and 120.")
+
+
+async def validate_transportation(text: str) -> Result:
+    choice = Transportation.parse(text)
+    if choice is None:
+        return Result(False, message="Please choose one of: Car, Bus, Bicycle, Foot.")
+    return Result(True, choice)
+
+
+VALIDATORS = {
+    "name": lambda text: Result(True, text),
+    "age": validate_age,
+    "transportation": validate_transportation,
+    # Validators for fields that are not profile fields are ignored.
+    "calendar": lambda text: Result(False, message="never used"),
+}
+
+CSV = (
+    "channel_id,user_id,name,age,transportation,calendar\n"
+    "test,alex,Alex,32,Bus,x\n"
+    ",sam,Sam,,,\n"
+    "test,kim,Kim,12,,\n"
+    "test,,Nobody,40,,\n"
+)
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_read_rows_numbers_lines_and_flags_bad_json():
+    rows = list(read_rows(io.StringIO('{"user_id": "a"}\n\n[1]\nnot json\n'), "jsonl"))
+    assert rows == [(1, {"user_id": "a"}), (3, None), (4, None)]
+    rows = list(read_rows(io.StringIO(CSV), "csv"))
+    assert [line for line, _ in rows] == [2, 3, 4, 5]
+    assert rows[0][1]["name"] == "Alex"
+
+
+def test_import_validates_rows_and_merges_profiles():
+    storage = BoundedMemoryStorage()
+    key = user_state_key("test", "alex")
+    run(storage.write({key: {"UserProfile": UserProfile(name="Old", addr="1 Main Street")}}))
+    rejected = []
+    reports = []
+    importer = ProfileImporter(storage, VALIDATORS, default_channel="default", batch_size=2)
+
+    progress = run(
+        importer.run(
+            read_rows(io.StringIO(CSV), "csv"),
+            on_reject=lambda line, error: rejected.append((line, error)),
+            on_progress=lambda done: reports.append(done.as_dict()),
+        )
+    )
+
+    assert (progress.read, progress.imported, progress.rejected, progress.batches) == (4, 2, 2, 2)
+    assert rejected == [
+        (4, "age: Please enter an age between 18 and 120."),
+        (5, "channel_id and user_id are required"),
+    ]
+    assert reports[-1]["imported"] == 2
+
+    items = run(storage.read([key, user_state_key("default", "sam")]))
+    alex = items[key]["UserProfile"]
+    # Empty fields keep their stored values.
+    assert (alex.name, alex.age, alex.addr) == ("Alex", 32, "1 Main Street")
+    assert alex.transportation is Transportation.BUS
+    assert items[user_state_key("default", "sam")]["UserProfile"].name == "Sam"
+
+
+def test_export_writes_what_was_imported():
+    storage = BoundedMemoryStorage()
+    run(ProfileImporter(storage, VALIDATORS).run(read_rows(io.StringIO(CSV), "csv")))
+    run(storage.write({"test/conversations/alex": {}}))
+
+    output = io.StringIO()
+    count = run(ProfileExporter(storage, batch_size=1).write(output, "jsonl"))
+    assert count == 1
+    row = list(read_rows(io.StringIO(output.getvalue()), "jsonl"))[0][1]
+    assert row["user_id"] == "alex"
+    assert row["transportation"] == Transportation.BUS.label
+    assert row["nomeetPeriod"] == NoMeetingPeriod.NONE.label
+
+    # The exported file imports again unchanged.
+    copy = BoundedMemoryStorage()
+    importer = ProfileImporter(copy, VALIDATORS)
+    progress = run(importer.run(read_rows(io.StringIO(output.getvalue()), "jsonl")))
+    assert progress.imported == 1
+
+
+def test_exporter_needs_scan_keys():
+    with pytest.raises(TypeError):
+        ProfileExporter(MemoryStorage())
@@ -0,0 +1,24 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+from .calendar_parsers import CalendarParseError, CsvCalendarParser, ICalendarParser
+from .calendar_store import CalendarStore
+from .free_slots import CandidateSlot, FreeSlotFinder
+from .ingestion import DEFAULT_ATTACHMENT_HOSTS, CalendarIngestionError, CalendarIngestor
+from .intervals import IntervalAccumulator, from_minutes, merge_intervals, to_minutes
+
+__all__ = [
+    "CalendarParseError",
+    "CsvCalendarParser",
+    "ICalendarParser",
+    "CalendarStore",
+    "CandidateSlot",
+    "FreeSlotFinder",
+    "DEFAULT_ATTACHMENT_HOSTS",
+    "CalendarIngestionError",
+    "CalendarIngestor",
+    "IntervalAccumulator",
+    "from_minutes",
+    "merge_intervals",
+    "to_minutes",
+]
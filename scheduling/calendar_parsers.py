@@ -0,0 +1,247 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import codecs
+import csv
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Callable, List
+
+from .intervals import MINUTES_PER_DAY, to_minutes
+
+try:
+    from zoneinfo import ZoneInfo
+except ImportError:  # Python < 3.9
+    ZoneInfo = None
+
+_DURATION = re.compile(
+    r"^(?P<sign>[+-])?P(?:(?P<weeks>\d+)W)?(?:(?P<days>\d+)D)?"
+    r"(?:T(?:(?P<hours>\d+)H)?(?:(?P<minutes>\d+)M)?(?:(?P<seconds>\d+)S)?)?$"
+)
+
+
+class CalendarParseError(ValueError):
+    pass
+
+
+class _LineParser:
+    """Push parser base: feed() raw bytes, get whole text lines back."""
+
+    def __init__(self, on_interval: Callable[[int, int], None]):
+        self.on_interval = on_interval
+        self._decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+        self._partial = ""
+
+    def feed(self, chunk: bytes):
+        text = self._partial + self._decoder.decode(chunk)
+        lines = text.splitlines(keepends=True)
+        # The last piece may be an incomplete line; keep it for the next chunk.
+        self._partial = lines.pop() if lines and not lines[-1].endswith(("\n", "\r")) else ""
+        for line in lines:
+            self._line(line.rstrip("\r\n"))
+
+    def close(self):
+        text = self._partial + self._decoder.decode(b"", final=True)
+        self._partial = ""
+        if text:
+            self._line(text.rstrip("\r\n"))
+        self._finish()
+
+    def _line(self, line: str):
+        raise NotImplementedError()
+
+    def _finish(self):
+        pass
+
+
+class ICalendarParser(_LineParser):
+    """Incremental iCalendar (RFC 5545) VEVENT reader.
+
+    Emits one busy interval per opaque, non-cancelled VEVENT. Recurrence rules
+    are not expanded, so a recurring series contributes its first occurrence
+    only. Times with an unknown TZID are read as UTC.
+    """
+
+    def __init__(self, on_interval: Callable[[int, int], None]):
+        super().__init__(on_interval)
+        self._unfolded = None
+        self._event = None
+
+    def _line(self, line: str):
+        # Lines starting with whitespace continue the previous content line.
+        if line[:1] in (" ", "\t"):
+            if self._unfolded is not None:
+                self._unfolded += line[1:]
+            return
+        if self._unfolded is not None:
+            self._content_line(self._unfolded)
+        self._unfolded = line
+
+    def _finish(self):
+        if self._unfolded is not None:
+            self._content_line(self._unfolded)
+            self._unfolded = None
+
+    def _content_line(self, line: str):
+        name_part, _, value = line.partition(":")
+        name, *raw_params = name_part.split(";")
+        name = name.upper()
+
+        if name == "BEGIN" and value.upper() == "VEVENT":
+            self._event = {}
+        elif name == "END" and value.upper() == "VEVENT":
+            if self._event is not None:
+                self._emit(self._event)
+            self._event = None
+        elif self._event is not None and name in ("DTSTART", "DTEND", "DURATION", "TRANSP", "STATUS"):
+            params = {}
+            for raw_param in raw_params:
+                key, _, param_value = raw_param.partition("=")
+                params[key.upper()] = param_value.strip('"')
+            self._event[name] = (value.strip(), params)
+
+    def _emit(self, event: dict):
+        if "DTSTART" not in event:
+            return
+        if event.get("TRANSP", ("",))[0].upper() == "TRANSPARENT":
+            return
+        if event.get("STATUS", ("",))[0].upper() == "CANCELLED":
+            return
+
+        start, all_day = _parse_ical_time(*event["DTSTART"])
+        if "DTEND" in event:
+            end, _ = _parse_ical_time(*event["DTEND"])
+        elif "DURATION" in event:
+            end = start + _parse_duration(event["DURATION"][0])
+        else:
+            end = start + (MINUTES_PER_DAY if all_day else 0)
+        self.on_interval(start, end)
+
+
+def _parse_ical_time(value: str, params: dict):
+    try:
+        if params.get("VALUE", "").upper() == "DATE" or len(value) == 8:
+            return to_minutes(datetime.strptime(value, "%Y%m%d")), True
+
+        utc = value.endswith("Z")
+        moment = datetime.strptime(value.rstrip("Z"), "%Y%m%dT%H%M%S")
+    except ValueError as error:
+        raise CalendarParseError(f"Invalid date-time '{value}'") from error
+
+    if utc:
+        moment = moment.replace(tzinfo=timezone.utc)
+    elif "TZID" in params and ZoneInfo is not None:
+        try:
+            moment = moment.replace(tzinfo=ZoneInfo(params["TZID"]))
+        except (KeyError, ValueError):
+            pass
+    return to_minutes(moment), False
+
+
+def _parse_duration(value: str) -> int:
+    match = _DURATION.match(value)
+    if not match:
+        raise CalendarParseError(f"Invalid duration '{value}'")
+    parts = {key: int(part or 0) for key, part in match.groupdict().items() if key != "sign"}
+    minutes = int(
+        timedelta(
+            weeks=parts["weeks"],
+            days=parts["days"],
+            hours=parts["hours"],
+            minutes=parts["minutes"],
+            seconds=parts["seconds"],
+        ).total_seconds()
+        // 60
+    )
+    return -minutes if match.group("sign") == "-" else minutes
+
+
+class CsvCalendarParser(_LineParser):
+    """Incremental CSV reader for exported calendars.
+
+    The header must have either ``start``/``end`` columns holding ISO 8601
+    date-times, or the Outlook export columns ``Start Date``, ``Start Time``,
+    ``End Date`` and ``End Time``. An optional ``Show time as`` column with
+    the value ``Free`` skips the row.
+    """
+
+    _DATE_FORMATS = ("%m/%d/%Y", "%Y-%m-%d", "%d.%m.%Y")
+    _TIME_FORMATS = ("%I:%M:%S %p", "%I:%M %p", "%H:%M:%S", "%H:%M")
+
+    def __init__(self, on_interval: Callable[[int, int], None]):
+        super().__init__(on_interval)
+        self._columns = None
+        self._record = ""
+
+    def _line(self, line: str):
+        # A quoted field may contain newlines; wait until the quotes balance.
+        self._record = f"{self._record}\n{line}" if self._record else line
+        if self._record.count('"') % 2:
+            return
+        record, self._record = self._record, ""
+        if not record.strip():
+            return
+
+        row = next(csv.reader([record]))
+        if self._columns is None:
+            self._columns = {name.strip().lower(): index for index, name in enumerate(row)}
+            if not self._has_columns("start", "end") and not self._has_columns(
+                "start date", "start time", "end date", "end time"
+            ):
+                raise CalendarParseError("CSV calendar needs start/end columns")
+            return
+
+        if self._value(row, "show time as").lower() == "free":
+            return
+        if self._has_columns("start", "end"):
+            start = self._parse_iso(self._value(row, "start"))
+            end = self._parse_iso(self._value(row, "end"))
+        else:
+            start = self._parse_split(self._value(row, "start date"), self._value(row, "start time"))
+            end = self._parse_split(self._value(row, "end date"), self._value(row, "end time"))
+        self.on_interval(start, end)
+
+    def _has_columns(self, *names: str) -> bool:
+        return all(name in self._columns for name in names)
+
+    def _value(self, row: List[str], name: str) -> str:
+        index = self._columns.get(name)
+        return row[index].strip() if index is not None and index < len(row) else ""
+
+    @staticmethod
+    def _parse_iso(value: str) -> int:
+        try:
+            return to_minutes(datetime.fromisoformat(value.replace("Z", "+00:00")))
+        except ValueError as error:
+            raise CalendarParseError(f"Invalid date-time '{value}'") from error
+
+    def _parse_split(self, date_value: str, time_value: str) -> int:
+        for date_format in self._DATE_FORMATS:
+            try:
+                day = datetime.strptime(date_value, date_format)
+                break
+            except ValueError:
+                continue
+        else:
+            raise CalendarParseError(f"Invalid date '{date_value}'")
+
+        if not time_value:
+            return to_minutes(day)
+        for time_format in self._TIME_FORMATS:
+            try:
+                moment = datetime.strptime(time_value, time_format)
+                return to_minutes(day.replace(hour=moment.hour, minute=moment.minute))
+            except ValueError:
+                continue
+        raise CalendarParseError(f"Invalid time '{time_value}'")
+
+
+def create_parser(content_type: str, name: str, on_interval: Callable[[int, int], None]):
+    """Pick a parser from the attachment's content type or file name."""
+    content_type = (content_type or "").lower()
+    name = (name or "").lower()
+    if "calendar" in content_type or name.endswith((".ics", ".ical", ".ifb")):
+        return ICalendarParser(on_interval)
+    if "csv" in content_type or name.endswith(".csv"):
+        return CsvCalendarParser(on_interval)
+    return None
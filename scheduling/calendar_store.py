@@ -0,0 +1,40 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+from typing import Dict, List
+
+from botbuilder.core import Storage, TurnContext
+
+from data_models import BusyCalendar
+
+
+class CalendarStore:
+    """Keeps each user's BusyCalendar under its own storage key.
+
+    Calendars are kept out of UserState so ordinary turns do not load them,
+    and so the scheduler can read many users' calendars in one storage read.
+    """
+
+    def __init__(self, storage: Storage):
+        if storage is None:
+            raise TypeError("CalendarStore: storage is required")
+        self.storage = storage
+
+    @staticmethod
+    def get_storage_key(channel_id: str, user_id: str) -> str:
+        return f"{channel_id}/calendars/{user_id}"
+
+    @classmethod
+    def key_for(cls, turn_context: TurnContext) -> str:
+        activity = turn_context.activity
+        return cls.get_storage_key(activity.channel_id, activity.from_property.id)
+
+    async def save(self, key: str, calendar: BusyCalendar):
+        await self.storage.write({key: calendar})
+        calendar.mark_clean()
+
+    async def load(self, key: str) -> BusyCalendar:
+        return (await self.load_many([key])).get(key)
+
+    async def load_many(self, keys: List[str]) -> Dict[str, BusyCalendar]:
+        return await self.storage.read(keys)
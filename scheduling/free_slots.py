@@ -0,0 +1,188 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+from typing import Dict, Iterable, List
+
+
+from data_models import BusyCalendar, NoMeetingPeriod, Slot, Transportation, UserProfile
+
+from .intervals import MINUTES_PER_DAY
+
+SLOT_MINUTES = {
+    Slot.HALF_HOUR: 30,
+    Slot.ONE_HOUR: 60,
+    Slot.TWO_HOURS: 120,
+}
+
+# Time to get to and from a meeting, added around every busy interval.
+TRAVEL_BUFFER_MINUTES = {
+    Transportation.CAR: 15,
+    Transportation.BUS: 20,
+    Transportation.BICYCLE: 10,
+    Transportation.FOOT: 5,
+}
+
+# Local minute-of-day ranges [start, end) that a user keeps free of meetings.
+NO_MEETING_MINUTES = {
+    NoMeetingPeriod.BEFORE_8AM: (0, 8 * 60),
+    NoMeetingPeriod.DURING_LUNCH: (12 * 60, 13 * 60),
+    NoMeetingPeriod.AFTER_5PM: (17 * 60, MINUTES_PER_DAY),
+}
+
+DEFAULT_DURATION = 30
+
+
+class CandidateSlot:
+    def __init__(self, start: int, end: int, attendees: List[str], missing: List[str]):
+        self.start = start
+        self.end = end
+        self.attendees = attendees
+        self.missing = missing
+
+    def __repr__(self):
+        return f"CandidateSlot(start={self.start}, end={self.end}, missing={self.missing})"
+
+
+class FreeSlotFinder:
+    """Finds meeting times for a group of users.
+
+    Time in the search window is cut into ``resolution``-minute cells. Every
+    attendee becomes one row of a boolean busy matrix, built from their busy
+    intervals (padded by their transportation buffer) plus their no-meeting
+    period. A cumulative sum along each row then tells, for every possible
+    start cell at once, which attendees are free for the whole meeting.
+
+    Candidates are ranked by how many attendees can come, then by start
+    time, and overlapping candidates are dropped. Attendees listed in
+    ``required`` must be free in every returned candidate.
+
+    When no duration is given, the meeting lasts the shortest preferred
+    ``meetingSlot`` among the attendees (30 minutes if nobody set one).
+    All times are minutes since the Unix epoch; ``utc_offset`` shifts the
+    daily no-meeting periods into the attendees' local time. Every candidate
+    lies within [window_start, window_end].
+    """
+
+    def __init__(self, resolution: int = 15, utc_offset: int = 0):
+        if resolution <= 0:
+            raise ValueError("[FreeSlotFinder]: resolution must be positive")
+        self.resolution = resolution
+        self.utc_offset = utc_offset
+
+    def find(
+        self,
+        calendars: Dict[str, BusyCalendar],
+        profiles: Dict[str, UserProfile],
+        window_start: int,
+        window_end: int,
+        duration: int = None,
+        required: Iterable[str] = None,
+        max_results: int = 10,
+    ) -> List[CandidateSlot]:
+        attendees = sorted(set(calendars) | set(profiles))
+        if not attendees:
+            return []
+        if duration is None:
+            duration = self.default_duration(profiles.get(user) for user in attendees)
+
+        resolution = self.resolution
+        # Candidates start on a cell boundary inside the window.
+        window_start += (-window_start) % resolution
+        cells = -(-(window_end - window_start) // resolution)
+        length = -(-duration // resolution)
+        if length > cells or window_start + duration > window_end:
+            return []
+
+        import numpy as np  # deferred: only scheduling needs numpy
+
+        busy = self._busy_matrix(attendees, calendars, profiles, window_start, cells)
+
+        # free[u, t]: attendee u has no busy cell in [t, t + length).
+        busy_counts = np.zeros((len(attendees), cells + 1), dtype=np.int32)
+        np.cumsum(busy, axis=1, out=busy_counts[:, 1:])
+        free = (busy_counts[:, length:] - busy_counts[:, :-length]) == 0
+        attendance = free.sum(axis=0)
+
+        # Meetings must also end inside the window.
+        last_start = (window_end - duration - window_start) // resolution
+        valid = (attendance > 0) & (np.arange(free.shape[1]) <= last_start)
+        if required:
+            index = {user: row for row, user in enumerate(attendees)}
+            rows = [index[user] for user in required if user in index]
+            if len(rows) < len(set(required)):
+                return []
+            valid &= free[rows].all(axis=0)
+
+        starts = np.flatnonzero(valid)
+        order = starts[np.lexsort((starts, -attendance[starts]))]
+
+        results = []
+        taken = np.zeros(free.shape[1], dtype=bool)
+        for start in order:
+            if taken[start]:
+                continue
+            taken[max(0, start - length + 1) : start + length] = True
+            column = free[:, start]
+            begin = window_start + int(start) * resolution
+            results.append(
+                CandidateSlot(
+                    begin,
+                    min(begin + duration, window_end),
+                    [user for user, ok in zip(attendees, column) if ok],
+                    [user for user, ok in zip(attendees, column) if not ok],
+                )
+            )
+            if len(results) >= max_results:
+                break
+        return results
+
+    @staticmethod
+    def default_duration(profiles: Iterable[UserProfile]) -> int:
+        preferred = [
+            SLOT_MINUTES[profile.meetingSlot]
+            for profile in profiles
+            if profile is not None and profile.meetingSlot in SLOT_MINUTES
+        ]
+        return min(preferred) if preferred else DEFAULT_DURATION
+
+    def _busy_matrix(self, attendees, calendars, profiles, window_start, cells) -> "np.ndarray":
+        import numpy as np
+
+        resolution = self.resolution
+        rows = []
+        starts = []
+        ends = []
+        for row, user in enumerate(attendees):
+            calendar = calendars.get(user)
+            if calendar is None or not calendar.encoded:
+                continue
+            # The encoding is cumulative: its running sum is start0, end0, start1, ...
+            bounds = np.cumsum(np.asarray(calendar.encoded, dtype=np.int64))
+            profile = profiles.get(user)
+            buffer = TRAVEL_BUFFER_MINUTES.get(profile.transportation, 0) if profile else 0
+            starts.append(bounds[0::2] - buffer)
+            ends.append(bounds[1::2] + buffer)
+            rows.append(np.full(len(bounds) // 2, row))
+
+        # Mark busy cells with +1/-1 at interval edges, then integrate.
+        edges = np.zeros((len(attendees), cells + 1), dtype=np.int32)
+        if starts:
+            rows = np.concatenate(rows)
+            first = (np.concatenate(starts) - window_start) // resolution
+            last = -(-(np.concatenate(ends) - window_start) // resolution)
+            first = np.clip(first, 0, cells)
+            last = np.clip(last, 0, cells)
+            keep = last > first
+            np.add.at(edges, (rows[keep], first[keep]), 1)
+            np.add.at(edges, (rows[keep], last[keep]), -1)
+        busy = np.cumsum(edges[:, :cells], axis=1) > 0
+
+        minute_of_day = (
+            window_start + self.utc_offset + np.arange(cells, dtype=np.int64) * resolution
+        ) % MINUTES_PER_DAY
+        for row, user in enumerate(attendees):
+            profile = profiles.get(user)
+            period = NO_MEETING_MINUTES.get(profile.nomeetPeriod) if profile else None
+            if period is not None:
+                busy[row] |= (minute_of_day + resolution > period[0]) & (minute_of_day < period[1])
+        return busy
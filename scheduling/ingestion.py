@@ -0,0 +1,188 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import asyncio
+import time
+from typing import Iterable
+from urllib.parse import urljoin, urlsplit
+
+import aiohttp
+from botbuilder.schema import Attachment
+from botframework.connector.auth import AppCredentials
+
+from data_models import BusyCalendar
+
+from .calendar_parsers import CalendarParseError, create_parser
+from .intervals import MINUTES_PER_DAY, IntervalAccumulator
+
+
+# Hosts attachments are served from: the Bot Connector and Direct Line, Teams
+# (SharePoint / OneDrive download links), and Direct Line upload blobs.
+DEFAULT_ATTACHMENT_HOSTS = (
+    "*.botframework.com",
+    "smba.trafficmanager.net",
+    "*.skype.com",
+    "*.sharepoint.com",
+    "*.blob.core.windows.net",
+)
+
+# Of those, the ones that expect the bot's connector token. Pre-authorized
+# links (SharePoint, blobs) must not receive it.
+CONNECTOR_HOSTS = ("*.botframework.com", "smba.trafficmanager.net", "*.skype.com")
+
+MAX_REDIRECTS = 3
+
+
+def host_matches(host: str, patterns: Iterable[str]) -> bool:
+    """True when ``host`` equals a pattern or, for ``*.domain``, is below it."""
+    host = (host or "").lower().rstrip(".")
+    for pattern in patterns:
+        pattern = pattern.strip().lower()
+        if pattern.startswith("*."):
+            if host.endswith(pattern[1:]):
+                return True
+        elif pattern and host == pattern:
+            return True
+    return False
+
+
+class CalendarIngestionError(Exception):
+    """The attachment could not be turned into a calendar; safe to show users."""
+
+
+class CalendarIngestor:
+    """Streams a calendar attachment into a compact BusyCalendar.
+
+    The file is downloaded in ``chunk_size`` pieces and each piece is handed
+    to an incremental iCalendar/CSV parser, so neither the raw file nor the
+    full event list is held in memory. Downloads larger than ``max_bytes``
+    are abandoned. Only events inside the window from ``past_days`` ago to
+    ``horizon_days`` ahead are kept.
+
+    Links are only fetched from ``allowed_hosts`` (redirects included), so a
+    user cannot make the bot request arbitrary URLs. Given the turn's
+    connector ``credentials``, requests to Bot Connector hosts carry the
+    bot's token, as channels like Teams and Direct Line require.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 5 * 1024 * 1024,
+        chunk_size: int = 64 * 1024,
+        timeout: float = 30.0,
+        past_days: int = 1,
+        horizon_days: int = 90,
+        allowed_hosts: Iterable[str] = DEFAULT_ATTACHMENT_HOSTS,
+    ):
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self.past_days = past_days
+        self.horizon_days = horizon_days
+        self.allowed_hosts = tuple(allowed_hosts)
+        self._session = None
+
+    async def ingest(
+        self, attachment: Attachment, now: float = None, credentials: AppCredentials = None
+    ) -> BusyCalendar:
+        now_minutes = int(now if now is not None else time.time()) // 60
+        accumulator = IntervalAccumulator(
+            window_start=now_minutes - self.past_days * MINUTES_PER_DAY,
+            window_end=now_minutes + self.horizon_days * MINUTES_PER_DAY,
+        )
+        parser = create_parser(attachment.content_type, attachment.name, accumulator.add)
+        if parser is None:
+            raise CalendarIngestionError(
+                "Please upload an iCalendar (.ics) or CSV (.csv) calendar file."
+            )
+
+        try:
+            if isinstance(attachment.content, str):
+                # Some channels inline small files instead of linking them.
+                content = attachment.content.encode("utf-8")
+                self._check_size(len(content))
+                for start in range(0, len(content), self.chunk_size):
+                    parser.feed(content[start : start + self.chunk_size])
+                    # Let other turns run between chunks.
+                    await asyncio.sleep(0)
+            elif isinstance(attachment.content, dict) and attachment.content.get("downloadUrl"):
+                # Teams file uploads carry a pre-authorized download link.
+                await self._stream(attachment.content["downloadUrl"], parser)
+            elif attachment.content_url:
+                await self._stream(attachment.content_url, parser, credentials)
+            else:
+                raise CalendarIngestionError("The attachment has no content.")
+            parser.close()
+        except CalendarParseError as error:
+            raise CalendarIngestionError(f"I could not read that calendar: {error}.")
+
+        return BusyCalendar.from_intervals(
+            accumulator.result(), source=attachment.name, updated=now_minutes
+        )
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _stream(self, url: str, parser, credentials: AppCredentials = None):
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+
+        try:
+            # Redirects are followed by hand so every hop is checked.
+            for _ in range(MAX_REDIRECTS + 1):
+                headers = await self._headers(url, credentials)
+                request = self._session.get(url, headers=headers, allow_redirects=False)
+                async with request as response:
+                    location = response.headers.get("Location")
+                    if response.status in (301, 302, 303, 307, 308) and location:
+                        url = urljoin(url, location)
+                        continue
+                    await self._read(response, parser)
+                    return
+            raise CalendarIngestionError("Downloading the calendar failed: too many redirects.")
+        except aiohttp.ClientError as error:
+            raise CalendarIngestionError(f"Downloading the calendar failed: {error}.")
+
+    async def _headers(self, url: str, credentials: AppCredentials) -> dict:
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not host_matches(
+            parts.hostname, self.allowed_hosts
+        ):
+            raise CalendarIngestionError("I can only download calendars the channel uploaded.")
+        if (
+            credentials is None
+            or not getattr(credentials, "microsoft_app_id", None)
+            or not host_matches(parts.hostname, CONNECTOR_HOSTS)
+        ):
+            return {}
+        # MSAL caches the token; a refresh is a blocking HTTP call.
+        try:
+            token = await asyncio.get_running_loop().run_in_executor(
+                None, credentials.get_access_token
+            )
+        except PermissionError as error:
+            raise CalendarIngestionError(f"Downloading the calendar failed: {error}.")
+        return {"Authorization": f"Bearer {token}"}
+
+    async def _read(self, response: aiohttp.ClientResponse, parser):
+        if response.status != 200:
+            raise CalendarIngestionError(
+                f"Downloading the calendar failed with status {response.status}."
+            )
+        if response.content_length is not None:
+            self._check_size(response.content_length)
+        received = 0
+        async for chunk in response.content.iter_chunked(self.chunk_size):
+            received += len(chunk)
+            self._check_size(received)
+            parser.feed(chunk)
+
+    def _check_size(self, size: int):
+        if size > self.max_bytes:
+            raise CalendarIngestionError(
+                f"The calendar is larger than the {self.max_bytes // 1024} KB limit."
+            )
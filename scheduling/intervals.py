@@ -0,0 +1,67 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+from datetime import datetime, timezone
+from typing import Iterable, List, Tuple
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def to_minutes(moment: datetime) -> int:
+    """Minutes since the Unix epoch. Naive datetimes are taken as UTC."""
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp()) // 60
+
+
+def from_minutes(minutes: int) -> datetime:
+    return datetime.fromtimestamp(minutes * 60, tz=timezone.utc)
+
+
+def merge_intervals(intervals: Iterable[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Sort intervals and merge the ones that overlap or touch."""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class IntervalAccumulator:
+    """Collects busy intervals from a parser in bounded memory.
+
+    Intervals are clipped to [window_start, window_end) and the raw list is
+    merged every ``compact_every`` additions, so memory grows with the number
+    of distinct busy blocks in the window rather than with the file size.
+    """
+
+    def __init__(self, window_start: int = None, window_end: int = None, compact_every: int = 4096):
+        self.window_start = window_start
+        self.window_end = window_end
+        self.compact_every = compact_every
+        self.events = 0
+        self._intervals = []
+        self._added = 0
+
+    def add(self, start: int, end: int):
+        self.events += 1
+        if self.window_start is not None and start < self.window_start:
+            start = self.window_start
+        if self.window_end is not None and end > self.window_end:
+            end = self.window_end
+        if end <= start:
+            return
+
+        self._intervals.append((start, end))
+        self._added += 1
+        if self._added >= self.compact_every:
+            self._intervals = merge_intervals(self._intervals)
+            self._added = 0
+
+    def result(self) -> List[Tuple[int, int]]:
+        self._intervals = merge_intervals(self._intervals)
+        self._added = 0
+        return self._intervals
@@ -0,0 +1,72 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+from data_models import BusyCalendar, NoMeetingPeriod, Slot, Transportation, UserProfile
+from scheduling import FreeSlotFinder
+
+# Midnight UTC, in minutes since the epoch.
+DAY = 28000000 // 1440 * 1440
+HOUR = 60
+
+
+def busy(*intervals):
+    return BusyCalendar.from_intervals([(DAY + start, DAY + end) for start, end in intervals])
+
+
+def starts(candidates):
+    return [candidate.start - DAY for candidate in candidates]
+
+
+def test_candidates_stay_inside_an_unaligned_window():
+    finder = FreeSlotFinder(resolution=15)
+    calendars = {"alex": BusyCalendar()}
+    candidates = finder.find(calendars, {}, 29000000, 29000100, duration=30)
+    assert candidates
+    for candidate in candidates:
+        assert candidate.start >= 29000000
+        assert candidate.start % 15 == 0
+        assert candidate.end <= 29000100
+
+
+def test_windows_shorter_than_the_meeting_have_no_candidates():
+    finder = FreeSlotFinder()
+    assert finder.find({"alex": BusyCalendar()}, {}, 29000000, 29000035, duration=30) == []
+    assert finder.find({}, {}, 29000000, 29001000) == []
+
+
+def test_times_everyone_can_come_rank_first():
+    finder = FreeSlotFinder()
+    calendars = {"alex": busy((9 * HOUR, 10 * HOUR)), "sam": busy()}
+    candidates = finder.find(calendars, {}, DAY + 9 * HOUR, DAY + 11 * HOUR, duration=30)
+    assert starts(candidates)[:2] == [10 * HOUR, 10 * HOUR + 30]
+    assert candidates[0].attendees == ["alex", "sam"]
+    assert candidates[-1].missing == ["alex"]
+    # Returned candidates do not overlap.
+    ordered = sorted(starts(candidates))
+    assert all(later - earlier >= 30 for earlier, later in zip(ordered, ordered[1:]))
+
+
+def test_required_attendees_must_be_free():
+    finder = FreeSlotFinder()
+    calendars = {"alex": busy((9 * HOUR, 10 * HOUR)), "sam": busy((10 * HOUR, 11 * HOUR))}
+    window = (DAY + 9 * HOUR, DAY + 11 * HOUR)
+    candidates = finder.find(calendars, {}, *window, duration=30, required=["sam"])
+    assert candidates
+    assert all(candidate.start < DAY + 10 * HOUR for candidate in candidates)
+    assert finder.find(calendars, {}, *window, duration=30, required=["nobody"]) == []
+
+
+def test_travel_buffer_and_no_meeting_period_are_respected():
+    finder = FreeSlotFinder()
+    profiles = {
+        "alex": UserProfile(
+            meetingslot=Slot.ONE_HOUR,
+            nomeetperiod=NoMeetingPeriod.DURING_LUNCH,
+            transportation=Transportation.BUS,
+        )
+    }
+    calendars = {"alex": busy((9 * HOUR, 10 * HOUR))}
+    candidates = finder.find(calendars, profiles, DAY + 9 * HOUR, DAY + 14 * HOUR)
+    # A one hour meeting (the preferred slot) after the bus ride, or after lunch.
+    assert starts(candidates) == [10 * HOUR + 30, 13 * HOUR]
+    assert candidates[0].end - candidates[0].start == HOUR
@@ -0,0 +1,121 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import asyncio
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from botbuilder.schema import Attachment
+
+from scheduling import CalendarIngestionError, CalendarIngestor
+from scheduling.ingestion import host_matches
+
+NOW = 1700000000
+ICS = (
+    "BEGIN:VCALENDAR\r\n"
+    "BEGIN:VEVENT\r\n"
+    "DTSTART:20231115T090000Z\r\n"
+    "DTEND:20231115T100000Z\r\n"
+    "END:VEVENT\r\n"
+    "END:VCALENDAR\r\n"
+)
+ICS_START = 1700038800 // 60
+
+
+class FakeCredentials:
+    microsoft_app_id = "app-id"
+
+    def get_access_token(self):
+        return "token"
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+async def download(handler, credentials=None):
+    # Serves every path with ``handler`` and ingests a link to it.
+    app = web.Application()
+    app.router.add_route("GET", "/{name:.*}", handler)
+    ingestor = CalendarIngestor(allowed_hosts=["127.0.0.1"])
+    try:
+        async with TestServer(app, host="127.0.0.1") as server:
+            attachment = Attachment(name="work.ics", content_url=str(server.make_url("/work.ics")))
+            return await ingestor.ingest(attachment, now=NOW, credentials=credentials)
+    finally:
+        await ingestor.close()
+
+
+def test_host_matches():
+    patterns = ("*.botframework.com", "smba.trafficmanager.net")
+    assert host_matches("directline.botframework.com", patterns)
+    assert host_matches("SMBA.trafficmanager.net.", patterns)
+    assert not host_matches("botframework.com.evil.example", patterns)
+    assert not host_matches("evilbotframework.com", patterns)
+    assert not host_matches(None, patterns)
+
+
+def test_inline_content_is_parsed_in_chunks():
+    ingestor = CalendarIngestor(chunk_size=16)
+    attachment = Attachment(content_type="text/calendar", name="work.ics", content=ICS)
+    calendar = run(ingestor.ingest(attachment, now=NOW))
+    assert calendar.intervals == [(ICS_START, ICS_START + 60)]
+    assert calendar.source == "work.ics"
+
+
+def test_unknown_types_and_large_files_are_rejected():
+    ingestor = CalendarIngestor(max_bytes=10)
+    with pytest.raises(CalendarIngestionError):
+        run(ingestor.ingest(Attachment(content_type="image/png", content="x"), now=NOW))
+    with pytest.raises(CalendarIngestionError):
+        run(ingestor.ingest(Attachment(name="work.ics", content=ICS), now=NOW))
+
+
+def test_links_outside_the_allowed_hosts_are_not_fetched():
+    async def ingest():
+        ingestor = CalendarIngestor()
+        try:
+            attachment = Attachment(name="work.ics", content_url="http://169.254.169.254/latest")
+            return await ingestor.ingest(attachment, now=NOW)
+        finally:
+            await ingestor.close()
+
+    with pytest.raises(CalendarIngestionError):
+        run(ingest())
+
+
+def test_downloads_from_allowed_hosts():
+    async def handler(request):
+        assert "Authorization" not in request.headers
+        return web.Response(text=ICS)
+
+    calendar = run(download(handler, credentials=FakeCredentials()))
+    assert calendar.intervals == [(ICS_START, ICS_START + 60)]
+
+
+def test_redirects_to_other_hosts_are_rejected():
+    async def handler(request):
+        raise web.HTTPFound("http://169.254.169.254/latest")
+
+    with pytest.raises(CalendarIngestionError, match="channel uploaded"):
+        run(download(handler))
+
+
+def test_redirect_loops_are_cut_short():
+    async def handler(request):
+        raise web.HTTPFound("/again")
+
+    with pytest.raises(CalendarIngestionError, match="too many redirects"):
+        run(download(handler))
+
+
+def test_token_is_only_sent_to_connector_hosts():
+    ingestor = CalendarIngestor()
+    credentials = FakeCredentials()
+    connector = run(ingestor._headers("https://smba.trafficmanager.net/file", credentials))
+    sharepoint = run(ingestor._headers("https://contoso.sharepoint.com/file", credentials))
+    anonymous = run(ingestor._headers("https://smba.trafficmanager.net/file", None))
+    assert connector == {"Authorization": "Bearer token"}
+    assert sharepoint == {}
+    assert anonymous == {}
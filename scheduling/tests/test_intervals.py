@@ -0,0 +1,38 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+from datetime import datetime, timezone
+
+from data_models import BusyCalendar
+from scheduling import IntervalAccumulator, from_minutes, merge_intervals, to_minutes
+
+
+def test_minutes_round_trip():
+    moment = datetime(2024, 3, 1, 9, 30, tzinfo=timezone.utc)
+    assert from_minutes(to_minutes(moment)) == moment
+    # Naive datetimes are UTC.
+    assert to_minutes(moment.replace(tzinfo=None)) == to_minutes(moment)
+
+
+def test_merge_intervals_joins_overlapping_and_touching():
+    assert merge_intervals([(30, 40), (0, 10), (10, 20), (35, 50), (60, 70)]) == [
+        (0, 20),
+        (30, 50),
+        (60, 70),
+    ]
+
+
+def test_accumulator_clips_to_the_window_and_compacts():
+    accumulator = IntervalAccumulator(window_start=100, window_end=200, compact_every=2)
+    for start, end in [(50, 120), (150, 160), (155, 170), (190, 300), (300, 400)]:
+        accumulator.add(start, end)
+    assert accumulator.events == 5
+    assert accumulator.result() == [(100, 120), (150, 170), (190, 200)]
+
+
+def test_busy_calendar_is_delta_encoded():
+    intervals = [(28000000, 28000060), (28000090, 28000120)]
+    calendar = BusyCalendar.from_intervals(intervals, source="work.ics", updated=1)
+    assert calendar.encoded == [28000000, 60, 30, 30]
+    assert calendar.intervals == intervals
+    assert len(calendar) == 2
@@ -0,0 +1,8 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+from .bounded_memory_storage import BoundedMemoryStorage
+from .factory import create_storage
+from .sqlite_storage import SqliteStorage
+
+__all__ = ["BoundedMemoryStorage", "SqliteStorage", "create_storage"]
@@ -0,0 +1,213 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import pickle
+import re
+import time
+import zlib
+from collections import OrderedDict
+from copy import copy
+from typing import AsyncIterator, Dict, List
+
+from botbuilder.core import Storage, StoreItem
+
+from .sqlite_storage import _get_e_tag, _set_e_tag
+
+# Rough per-entry cost of the key, tuple and dict slot on top of the payload.
+ENTRY_OVERHEAD = 200
+
+
+def _like_pattern(like: str):
+    # SQL LIKE as SQLite applies it: % and _ wildcards, ASCII case-insensitive.
+    parts = ("." if char == "_" else ".*" if char == "%" else re.escape(char) for char in like)
+    return re.compile("".join(parts), re.IGNORECASE | re.DOTALL)
+
+
+class _Shard:
+    __slots__ = ("conversations", "others", "bytes")
+
+    def __init__(self):
+        # key -> (payload, e_tag, last access); least recently used first.
+        self.conversations = OrderedDict()
+        self.others = OrderedDict()
+        self.bytes = 0
+
+
+class BoundedMemoryStorage(Storage):
+    """Process-local Storage with an idle timeout and a memory budget.
+
+    A drop-in replacement for MemoryStorage (same e_tag rules) that does not
+    grow without bound. Items are kept pickled, which both measures their
+    size and gives every read its own copy. Keys are spread over ``shards``
+    LRU shards, each holding ``max_bytes / shards`` bytes at most; writing
+    to a full shard evicts its least recently used items. Conversation state
+    (keys containing ``/conversations/``) that has not been read or written
+    for ``idle_ttl`` seconds is dropped; each write also sweeps one shard in
+    turn, so idle conversations are reclaimed even if never touched again.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 256 * 1024 * 1024,
+        idle_ttl: float = 24 * 60 * 60,
+        shards: int = 16,
+        clock=time.monotonic,
+    ):
+        super(BoundedMemoryStorage, self).__init__()
+        if max_bytes <= 0:
+            raise ValueError("BoundedMemoryStorage: max_bytes must be positive")
+        if shards <= 0:
+            raise ValueError("BoundedMemoryStorage: shards must be positive")
+
+        self.max_bytes = max_bytes
+        self.idle_ttl = idle_ttl
+        self._shard_budget = max_bytes // shards
+        self._shards = [_Shard() for _ in range(shards)]
+        self._sweep_next = 0
+        self._clock = clock
+        self._e_tag = 0
+
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return sum(len(shard.conversations) + len(shard.others) for shard in self._shards)
+
+    async def read(self, keys: List[str]):
+        data = {}
+        if not keys:
+            return data
+
+        now = self._clock()
+        for key in keys:
+            shard, entries = self._locate(key)
+            entry = entries.get(key)
+            if entry is None:
+                continue
+            if self._expired(entries, shard, entry, now):
+                self._remove(shard, entries, key)
+                self.expirations += 1
+                continue
+            entries[key] = (entry[0], entry[1], now)
+            entries.move_to_end(key)
+            data[key] = pickle.loads(entry[0])
+        return data
+
+    async def write(self, changes: Dict[str, StoreItem]):
+        if changes is None:
+            raise Exception("Changes are required when writing")
+        if not changes:
+            return
+
+        now = self._clock()
+        for key, change in changes.items():
+            shard, entries = self._locate(key)
+            old_entry = entries.get(key)
+            old_state_etag = old_entry[1] if old_entry is not None else None
+
+            new_value_etag = _get_e_tag(change)
+            if new_value_etag == "":
+                raise Exception("bounded_memory_storage.write(): etag missing")
+            if (
+                old_state_etag is not None
+                and new_value_etag is not None
+                and new_value_etag != "*"
+                and new_value_etag != old_state_etag
+            ):
+                raise KeyError(
+                    "Etag conflict.\nOriginal: %s\r\nCurrent: %s"
+                    % (new_value_etag, old_state_etag)
+                )
+
+            # If the original object didn't have an e_tag, don't set one (C# behavior)
+            new_state = change
+            if old_state_etag:
+                new_state = copy(change)
+                _set_e_tag(new_state, str(self._e_tag))
+            self._e_tag += 1
+
+            payload = pickle.dumps(new_state, pickle.HIGHEST_PROTOCOL)
+            if old_entry is not None:
+                self._remove(shard, entries, key)
+            entries[key] = (payload, _get_e_tag(new_state), now)
+            shard.bytes += len(payload) + ENTRY_OVERHEAD
+            self._evict(shard, key)
+
+        self._sweep(now)
+
+    async def delete(self, keys: List[str]):
+        for key in keys:
+            shard, entries = self._locate(key)
+            if key in entries:
+                self._remove(shard, entries, key)
+
+    async def scan_keys(self, like: str = "%", page_size: int = 1000) -> AsyncIterator[str]:
+        """Yield the stored keys matching the SQL LIKE pattern, in key order.
+
+        Same contract as SqliteStorage.scan_keys(); the matching keys are
+        listed up front, and scanning does not count as a use for eviction.
+        """
+        pattern = _like_pattern(like)
+        now = self._clock()
+        keys = sorted(
+            key
+            for shard in self._shards
+            for entries in (shard.conversations, shard.others)
+            for key, entry in entries.items()
+            if pattern.fullmatch(key) and not self._expired(entries, shard, entry, now)
+        )
+        for key in keys:
+            yield key
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self),
+            "bytes": sum(shard.bytes for shard in self._shards),
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+    def _locate(self, key: str):
+        shard = self._shards[zlib.crc32(key.encode("utf-8")) % len(self._shards)]
+        return shard, shard.conversations if "/conversations/" in key else shard.others
+
+    def _expired(self, entries, shard: _Shard, entry, now: float) -> bool:
+        return (
+            entries is shard.conversations
+            and self.idle_ttl > 0
+            and now - entry[2] > self.idle_ttl
+        )
+
+    @staticmethod
+    def _remove(shard: _Shard, entries, key: str):
+        payload = entries.pop(key)[0]
+        shard.bytes -= len(payload) + ENTRY_OVERHEAD
+
+    def _evict(self, shard: _Shard, keep: str):
+        # Drop the least recently used item of either kind until the shard
+        # fits, but never the item that was just written.
+        while shard.bytes > self._shard_budget:
+            candidates = [
+                entries
+                for entries in (shard.conversations, shard.others)
+                if entries and next(iter(entries)) != keep
+            ]
+            if not candidates:
+                return
+            entries = min(candidates, key=lambda entries: next(iter(entries.values()))[2])
+            self._remove(shard, entries, next(iter(entries)))
+            self.evictions += 1
+
+    def _sweep(self, now: float):
+        if self.idle_ttl <= 0:
+            return
+        shard = self._shards[self._sweep_next]
+        self._sweep_next = (self._sweep_next + 1) % len(self._shards)
+        entries = shard.conversations
+        while entries:
+            key, entry = next(iter(entries.items()))
+            if now - entry[2] <= self.idle_ttl:
+                break
+            self._remove(shard, entries, key)
+            self.expirations += 1
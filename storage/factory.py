@@ -0,0 +1,31 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+from botbuilder.core import Storage
+
+from .bounded_memory_storage import BoundedMemoryStorage
+from .sqlite_storage import SqliteStorage
+
+
+def create_storage(config) -> Storage:
+    """The state storage ``config`` (a DefaultConfig) selects."""
+    # With several workers any of them may serve the next turn of a
+    # conversation, so state must be shared and never cached per process.
+    shared = config.WORKERS > 1
+    if config.STATE_STORAGE == "sqlite":
+        return SqliteStorage(
+            config.STATE_STORAGE_PATH,
+            flush_interval=config.STATE_STORAGE_FLUSH_INTERVAL,
+            cache_size=0 if shared else 10000,
+            write_through=shared,
+        )
+    if config.STATE_STORAGE == "memory":
+        if shared:
+            raise ValueError(
+                "Workers > 1 needs a shared state storage; set StateStorage=sqlite"
+            )
+        return BoundedMemoryStorage(
+            max_bytes=config.STATE_MEMORY_BUDGET_MB * 1024 * 1024,
+            idle_ttl=config.STATE_IDLE_TTL_SECONDS,
+        )
+    raise ValueError(f"Unknown state storage: {config.STATE_STORAGE}")
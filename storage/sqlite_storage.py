@@ -0,0 +1,418 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import asyncio
+import json
+import sqlite3
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from copy import deepcopy
+from typing import AsyncIterator, Dict, List
+
+from botbuilder.core import Storage, StoreItem
+from jsonpickle.pickler import Pickler
+from jsonpickle.unpickler import Unpickler
+
+# Marks a key as known to be absent (deleted or never written) in the caches.
+_ABSENT = object()
+
+
+def _get_e_tag(item):
+    if isinstance(item, dict):
+        return item.get("e_tag", None)
+    return getattr(item, "e_tag", None)
+
+
+def _set_e_tag(item, e_tag: str):
+    if isinstance(item, dict):
+        item["e_tag"] = e_tag
+    else:
+        item.e_tag = e_tag
+
+
+class SqliteStorage(Storage):
+    """Disk-backed Storage with write-behind group commits and a hot read cache.
+
+    Writes update the in-memory cache immediately and are persisted by a
+    background flush that commits every pending change in one transaction,
+    either after ``flush_interval`` seconds or once ``max_batch`` keys are
+    pending. Repeated writes to the same key inside one interval collapse into
+    a single row update. A crash can lose at most the last unflushed interval;
+    call ``flush()`` or ``close()`` on shutdown to persist everything.
+
+    The database runs in WAL mode so readers in other processes are never
+    blocked by the group commit. All SQLite calls happen on one dedicated
+    thread, keeping the event loop free of disk I/O.
+
+    When several processes share the database (multi-worker serving), pass
+    ``cache_size=0`` and ``write_through=True``: every read then goes to the
+    database, and every write is checked and committed in one ``BEGIN
+    IMMEDIATE`` transaction before it returns, so the next turn of a
+    conversation sees it whichever worker serves it and e_tag conflicts
+    between workers are detected.
+
+    Each row keeps its e_tag in a column of its own. New e_tags come from a
+    counter stored in the database, so they are unique across processes
+    and restarts.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        flush_interval: float = 0.05,
+        max_batch: int = 512,
+        cache_size: int = 10000,
+        write_through: bool = False,
+    ):
+        super(SqliteStorage, self).__init__()
+        if not path:
+            raise TypeError("SqliteStorage: path is required")
+
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.cache_size = cache_size
+        self.write_through = write_through
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="sqlite-storage"
+        )
+        self._connection = None
+        self._cache = OrderedDict()
+        # key -> (serialized payload, e_tag), or None for a pending delete.
+        self._pending: Dict[str, tuple] = {}
+        # Next e_tag in cached mode; loaded from the database counter.
+        self._e_tag = None
+        self._flush_handle = None
+        self._flush_task = None
+        self._closed = False
+
+        self.commits = 0
+        self.rows_written = 0
+
+    async def read(self, keys: List[str]):
+        data = {}
+        if not keys:
+            return data
+
+        missing = []
+        for key in keys:
+            value = self._lookup(key)
+            if value is None:
+                missing.append(key)
+            elif value is not _ABSENT:
+                data[key] = deepcopy(value)
+
+        if missing:
+            rows = await self._run(self._select, missing)
+            for key in missing:
+                # A write may have landed while the select was running.
+                value = self._lookup(key)
+                if value is None:
+                    payload = rows.get(key)
+                    value = _ABSENT if payload is None else self._deserialize(payload)
+                    self._remember(key, value)
+                if value is not _ABSENT:
+                    data[key] = deepcopy(value)
+
+        return data
+
+    async def write(self, changes: Dict[str, StoreItem]):
+        if changes is None:
+            raise Exception("Changes are required when writing")
+        if not changes:
+            return
+
+        if self.write_through:
+            states = {key: deepcopy(change) for key, change in changes.items()}
+            written = await self._run(self._write_checked, states)
+            for key, new_state in written.items():
+                self._remember(key, new_state)
+            return
+
+        if self._e_tag is None:
+            counter = await self._run(self._read_e_tag_counter)
+            if self._e_tag is None:
+                self._e_tag = counter + 1
+
+        unknown = [key for key in changes if self._lookup(key) is None]
+        if unknown:
+            # Needed for e_tag checks against rows that are not cached yet.
+            await self.read(unknown)
+
+        for key, change in changes.items():
+            new_state = deepcopy(change)
+            old_state = self._lookup(key)
+            old_state_etag = None
+            if old_state is not None and old_state is not _ABSENT:
+                old_state_etag = _get_e_tag(old_state)
+
+            new_value_etag = _get_e_tag(new_state)
+            if new_value_etag == "":
+                raise Exception("sqlite_storage.write(): etag missing")
+            if (
+                old_state_etag is not None
+                and new_value_etag is not None
+                and new_value_etag != "*"
+                and new_value_etag != old_state_etag
+            ):
+                raise KeyError(
+                    "Etag conflict.\nOriginal: %s\r\nCurrent: %s"
+                    % (new_value_etag, old_state_etag)
+                )
+
+            # If the original object didn't have an e_tag, don't set one (C# behavior)
+            if old_state_etag:
+                _set_e_tag(new_state, str(self._e_tag))
+            self._e_tag += 1
+
+            self._remember(key, new_state)
+            self._pending[key] = (self._serialize(new_state), _get_e_tag(new_state))
+
+        await self._after_change()
+
+    async def delete(self, keys: List[str]):
+        for key in keys:
+            self._remember(key, _ABSENT)
+            self._pending[key] = None
+        await self._after_change()
+
+    async def scan_keys(self, like: str = "%", page_size: int = 1000) -> AsyncIterator[str]:
+        """Yield the stored keys matching the SQL LIKE pattern, in key order.
+
+        Pending writes are committed first. Keys are fetched ``page_size`` at
+        a time, so scanning a large table holds one page in memory.
+        """
+        await self.flush()
+        after = ""
+        while True:
+            page = await self._run(self._select_keys, like, after, page_size)
+            for key in page:
+                yield key
+            if len(page) < page_size:
+                return
+            after = page[-1]
+
+    async def flush(self):
+        """Commit every pending change now."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._flush_task is not None and not self._flush_task.done():
+            # Let an in-progress background commit land first.
+            await asyncio.shield(self._flush_task)
+        await self._commit_pending()
+
+    async def close(self):
+        if self._closed:
+            return
+        await self.flush()
+        await self._run(self._close_connection)
+        self._closed = True
+        self._executor.shutdown(wait=True)
+
+    def _lookup(self, key: str):
+        """Return the freshest known value, _ABSENT, or None if unknown."""
+        if key in self._pending:
+            pending = self._pending[key]
+            if key in self._cache:
+                return self._cache[key]
+            return _ABSENT if pending is None else self._deserialize(pending[0])
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+        return None
+
+    def _remember(self, key: str, value):
+        if self.cache_size <= 0:
+            return
+        self._cache[key] = value
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def _after_change(self):
+        if self.write_through:
+            await self.flush()
+        else:
+            self._schedule_flush()
+
+    def _schedule_flush(self):
+        if len(self._pending) >= self.max_batch:
+            self._start_flush()
+        elif self._flush_handle is None and self._pending:
+            loop = asyncio.get_event_loop()
+            self._flush_handle = loop.call_later(self.flush_interval, self._start_flush)
+
+    def _start_flush(self):
+        self._flush_handle = None
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.ensure_future(self._background_flush())
+
+    async def _background_flush(self):
+        try:
+            await self._commit_pending()
+        except sqlite3.Error:
+            # The batch was re-queued; try again on the next interval.
+            if self._flush_handle is None:
+                loop = asyncio.get_event_loop()
+                self._flush_handle = loop.call_later(
+                    self.flush_interval, self._start_flush
+                )
+
+    async def _commit_pending(self):
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, {}
+        try:
+            await self._run(self._commit, batch)
+        except Exception:
+            # Put the batch back unless a newer write superseded a key.
+            for key, pending in batch.items():
+                self._pending.setdefault(key, pending)
+            raise
+
+    async def _run(self, func, *args):
+        if self._closed:
+            raise RuntimeError("SqliteStorage: storage is closed")
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    @staticmethod
+    def _serialize(item) -> str:
+        return json.dumps(Pickler().flatten(item), separators=(",", ":"))
+
+    @staticmethod
+    def _deserialize(payload: str):
+        return Unpickler().restore(json.loads(payload))
+
+    # The methods below only ever run on the storage thread.
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            # Other worker processes may hold the write lock briefly.
+            connection = sqlite3.connect(self.path, timeout=10.0, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS state "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, e_tag TEXT)"
+            )
+            columns = [row[1] for row in connection.execute("PRAGMA table_info(state)")]
+            if "e_tag" not in columns:
+                # Databases written before e_tags had a column of their own.
+                connection.execute("ALTER TABLE state ADD COLUMN e_tag TEXT")
+                connection.execute("UPDATE state SET e_tag = json_extract(value, '$.e_tag')")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS e_tag_counter "
+                "(id INTEGER PRIMARY KEY CHECK (id = 0), value INTEGER NOT NULL)"
+            )
+            connection.execute("INSERT OR IGNORE INTO e_tag_counter (id, value) VALUES (0, 0)")
+            connection.commit()
+            self._connection = connection
+        return self._connection
+
+    def _select(self, keys: List[str]) -> Dict[str, str]:
+        connection = self._connect()
+        rows = {}
+        # Stay well below SQLITE_MAX_VARIABLE_NUMBER.
+        for start in range(0, len(keys), 500):
+            chunk = keys[start : start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            cursor = connection.execute(
+                f"SELECT key, value FROM state WHERE key IN ({placeholders})", chunk
+            )
+            rows.update(cursor.fetchall())
+        return rows
+
+    def _select_keys(self, like: str, after: str, limit: int) -> List[str]:
+        cursor = self._connect().execute(
+            "SELECT key FROM state WHERE key > ? AND key LIKE ? ORDER BY key LIMIT ?",
+            (after, like, limit),
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+    def _commit(self, batch: Dict[str, tuple]):
+        connection = self._connect()
+        upserts = [(key, *pending) for key, pending in batch.items() if pending is not None]
+        deletes = [(key,) for key, pending in batch.items() if pending is None]
+        with connection:
+            if upserts:
+                connection.executemany(
+                    "INSERT INTO state (key, value, e_tag) VALUES (?, ?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET value = excluded.value, e_tag = excluded.e_tag",
+                    upserts,
+                )
+            if deletes:
+                connection.executemany("DELETE FROM state WHERE key = ?", deletes)
+            # Keep the stored counter ahead of every e_tag handed out here.
+            connection.execute(
+                "UPDATE e_tag_counter SET value = MAX(value, ?) WHERE id = 0", (self._e_tag or 0,)
+            )
+        self.commits += 1
+        self.rows_written += len(batch)
+
+    def _read_e_tag_counter(self) -> int:
+        return self._connect().execute(
+            "SELECT value FROM e_tag_counter WHERE id = 0"
+        ).fetchone()[0]
+
+    def _write_checked(self, changes: Dict[str, StoreItem]) -> Dict[str, StoreItem]:
+        # Write-through mode: compare and write every change in one
+        # transaction that holds the write lock, so no other process can
+        # commit in between. A conflict rolls the whole batch back.
+        connection = self._connect()
+        written = {}
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            for key, new_state in changes.items():
+                row = connection.execute(
+                    "SELECT e_tag FROM state WHERE key = ?", (key,)
+                ).fetchone()
+                old_state_etag = row[0] if row is not None else None
+
+                new_value_etag = _get_e_tag(new_state)
+                if new_value_etag == "":
+                    raise Exception("sqlite_storage.write(): etag missing")
+                if (
+                    old_state_etag is not None
+                    and new_value_etag is not None
+                    and new_value_etag != "*"
+                    and new_value_etag != old_state_etag
+                ):
+                    raise KeyError(
+                        "Etag conflict.\nOriginal: %s\r\nCurrent: %s"
+                        % (new_value_etag, old_state_etag)
+                    )
+
+                # If the original object didn't have an e_tag, don't set one (C# behavior)
+                if old_state_etag:
+                    connection.execute("UPDATE e_tag_counter SET value = value + 1 WHERE id = 0")
+                    counter = connection.execute(
+                        "SELECT value FROM e_tag_counter WHERE id = 0"
+                    ).fetchone()[0]
+                    _set_e_tag(new_state, str(counter))
+
+                payload = self._serialize(new_state)
+                if row is None:
+                    connection.execute(
+                        "INSERT INTO state (key, value, e_tag) VALUES (?, ?, ?)",
+                        (key, payload, _get_e_tag(new_state)),
+                    )
+                else:
+                    cursor = connection.execute(
+                        "UPDATE state SET value = ?, e_tag = ? WHERE key = ? AND e_tag IS ?",
+                        (payload, _get_e_tag(new_state), key, old_state_etag),
+                    )
+                    if cursor.rowcount != 1:
+                        raise KeyError(f"Etag conflict.\nKey: {key}")
+                written[key] = new_state
+        self.commits += 1
+        self.rows_written += len(written)
+        return written
+
+    def _close_connection(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
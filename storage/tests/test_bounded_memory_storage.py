@@ -0,0 +1,104 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import asyncio
+
+import pytest
+
+from storage import BoundedMemoryStorage
+
+PADDING = "x" * 1000
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_least_recently_used_items_are_evicted():
+    async def scenario():
+        # One shard with room for two items.
+        storage = BoundedMemoryStorage(max_bytes=3000, shards=1)
+        await storage.write({"a": {"padding": PADDING}, "b": {"padding": PADDING}})
+        await storage.read(["a"])
+        await storage.write({"c": {"padding": PADDING}})
+        return await storage.read(["a", "b", "c"]), storage.stats()
+
+    items, stats = run(scenario())
+    assert sorted(items) == ["a", "c"]
+    assert stats["evictions"] == 1
+    assert stats["bytes"] <= stats["max_bytes"]
+
+
+def test_idle_conversations_expire():
+    clock = Clock()
+
+    async def scenario():
+        storage = BoundedMemoryStorage(idle_ttl=60, shards=1, clock=clock)
+        await storage.write(
+            {"test/conversations/idle": {"value": 1}, "test/users/alex": {"value": 2}}
+        )
+        clock.now = 30
+        await storage.write({"test/conversations/active": {"value": 3}})
+        clock.now = 61
+        # A write sweeps the shard; only idle conversation state goes.
+        await storage.write({"test/conversations/active": {"value": 4}})
+        return storage
+
+    storage = run(scenario())
+    assert len(storage) == 2
+    assert storage.stats()["expirations"] == 1
+    items = run(storage.read(["test/conversations/idle", "test/users/alex"]))
+    assert list(items) == ["test/users/alex"]
+
+
+def test_expired_items_are_not_read():
+    clock = Clock()
+
+    async def scenario():
+        storage = BoundedMemoryStorage(idle_ttl=60, clock=clock)
+        await storage.write({"test/conversations/c": {"value": 1}})
+        clock.now = 61
+        return await storage.read(["test/conversations/c"])
+
+    assert run(scenario()) == {}
+
+
+def test_reads_return_copies_and_e_tags_are_checked():
+    async def scenario():
+        storage = BoundedMemoryStorage()
+        await storage.write({"key": {"value": 0, "e_tag": "*"}})
+        await storage.write({"key": {"value": 1, "e_tag": "*"}})
+        first = (await storage.read(["key"]))["key"]
+        first["value"] = 2
+        assert (await storage.read(["key"]))["key"]["value"] == 1
+
+        await storage.write({"key": dict(first)})
+        with pytest.raises(KeyError):
+            await storage.write({"key": first})
+
+    run(scenario())
+
+
+def test_scan_keys_matches_like_patterns():
+    async def scenario():
+        storage = BoundedMemoryStorage()
+        await storage.write(
+            {
+                "test/references/b": {},
+                "test/references/a": {},
+                "test/users/a": {},
+                "test/references_x": {},
+            }
+        )
+        await storage.delete(["test/references/b"])
+        return [key async for key in storage.scan_keys("%/references/%")]
+
+    assert run(scenario()) == ["test/references/a"]
@@ -0,0 +1,147 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import asyncio
+import multiprocessing
+
+import pytest
+
+from storage import SqliteStorage
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_write_read_delete(tmp_path):
+    async def scenario():
+        storage = SqliteStorage(str(tmp_path / "state.db"))
+        await storage.write({"a": {"value": 1}, "b": {"value": 2}})
+        items = await storage.read(["a", "b", "missing"])
+        assert items["a"]["value"] == 1
+        assert items["b"]["value"] == 2
+        assert "missing" not in items
+
+        await storage.delete(["a"])
+        assert await storage.read(["a"]) == {}
+        await storage.close()
+
+    run(scenario())
+
+
+def test_pending_writes_are_persisted_by_close(tmp_path):
+    path = str(tmp_path / "state.db")
+
+    async def write():
+        storage = SqliteStorage(path, flush_interval=60)
+        for value in range(5):
+            # Repeated writes to one key collapse into one row update.
+            await storage.write({"key": {"value": value}})
+        await storage.close()
+
+    async def read():
+        storage = SqliteStorage(path)
+        items = await storage.read(["key"])
+        await storage.close()
+        return items
+
+    run(write())
+    assert run(read())["key"]["value"] == 4
+
+
+def test_reads_return_copies(tmp_path):
+    async def scenario():
+        storage = SqliteStorage(str(tmp_path / "state.db"))
+        await storage.write({"key": {"value": 1}})
+        item = (await storage.read(["key"]))["key"]
+        item["value"] = 2
+        assert (await storage.read(["key"]))["key"]["value"] == 1
+        await storage.close()
+
+    run(scenario())
+
+
+@pytest.mark.parametrize("write_through", [False, True])
+def test_stale_e_tag_is_rejected(tmp_path, write_through):
+    async def scenario():
+        storage = SqliteStorage(
+            str(tmp_path / "state.db"),
+            cache_size=0 if write_through else 100,
+            write_through=write_through,
+        )
+        # Like MemoryStorage, an item stored with an e_tag gets a fresh one
+        # on every write.
+        await storage.write({"key": {"value": 0, "e_tag": "*"}})
+        await storage.write({"key": {"value": 1, "e_tag": "*"}})
+        first = (await storage.read(["key"]))["key"]
+        await storage.write({"key": dict(first)})
+        second = (await storage.read(["key"]))["key"]
+        assert second["e_tag"] != first["e_tag"]
+
+        first["value"] = 2
+        with pytest.raises(KeyError):
+            await storage.write({"key": first})
+        second["value"] = 3
+        await storage.write({"key": second})
+        assert (await storage.read(["key"]))["key"]["value"] == 3
+        await storage.close()
+
+    run(scenario())
+
+
+def test_scan_keys_pages_through_matching_keys(tmp_path):
+    async def scenario():
+        storage = SqliteStorage(str(tmp_path / "state.db"))
+        await storage.write({f"test/references/user{index:03}": {} for index in range(25)})
+        await storage.write({"test/users/someone": {}})
+        keys = [key async for key in storage.scan_keys("%/references/%", page_size=10)]
+        await storage.close()
+        return keys
+
+    keys = run(scenario())
+    assert keys == [f"test/references/user{index:03}" for index in range(25)]
+
+
+def _increment(path: str, times: int):
+    # One worker process: optimistic read-modify-write, retried on conflict.
+    async def scenario():
+        storage = SqliteStorage(path, cache_size=0, write_through=True)
+        done = 0
+        while done < times:
+            item = (await storage.read(["counter"]))["counter"]
+            item["value"] += 1
+            try:
+                await storage.write({"counter": item})
+            except KeyError:
+                continue
+            done += 1
+        await storage.close()
+
+    run(scenario())
+
+
+def test_write_through_loses_no_updates_across_processes(tmp_path):
+    path = str(tmp_path / "state.db")
+
+    async def seed():
+        storage = SqliteStorage(path, cache_size=0, write_through=True)
+        await storage.write({"counter": {"value": 0, "e_tag": "*"}})
+        await storage.write({"counter": {"value": 0, "e_tag": "*"}})
+        await storage.close()
+
+    run(seed())
+    context = multiprocessing.get_context("fork")
+    processes = [context.Process(target=_increment, args=(path, 25)) for _ in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(60)
+        assert process.exitcode == 0
+
+    async def read():
+        storage = SqliteStorage(path, cache_size=0, write_through=True)
+        items = await storage.read(["counter"])
+        await storage.close()
+        return items
+
+    assert run(read())["counter"]["value"] == 100
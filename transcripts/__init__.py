@@ -0,0 +1,33 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+from .reader import TranscriptReader
+from .records import (
+    DELETE_ACTIVITY,
+    INBOUND,
+    OUTBOUND,
+    UPDATE_ACTIVITY,
+    TranscriptRecord,
+    activity_to_wire,
+    delete_marker,
+    update_marker,
+)
+from .replay import RecordedQnAClient, ReplayAdapter, ReplayResult, replay
+from .writer import TranscriptWriter
+
+__all__ = [
+    "TranscriptReader",
+    "INBOUND",
+    "OUTBOUND",
+    "UPDATE_ACTIVITY",
+    "DELETE_ACTIVITY",
+    "TranscriptRecord",
+    "activity_to_wire",
+    "update_marker",
+    "delete_marker",
+    "RecordedQnAClient",
+    "ReplayAdapter",
+    "ReplayResult",
+    "replay",
+    "TranscriptWriter",
+]
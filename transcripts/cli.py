@@ -0,0 +1,102 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+"""Replay recorded transcripts through the bot and compare its replies.
+
+    python -m transcripts.cli transcripts/
+    python -m transcripts.cli transcripts/ --conversation <id>
+    python -m transcripts.cli transcripts/ --list
+    python -m transcripts.cli transcripts/ --dump --conversation <id>
+
+Inbound activities are fed, in recorded order, to a CustomPromptBot with
+fresh in-memory state. For every turn, the replies the bot sends now are
+compared with the ones that were recorded (type, text, attachment types
+and suggested actions). Proactive turns are not replayed. QnA Maker is
+never called: questions the local knowledge base does not answer get the
+answer that was recorded for that turn.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+
+from .reader import TranscriptReader
+from .records import INBOUND
+from .replay import RecordedQnAClient, ReplayAdapter, ReplayResult, replay
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("directory", help="directory holding the transcript segments")
+    parser.add_argument("--conversation", default=None, help="only this conversation id")
+    parser.add_argument("--list", action="store_true", help="list conversations and record counts")
+    parser.add_argument("--dump", action="store_true", help="print the records as JSON lines")
+    return parser.parse_args(argv)
+
+
+async def run_replay(reader: TranscriptReader, conversation_id: str) -> ReplayResult:
+    # Imported here so --list and --dump do not load the bot.
+    from botbuilder.core import ConversationState, MemoryStorage, UserState
+
+    from bots import CustomPromptBot
+    from config import DefaultConfig
+    from middleware import OutboundBatchingMiddleware
+    from scheduling import CalendarStore
+
+    config = DefaultConfig()
+    # Every QnA answer comes from its own turn's recording.
+    config.QNA_CACHE_MAX_SIZE = 0
+    storage = MemoryStorage()
+    qna = RecordedQnAClient()
+    bot = CustomPromptBot(
+        config,
+        ConversationState(storage),
+        UserState(storage),
+        CalendarStore(storage),
+        qna_client=qna,
+    )
+    adapter = ReplayAdapter()
+    if config.OUTBOUND_BATCHING:
+        # Recorded replies were merged the same way.
+        adapter.use(OutboundBatchingMiddleware(merge_text=config.OUTBOUND_MERGE_TEXT))
+    try:
+        # Loads the local knowledge base, so known questions do not go to QnA Maker.
+        await bot.warm_up()
+        return await replay(reader.records(conversation_id), adapter, bot.on_turn, qna=qna)
+    finally:
+        bot.recognizers.close()
+        await bot.qna_client.close()
+        await bot.calendar_ingestor.close()
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    reader = TranscriptReader(args.directory)
+
+    if args.list:
+        for conversation_id, count in sorted(reader.conversations().items()):
+            print(f"{count:8d}  {conversation_id}")
+        return 0
+
+    if args.dump:
+        for record in reader.records(args.conversation):
+            print(
+                json.dumps(
+                    {
+                        "timestamp": record.timestamp,
+                        "direction": "in" if record.direction == INBOUND else "out",
+                        "conversation_id": record.conversation_id,
+                        "activity": record.body(),
+                    }
+                )
+            )
+        return 0
+
+    result = asyncio.run(run_replay(reader, args.conversation))
+    print(json.dumps(result.as_dict(), indent=2))
+    return 1 if result.mismatched or result.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
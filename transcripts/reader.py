@@ -0,0 +1,102 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import heapq
+import mmap
+import os
+import zlib
+from collections import Counter
+from typing import Dict, Iterator, List
+
+from .records import HEADER, MAGIC, SEGMENT_SUFFIX, TranscriptRecord
+
+
+class TranscriptReader:
+    """Reads the segments a TranscriptWriter left in ``directory``.
+
+    Segments are memory-mapped and walked header to header. Filtering by
+    conversation compares the id bytes stored in front of each payload, so
+    records of other conversations are skipped without being decoded.
+    Records from all segments (several processes may have written at once)
+    come out merged in time order. A record that is cut short or fails its
+    checksum ends its segment.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.corrupt_segments = 0
+
+    def segments(self) -> List[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(
+            os.path.join(self.directory, name)
+            for name in os.listdir(self.directory)
+            if name.endswith(SEGMENT_SUFFIX)
+        )
+
+    def records(self, conversation_id: str = None, direction: int = None) -> Iterator[TranscriptRecord]:
+        conversation = conversation_id.encode("utf-8") if conversation_id is not None else None
+        scans = [self._scan(path, conversation, direction) for path in self.segments()]
+        return heapq.merge(*scans, key=lambda record: record.timestamp)
+
+    def conversations(self) -> Dict[str, int]:
+        """Record count per conversation id."""
+        counts = Counter()
+        for path in self.segments():
+            for conversation, _ in self._headers(path):
+                counts[conversation] += 1
+        return {conversation.decode("utf-8"): count for conversation, count in counts.items()}
+
+    def _scan(self, path: str, conversation: bytes, direction: int) -> Iterator[TranscriptRecord]:
+        with open(path, "rb") as stream:
+            size = os.fstat(stream.fileno()).st_size
+            if size <= len(MAGIC):
+                return
+            with mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                if data[: len(MAGIC)] != MAGIC:
+                    self.corrupt_segments += 1
+                    return
+                offset = len(MAGIC)
+                while offset + HEADER.size <= size:
+                    length, crc, timestamp, record_direction, id_length = HEADER.unpack_from(data, offset)
+                    start = offset + HEADER.size
+                    payload_start = start + id_length
+                    end = payload_start + length
+                    if end > size:
+                        self.corrupt_segments += 1
+                        return
+                    offset = end
+                    if direction is not None and record_direction != direction:
+                        continue
+                    if conversation is not None and (
+                        id_length != len(conversation) or data[start:payload_start] != conversation
+                    ):
+                        continue
+                    conversation_id = data[start:payload_start]
+                    payload = data[payload_start:end]
+                    if zlib.crc32(payload, zlib.crc32(conversation_id)) != crc:
+                        self.corrupt_segments += 1
+                        return
+                    yield TranscriptRecord(
+                        timestamp, record_direction, conversation_id.decode("utf-8"), payload
+                    )
+
+    def _headers(self, path: str):
+        # (conversation id bytes, payload length) of every complete record.
+        with open(path, "rb") as stream:
+            size = os.fstat(stream.fileno()).st_size
+            if size <= len(MAGIC):
+                return
+            with mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                if data[: len(MAGIC)] != MAGIC:
+                    return
+                offset = len(MAGIC)
+                while offset + HEADER.size <= size:
+                    length, _, _, _, id_length = HEADER.unpack_from(data, offset)
+                    start = offset + HEADER.size
+                    end = start + id_length + length
+                    if end > size:
+                        return
+                    yield data[start : start + id_length], length
+                    offset = end
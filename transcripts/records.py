@@ -0,0 +1,95 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import json
+import struct
+from datetime import datetime
+from enum import Enum
+
+from botbuilder.schema import Activity, ActivityTypes
+from msrest.serialization import Model
+
+from helpers import parse_activity
+
+# Every segment starts with this; records follow back to back.
+MAGIC = b"BOTLOG\x01\x00"
+# payload length, crc32 of conversation id + payload, unix time, direction,
+# conversation id length. The conversation id and the JSON payload follow.
+HEADER = struct.Struct("<IIdBH")
+SEGMENT_SUFFIX = ".btl"
+
+INBOUND = 0
+OUTBOUND = 1
+
+CONTINUE_CONVERSATION = "ContinueConversation"
+
+# Outbound records of update_activity and delete_activity calls carry these
+# activity types.
+UPDATE_ACTIVITY = "updateActivity"
+DELETE_ACTIVITY = "deleteActivity"
+
+
+def activity_to_wire(value):
+    """Bot Framework (camelCase) JSON form of an Activity, without msrest.
+
+    Walks the models' attribute maps and keeps only the fields that are
+    set; nothing is validated. A LazyActivity's unread fields are skipped,
+    so pass its request JSON instead when there is one.
+    """
+    if isinstance(value, Model):
+        wire = {}
+        for name, attribute in type(value)._attribute_map.items():
+            item = value.__dict__.get(name)
+            if item is not None and item != {}:
+                wire[attribute["key"]] = activity_to_wire(item)
+        return wire
+    if isinstance(value, (list, tuple)):
+        return [activity_to_wire(item) for item in value]
+    if isinstance(value, dict):
+        return {key: activity_to_wire(item) for key, item in value.items()}
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def encode_payload(body: dict) -> bytes:
+    return json.dumps(body, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def update_marker(activity: Activity) -> Activity:
+    """What a transcript records for an update_activity call."""
+    return Activity(
+        type=UPDATE_ACTIVITY,
+        id=activity.id,
+        conversation=activity.conversation,
+        text=activity.text,
+        attachments=activity.attachments,
+        suggested_actions=activity.suggested_actions,
+    )
+
+
+def delete_marker(activity: Activity, reference) -> Activity:
+    """What a transcript records for a delete_activity call in ``activity``'s turn."""
+    return Activity(type=DELETE_ACTIVITY, id=reference.activity_id, conversation=activity.conversation)
+
+
+def is_continuation(body: dict) -> bool:
+    return body.get("type") == ActivityTypes.event and body.get("name") == CONTINUE_CONVERSATION
+
+
+class TranscriptRecord:
+    __slots__ = ("timestamp", "direction", "conversation_id", "payload")
+
+    def __init__(self, timestamp: float, direction: int, conversation_id: str, payload: bytes):
+        self.timestamp = timestamp
+        self.direction = direction
+        self.conversation_id = conversation_id
+        self.payload = payload
+
+    def body(self) -> dict:
+        return json.loads(self.payload)
+
+    def activity(self) -> Activity:
+        return parse_activity(self.payload)
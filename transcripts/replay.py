@@ -0,0 +1,201 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import time
+from typing import Awaitable, Callable, Dict, Iterable, List
+
+from botbuilder.core import BotAdapter, TurnContext
+from botbuilder.schema import Activity, ConversationReference, ResourceResponse
+
+from .records import (
+    INBOUND,
+    OUTBOUND,
+    TranscriptRecord,
+    activity_to_wire,
+    delete_marker,
+    is_continuation,
+    update_marker,
+)
+
+
+def reply_summary(body: dict) -> tuple:
+    """The parts of a reply a replay compares."""
+    actions = (body.get("suggestedActions") or {}).get("actions") or []
+    return (
+        body.get("type"),
+        body.get("text"),
+        tuple(attachment.get("contentType") for attachment in body.get("attachments") or []),
+        tuple(action.get("title") for action in actions),
+    )
+
+
+class ReplayAdapter(BotAdapter):
+    """Runs turns in process and collects what they send instead of posting it."""
+
+    def __init__(self):
+        super(ReplayAdapter, self).__init__()
+        self._replies: List[Activity] = []
+
+    async def process_activity(
+        self, activity: Activity, logic: Callable[[TurnContext], Awaitable]
+    ) -> List[Activity]:
+        self._replies = []
+        context = TurnContext(self, activity)
+        await self.run_pipeline(context, logic)
+        return self._replies
+
+    async def send_activities(
+        self, context: TurnContext, activities: List[Activity]
+    ) -> List[ResourceResponse]:
+        self._replies.extend(activities)
+        return [ResourceResponse(id="") for _ in activities]
+
+    async def update_activity(self, context: TurnContext, activity: Activity):
+        # Collected like a reply, so replays compare updates and deletes too.
+        self._replies.append(update_marker(activity))
+        return ResourceResponse(id=activity.id or "")
+
+    async def delete_activity(self, context: TurnContext, reference: ConversationReference):
+        self._replies.append(delete_marker(context.activity, reference))
+
+
+class RecordedQnAClient:
+    """Stands in for QnAClient during a replay; never calls QnA Maker.
+
+    ``replay()`` hands it each turn's recorded replies before the turn runs,
+    and ``get_answer`` returns the first recorded message text. The bot then
+    sends what the user got at the time, whether that was an answer, "no
+    answer" or the unavailable fallback, so QnA turns only differ when the
+    bot's own logic changed.
+    """
+
+    def __init__(self):
+        self._answer = None
+        self.requests = 0
+
+    def expect(self, replies: List[tuple]):
+        self._answer = next(
+            (text for kind, text, *_ in replies if kind == "message" and text), None
+        )
+
+    async def get_answer(self, question: str):
+        self.requests += 1
+        return self._answer
+
+    async def close(self):
+        pass
+
+    def stats(self) -> dict:
+        return {"requests": self.requests}
+
+
+class ReplayResult:
+    def __init__(self):
+        self.turns = 0
+        self.matched = 0
+        self.mismatched = 0
+        self.errors = 0
+        self.skipped = 0
+        self.started = time.time()
+        self.finished = None
+        # The first mismatches, for a report.
+        self.differences: List[dict] = []
+
+    def as_dict(self) -> dict:
+        end = self.finished if self.finished is not None else time.time()
+        return {
+            "turns": self.turns,
+            "matched": self.matched,
+            "mismatched": self.mismatched,
+            "errors": self.errors,
+            "skipped": self.skipped,
+            "seconds": round(end - self.started, 3),
+            "differences": self.differences,
+        }
+
+
+class _Turn:
+    __slots__ = ("record", "text", "expected", "actual", "error")
+
+    def __init__(self, record: TranscriptRecord, text: str):
+        # None for turns that are not replayed.
+        self.record = record
+        self.text = text
+        self.expected = []
+        self.actual = []
+        self.error = None
+
+
+async def replay(
+    records: Iterable[TranscriptRecord],
+    adapter: ReplayAdapter,
+    logic: Callable[[TurnContext], Awaitable],
+    max_differences: int = 100,
+    qna: RecordedQnAClient = None,
+) -> ReplayResult:
+    """Feed recorded inbound activities to ``logic`` and compare the replies.
+
+    Records must be in time order. The replies recorded after an inbound
+    activity, up to the next inbound one of the same conversation, are
+    the ones that turn is expected to send; a turn runs once they are all
+    known, so ``qna`` can be given them first.
+    """
+    result = ReplayResult()
+    turns: Dict[str, _Turn] = {}
+
+    async def finish(conversation_id: str):
+        turn = turns.pop(conversation_id, None)
+        if turn is None or turn.record is None:
+            return
+        if qna is not None:
+            qna.expect(turn.expected)
+        try:
+            replies = await adapter.process_activity(turn.record.activity(), logic)
+        except Exception as error:  # pylint: disable=broad-except
+            turn.error = f"{type(error).__name__}: {error}"
+        else:
+            turn.actual = [reply_summary(activity_to_wire(reply)) for reply in replies]
+
+        result.turns += 1
+        if turn.error is not None:
+            result.errors += 1
+        elif turn.expected == turn.actual:
+            result.matched += 1
+            return
+        else:
+            result.mismatched += 1
+        if len(result.differences) < max_differences:
+            result.differences.append(
+                {
+                    "conversation_id": conversation_id,
+                    "text": turn.text,
+                    "expected": [list(reply) for reply in turn.expected],
+                    "actual": [list(reply) for reply in turn.actual],
+                    "error": turn.error,
+                }
+            )
+
+    try:
+        for record in records:
+            if record.direction == OUTBOUND:
+                turn = turns.get(record.conversation_id)
+                if turn is not None:
+                    turn.expected.append(reply_summary(record.body()))
+                continue
+            if record.direction != INBOUND:
+                continue
+
+            await finish(record.conversation_id)
+            body = record.body()
+            if is_continuation(body):
+                # Proactive sends depend on the whole store, not this turn.
+                turns[record.conversation_id] = _Turn(None, None)
+                result.skipped += 1
+                continue
+            turns[record.conversation_id] = _Turn(record, body.get("text"))
+
+        for conversation_id in list(turns):
+            await finish(conversation_id)
+    finally:
+        result.finished = time.time()
+    return result
@@ -0,0 +1,123 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import asyncio
+
+from botbuilder.core import TurnContext
+from botbuilder.schema import Activity, ActivityTypes, ChannelAccount, ConversationAccount
+
+from middleware import TranscriptRecorderMiddleware
+from transcripts import (
+    DELETE_ACTIVITY,
+    UPDATE_ACTIVITY,
+    RecordedQnAClient,
+    ReplayAdapter,
+    TranscriptReader,
+    TranscriptWriter,
+    replay,
+)
+
+
+class LiveQnA:
+    """What the bot asked at recording time."""
+
+    def __init__(self):
+        self.answers = {"hours?": "We are open 9 to 5."}
+
+    async def get_answer(self, question: str):
+        return self.answers.get(question)
+
+
+def make_bot(qna, greeting: str = "Hello"):
+    async def logic(context: TurnContext):
+        text = context.activity.text
+        if text == "hi":
+            await context.send_activity(f"{greeting}!")
+        elif text == "edit":
+            response = await context.send_activity("draft")
+            await context.update_activity(
+                Activity(id=response.id, type=ActivityTypes.message, text="final")
+            )
+            await context.delete_activity("old-message")
+        else:
+            answer = await qna.get_answer(text)
+            await context.send_activity(answer or "I don't know that one.")
+
+    return logic
+
+
+def inbound(conversation_id: str, text: str) -> Activity:
+    return Activity(
+        type=ActivityTypes.message,
+        text=text,
+        channel_id="test",
+        service_url="https://example.org",
+        conversation=ConversationAccount(id=conversation_id),
+        from_property=ChannelAccount(id=f"user-{conversation_id}"),
+        recipient=ChannelAccount(id="bot"),
+    )
+
+
+TURNS = [("a", "hi"), ("b", "hours?"), ("a", "edit"), ("b", "parking?"), ("a", "hi")]
+
+
+def record(directory) -> TranscriptReader:
+    async def scenario():
+        writer = TranscriptWriter(str(directory))
+        adapter = ReplayAdapter()
+        adapter.use(TranscriptRecorderMiddleware(writer))
+        logic = make_bot(LiveQnA())
+        for conversation_id, text in TURNS:
+            await adapter.process_activity(inbound(conversation_id, text), logic)
+        writer.close()
+
+    asyncio.run(scenario())
+    return TranscriptReader(str(directory))
+
+
+def test_updates_and_deletes_are_recorded(tmp_path):
+    reader = record(tmp_path)
+    types = [record.body()["type"] for record in reader.records(conversation_id="a")]
+    # hi and its reply, edit and its three outbound records, hi and its reply.
+    assert types == [
+        "message",
+        "message",
+        "message",
+        "message",
+        UPDATE_ACTIVITY,
+        DELETE_ACTIVITY,
+        "message",
+        "message",
+    ]
+
+
+def test_replay_matches_without_calling_qna_maker(tmp_path):
+    reader = record(tmp_path)
+    qna = RecordedQnAClient()
+    result = asyncio.run(replay(reader.records(), ReplayAdapter(), make_bot(qna), qna=qna))
+    assert result.as_dict()["turns"] == len(TURNS)
+    assert result.matched == len(TURNS)
+    # Both QnA turns were answered from the recording.
+    assert qna.requests == 2
+
+
+def test_replay_reports_changed_replies_and_errors(tmp_path):
+    reader = record(tmp_path)
+    qna = RecordedQnAClient()
+    changed = make_bot(qna, greeting="Hi there")
+    result = asyncio.run(
+        replay(reader.records(), ReplayAdapter(), changed, max_differences=1, qna=qna)
+    )
+    assert (result.matched, result.mismatched) == (3, 2)
+    assert len(result.differences) == 1
+    difference = result.differences[0]
+    assert difference["text"] == "hi"
+    assert difference["expected"][0][1] == "Hello!"
+    assert difference["actual"][0][1] == "Hi there!"
+
+    async def failing(context: TurnContext):
+        raise ValueError("bot failed")
+
+    result = asyncio.run(replay(reader.records(), ReplayAdapter(), failing))
+    assert result.errors == len(TURNS)
+    assert result.differences[0]["error"] == "ValueError: bot failed"
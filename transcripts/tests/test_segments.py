@@ -0,0 +1,88 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import os
+
+from botbuilder.schema import Activity, ActivityTypes, ChannelAccount, ConversationAccount
+
+from helpers import parse_activity
+from transcripts import INBOUND, OUTBOUND, TranscriptReader, TranscriptWriter
+
+
+def message(conversation_id: str, text: str) -> Activity:
+    return Activity(
+        type=ActivityTypes.message,
+        text=text,
+        channel_id="test",
+        conversation=ConversationAccount(id=conversation_id),
+        from_property=ChannelAccount(id="user"),
+    )
+
+
+def write(directory, activities, **options) -> TranscriptWriter:
+    writer = TranscriptWriter(str(directory), **options)
+    for direction, activity in activities:
+        assert writer.append(direction, activity)
+    writer.close()
+    return writer
+
+
+def test_records_round_trip_across_segments(tmp_path):
+    activities = [
+        (INBOUND if index % 2 == 0 else OUTBOUND, message(f"c{index % 3}", f"text {index}"))
+        for index in range(30)
+    ]
+    writer = write(tmp_path, activities, segment_bytes=1024)
+    assert writer.segments > 1
+    assert writer.stats()["records"] == 30
+
+    reader = TranscriptReader(str(tmp_path))
+    records = list(reader.records())
+    assert [record.body()["text"] for record in records] == [f"text {i}" for i in range(30)]
+    assert records[0].activity().conversation.id == "c0"
+    assert reader.conversations() == {"c0": 10, "c1": 10, "c2": 10}
+
+    inbound = list(reader.records(conversation_id="c1", direction=INBOUND))
+    assert [record.body()["text"] for record in inbound] == [f"text {i}" for i in (4, 10, 16, 22, 28)]
+    assert reader.corrupt_segments == 0
+
+
+def test_lazy_activities_are_recorded_from_their_request_json(tmp_path):
+    body = b'{"type":"message","text":"hi","conversation":{"id":"c"},"customField":1}'
+    write(tmp_path, [(INBOUND, parse_activity(body))])
+    record = next(TranscriptReader(str(tmp_path)).records())
+    assert record.body()["customField"] == 1
+
+
+def test_a_partly_written_record_ends_the_segment(tmp_path):
+    write(tmp_path, [(INBOUND, message("c", f"text {index}")) for index in range(3)])
+    (path,) = TranscriptReader(str(tmp_path)).segments()
+    with open(path, "r+b") as segment:
+        segment.truncate(os.path.getsize(path) - 5)
+
+    reader = TranscriptReader(str(tmp_path))
+    assert [record.body()["text"] for record in reader.records()] == ["text 0", "text 1"]
+    assert reader.corrupt_segments == 1
+    assert reader.conversations() == {"c": 2}
+
+
+def test_a_corrupted_payload_fails_its_checksum(tmp_path):
+    write(tmp_path, [(INBOUND, message("c", f"text {index}")) for index in range(3)])
+    (path,) = TranscriptReader(str(tmp_path)).segments()
+    with open(path, "rb") as segment:
+        data = segment.read()
+    with open(path, "wb") as segment:
+        segment.write(data.replace(b"text 1", b"text X"))
+
+    reader = TranscriptReader(str(tmp_path))
+    assert [record.body()["text"] for record in reader.records()] == ["text 0"]
+    assert reader.corrupt_segments == 1
+
+
+def test_long_conversation_ids_are_cut_on_a_character_boundary(tmp_path):
+    long_id = "é" * 40000
+    write(tmp_path, [(INBOUND, message(long_id, "hi"))])
+    record = next(TranscriptReader(str(tmp_path)).records())
+    assert len(record.conversation_id.encode("utf-8")) <= 0xFFFF
+    assert long_id.startswith(record.conversation_id)
+    assert record.body()["conversation"]["id"] == long_id
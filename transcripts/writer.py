@@ -0,0 +1,173 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import os
+import queue
+import threading
+import time
+import zlib
+
+from botbuilder.schema import Activity
+
+from .records import HEADER, MAGIC, SEGMENT_SUFFIX, activity_to_wire, encode_payload
+
+# Put on the queue by close() to stop the writer.
+_STOP = object()
+
+
+class TranscriptWriter:
+    """Appends activities to segment files in ``directory`` from a background thread.
+
+    ``append()`` takes a snapshot of the activity's fields and queues it;
+    the writer thread encodes records and writes them ``batch_size`` at a
+    time. A segment is closed once it reaches ``segment_bytes`` and a new
+    one started; every process writes its own segments, named by start
+    time so they sort in order. When the queue is full records are dropped
+    and counted rather than blocking the turn.
+
+    A crash can leave a partly written record at the end of the last
+    segment; readers stop at it.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        segment_bytes: int = 64 * 1024 * 1024,
+        queue_size: int = 10000,
+        batch_size: int = 512,
+    ):
+        if not directory:
+            raise TypeError("TranscriptWriter: directory is required")
+        if queue_size <= 0:
+            raise ValueError("TranscriptWriter: queue_size must be positive")
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.batch_size = batch_size
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._stream = None
+        self._size = 0
+        self._segment_index = 0
+        self._thread = None
+        self._lock = threading.Lock()
+
+        self.records = 0
+        self.bytes = 0
+        self.segments = 0
+        self.dropped = 0
+        self.write_errors = 0
+
+    def append(self, direction: int, activity: Activity) -> bool:
+        """Queue one activity; False if the queue was full."""
+        conversation_id = activity.conversation.id if activity.conversation else ""
+        # A LazyActivity still holds the request JSON, which is exactly the
+        # wire form; anything else is walked into it.
+        body = activity.__dict__.get("_raw")
+        if body is None:
+            body = activity_to_wire(activity)
+
+        self._start()
+        try:
+            self._queue.put_nowait((time.time(), direction, conversation_id or "", body))
+        except queue.Full:
+            self.dropped += 1
+            return False
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "records": self.records,
+            "bytes": self.bytes,
+            "segments": self.segments,
+            "dropped": self.dropped,
+            "write_errors": self.write_errors,
+        }
+
+    def close(self, timeout: float = 5.0):
+        """Write what is queued and stop the writer thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._queue.put(_STOP)
+        thread.join(timeout)
+
+    def _start(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="transcript-writer", daemon=True
+                )
+                self._thread.start()
+
+    # The methods below only ever run on the writer thread.
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if _STOP in batch:
+                stopping = True
+                batch = [record for record in batch if record is not _STOP]
+
+            records = []
+            for timestamp, direction, conversation_id, body in batch:
+                try:
+                    payload = encode_payload(body)
+                except Exception:  # pylint: disable=broad-except
+                    self.write_errors += 1
+                    continue
+                conversation = conversation_id.encode("utf-8")
+                if len(conversation) > 0xFFFF:
+                    # Cut on a character boundary so the id still decodes.
+                    conversation = conversation[:0xFFFF].decode("utf-8", "ignore").encode("utf-8")
+                crc = zlib.crc32(payload, zlib.crc32(conversation))
+                records.append(
+                    HEADER.pack(len(payload), crc, timestamp, direction, len(conversation))
+                    + conversation
+                    + payload
+                )
+            try:
+                self._write(records)
+            except OSError:
+                self.write_errors += 1
+                self.dropped += len(records)
+
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+
+    def _write(self, records):
+        chunk = []
+        for record in records:
+            if self._stream is None or self._size + len(record) > self.segment_bytes:
+                if chunk:
+                    self._stream.write(b"".join(chunk))
+                    chunk = []
+                self._roll()
+            chunk.append(record)
+            self._size += len(record)
+            self.records += 1
+            self.bytes += len(record)
+        if chunk:
+            self._stream.write(b"".join(chunk))
+        if self._stream is not None:
+            self._stream.flush()
+
+    def _roll(self):
+        if self._stream is not None:
+            self._stream.close()
+        os.makedirs(self.directory, exist_ok=True)
+        name = f"{time.time_ns()}-{os.getpid()}-{self._segment_index}{SEGMENT_SUFFIX}"
+        self._segment_index += 1
+        self._stream = open(os.path.join(self.directory, name), "wb")
+        self._stream.write(MAGIC)
+        self._size = len(MAGIC)
+        self.segments += 1